@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate, useSearchParams } from 'react-router-dom';
 import {
   Box,
@@ -31,12 +31,22 @@ const EventList = () => {
   const organizationCode = searchParams.get('group');
   const [events, setEvents] = useState([]);
   const [rowCount, setRowCount] = useState(0);
+  const [hasMore, setHasMore] = useState(false);
   const [organizations, setOrganizations] = useState([]);
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [debouncedSearch, setDebouncedSearch] = useState('');
   const [paginationModel, setPaginationModel] = useState({ page: 0, pageSize: 25 });
+  const { page, pageSize } = paginationModel;
   const [refreshKey, setRefreshKey] = useState(0);
+  // 서버는 keyset(cursor) 페이지만 준다. cursorsRef.current[n]은 n번째 페이지를 요청할 cursor.
+  const cursorsRef = useRef([null]);
+
+  // 검색/소모임/페이지 크기가 바뀌면 모아 둔 cursor가 무효라 첫 페이지부터 다시 읽는다.
+  const resetPaging = (nextPageSize) => {
+    cursorsRef.current = [null];
+    setPaginationModel(prev => ({ page: 0, pageSize: nextPageSize ?? prev.pageSize }));
+  };
 
   // 필터용 조직 목록은 최초 1회만 로드
   useEffect(() => {
@@ -61,20 +71,20 @@ const EventList = () => {
   useEffect(() => {
     const timer = setTimeout(() => {
       setDebouncedSearch(searchTerm);
-      setPaginationModel(prev => ({ ...prev, page: 0 }));
+      resetPaging();
     }, 300);
     return () => clearTimeout(timer);
   }, [searchTerm]);
 
-  // 이벤트 목록: 서버 사이드 페이지네이션 + 검색
+  // 이벤트 목록: 서버 사이드 페이지네이션(cursor) + 검색
   useEffect(() => {
     let cancelled = false;
     const fetchEvents = async () => {
       try {
         setLoading(true);
         const params = {
-          page: paginationModel.page,
-          size: paginationModel.pageSize,
+          size: pageSize,
+          cursor: cursorsRef.current[page] || undefined,
           search: debouncedSearch || undefined,
         };
         const data = organizationCode
@@ -84,7 +94,10 @@ const EventList = () => {
         if (!cancelled) {
           const eventList = data.events || [];
           setEvents(eventList.map(event => ({ ...event, id: event.event_code })));
-          setRowCount(data.total ?? 0);
+          // 전체 건수(total)는 오지 않는다. 다음 페이지가 있으면 한 건 더 있다고 알려 '다음' 버튼만 살린다.
+          cursorsRef.current[page + 1] = data.next_cursor || null;
+          setHasMore(Boolean(data.next_cursor));
+          setRowCount(data.next_cursor ? (page + 1) * pageSize + 1 : page * pageSize + eventList.length);
         }
       } catch (error) {
         if (!cancelled) console.error('Failed to fetch events:', error);
@@ -95,11 +108,11 @@ const EventList = () => {
 
     fetchEvents();
     return () => { cancelled = true; };
-  }, [organizationCode, paginationModel.page, paginationModel.pageSize, debouncedSearch, refreshKey]);
+  }, [organizationCode, page, pageSize, debouncedSearch, refreshKey]);
 
   const handleOrganizationFilter = (event) => {
     const value = event.target.value;
-    setPaginationModel(prev => ({ ...prev, page: 0 }));
+    resetPaging();
     if (value) {
       setSearchParams({ group: value });
     } else {
@@ -108,10 +121,18 @@ const EventList = () => {
   };
 
   const handleClearFilter = () => {
-    setPaginationModel(prev => ({ ...prev, page: 0 }));
+    resetPaging();
     setSearchParams({});
   };
 
+  const handlePaginationModelChange = (model) => {
+    if (model.pageSize !== pageSize) {
+      resetPaging(model.pageSize);
+    } else {
+      setPaginationModel(model);
+    }
+  };
+
   const handleDelete = async (eventCode) => {
     if (window.confirm('이 이벤트를 삭제하시겠습니까?')) {
       try {
@@ -264,8 +285,13 @@ const EventList = () => {
           paginationMode="server"
           rowCount={rowCount}
           paginationModel={paginationModel}
-          onPaginationModelChange={setPaginationModel}
+          onPaginationModelChange={handlePaginationModelChange}
           pageSizeOptions={[10, 25, 50, 100]}
+          slotProps={{
+            pagination: {
+              labelDisplayedRows: ({ from, to, count }) => (hasMore ? `${from}–${to}` : `${from}–${to} / ${count}`),
+            },
+          }}
         />
       </Paper>
     </Box>
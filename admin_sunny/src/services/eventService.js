@@ -53,7 +53,8 @@ const buildQuery = (params = {}) => {
 };
 
 // 모든 이벤트 목록 조회
-// params 미지정 시 전체 반환(기존 동작). { page, size, order, search } 지정 시 서버 페이지네이션/검색.
+// params 미지정 시 전체 배열 반환(기존 동작). { size(또는 limit), cursor, search } 지정 시 서버 페이지네이션/검색.
+// 페이지 응답은 { events, next_cursor }이며, 다음 페이지는 next_cursor를 cursor로 보내 읽는다(전체 건수 없음).
 export const getAllEvents = async (params = {}) => {
   try {
     const response = await api.get(`/event${buildQuery(params)}`);
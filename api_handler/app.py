@@ -1,61 +1,167 @@
 import json
 import logging
+import os
+import time
 from dataclasses import asdict
-from container import ApiContainer
-from db_connection import get_session
+from container import ApiContainer, repository_class
+from db_connection import init_engine, warm_up, run_transaction, transaction_metrics
+from metrics import instrument_handler, set_property, timed
+from profiler import profile_handler
+from settings import settings
 from exception import (
     EventNotFoundException,
     NotFoundException,
     AlreadyCheckedException,
+    OrganizationNotFoundException,
+    IdempotencyKeyReusedException,
+    InvalidIdempotencyKeyException,
 )
 from exceptions.domain_exception import(
     EventRegistrationException,
     DefaltEventException
 )
-from schema import CheckInRequest, CheckinResponse, CheckinCountResponse
+from schema import (
+    CheckInRequest,
+    CheckinResponse,
+    CheckinCountResponse,
+    CheckInBatchRequest,
+    CheckinBatchItemResponse
+)
 from common_schema import LambdaResponse
 from hash_tool import hash_phone_number
+from repository import event_cache, organization_index, roster_cache, idempotency_cache
 
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# 컨테이너가 처리한 호출 수. 통계 로그를 CONTAINER_STATS_LOG_INTERVAL마다 한 번만 남기는 데 쓴다.
+_invocations = 0
+
+# 이 키가 있는 이벤트는 API Gateway 요청이 아니라 워밍업 호출로 처리한다.
+#   {"warmup": true} 또는 {"warmup": {"event_codes": ["E1"]}}
+WARMUP_EVENT_KEY = 'warmup'
+
+# Lambda init 단계(첫 요청 전)에 체크인 경로가 쓰는 엔진/다이얼렉트, DSQL 클라이언트,
+# repository 백엔드를 미리 준비하고, DB_WARMUP_ON_INIT이면 커넥션까지 열어 둔다.
+# Lambda 밖(테스트, 도구)에서는 건너뛴다.
+if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+    if settings.db_warmup_on_init:
+        warm_up()
+    else:
+        init_engine()
+    repository_class()
+
 
+@instrument_handler("api_handler")
+@profile_handler("api_handler")
 def lambda_handler(event, context):
+    if WARMUP_EVENT_KEY in event:
+        return handle_warmup(event, context)
+
     http_method = event.get('httpMethod', '')
     path = event.get('path', '')
 
     if http_method == 'GET' and path == '/checkin/info':
-        return handle_checkin_info(event, context)
+        response = handle_checkin_info(event, context)
+    elif http_method == 'POST' and path == '/check/batch':
+        response = handle_check_attendance_batch(event, context)
     else:
-        return handle_check_attendance(event, context)
+        response = handle_check_attendance(event, context)
+
+    _log_container_stats()
+    return response
+
+
+def _log_container_stats() -> None:
+    # 통계는 컨테이너 누적값이라 매 호출 남길 필요가 없다. 체크인 경로에 로그 한 줄씩 더하지 않도록 샘플링한다.
+    global _invocations
+    _invocations += 1
+    interval = settings.container_stats_log_interval
+    if interval <= 0 or _invocations % interval:
+        return
+    logger.info("container stats", extra={
+        "invocations": _invocations,
+        "event_cache": event_cache.stats(),
+        "organization_index": organization_index.stats(),
+        "roster_cache": roster_cache.stats(),
+        "idempotency_cache": idempotency_cache.stats(),
+        "transactions": transaction_metrics.stats(),
+    })
+
+
+def _serialize(make_body) -> str:
+    # 응답 dataclass → dict 변환(asdict)까지 직렬화 시간에 넣는다.
+    with timed("Serialization"):
+        return json.dumps(make_body())
+
+
+def _get_header(event, name: str):
+    # API Gateway는 헤더 이름 대소문자를 클라이언트가 보낸 그대로 넘긴다.
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def handle_warmup(event, context):
+    """
+    문 열기 전에 컨테이너를 데워 두는 호출. 가짜 체크인 없이 DB 커넥션과
+    이벤트/조직(/로스터) 캐시를 채우고 바로 돌아온다.
+    """
+    started = time.perf_counter()
+    options = event.get(WARMUP_EVENT_KEY)
+    event_codes = options.get('event_codes') if isinstance(options, dict) else None
+    try:
+        warmed = run_transaction(lambda session: ApiContainer(session).service.warm_up(event_codes))
+    except Exception as e:
+        logger.error(f"Error in handle_warmup: {e}")
+        set_property("ErrorType", type(e).__name__)
+        return LambdaResponse(
+            status_code=500,
+            body=json.dumps({"message": "warmup failed"})
+        ).to_dict()
+
+    warmed["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("warmup", extra=warmed)
+    return LambdaResponse(
+        status_code=200,
+        body=json.dumps(warmed)
+    ).to_dict()
 
 
 def handle_checkin_info(event, context):
     try:
-        with get_session() as session:
-            container = ApiContainer(session)
-            query_params = event.get('queryStringParameters') or {}
-            phone = query_params.get('phone', '')
-            slug = query_params.get('slug', '')
-
-            if not phone or not slug:
-                return LambdaResponse(
-                    status_code=400,
-                    body=json.dumps({"message": "phone and organization_code are required"})
-                ).to_dict()
-
-            origin_phone_number = phone.replace('-', '')
-            hashed_phone = hash_phone_number(origin_phone_number)
-            result: CheckinCountResponse = container.service.get_checkin_count_info(hashed_phone, slug)
+        query_params = event.get('queryStringParameters') or {}
+        phone = query_params.get('phone', '')
+        slug = query_params.get('slug', '')
 
+        if not phone or not slug:
             return LambdaResponse(
-                status_code=200,
-                body=json.dumps(asdict(result))
+                status_code=400,
+                body=json.dumps({"message": "phone and organization_code are required"})
             ).to_dict()
 
+        origin_phone_number = phone.replace('-', '')
+        hashed_phone = hash_phone_number(origin_phone_number)
+        result: CheckinCountResponse = run_transaction(
+            lambda session: ApiContainer(session).service.get_checkin_count_info(hashed_phone, slug)
+        )
+
+        return LambdaResponse(
+            status_code=200,
+            body=_serialize(lambda: asdict(result))
+        ).to_dict()
+
+    except OrganizationNotFoundException as e:
+        return LambdaResponse(
+            status_code=e.status_code,
+            body=json.dumps({"message": e.message})
+        ).to_dict()
+
     except Exception as e:
         logger.error(f"Error in handle_checkin_info: {e}")
+        set_property("ErrorType", type(e).__name__)
         return LambdaResponse(
             status_code=500,
             body=json.dumps({"message": "An error occurred"})
@@ -64,23 +170,31 @@ def handle_checkin_info(event, context):
 
 def handle_check_attendance(event, context):
     try:
-        with get_session() as session:
-            container = ApiContainer(session)
-            request_body: dict = json.loads(event.get('body', '{}'))
-            request = CheckInRequest(**request_body)
-            result: CheckinResponse = container.service.check_attendance(request)
+        request_body: dict = json.loads(event.get('body', '{}'))
+        request = CheckInRequest(**request_body)
+        idempotency_key = _get_header(event, 'Idempotency-Key')
+        if idempotency_key is not None:
+            result: CheckinResponse = run_transaction(
+                lambda session: ApiContainer(session).service.check_attendance_idempotent(request, idempotency_key)
+            )
+        else:
+            result: CheckinResponse = run_transaction(
+                lambda session: ApiContainer(session).service.check_attendance(request)
+            )
 
-            return LambdaResponse(
-                status_code=200,
-                body=json.dumps(asdict(result))
-            ).to_dict()
+        return LambdaResponse(
+            status_code=200,
+            body=_serialize(lambda: asdict(result))
+        ).to_dict()
 
     except (
             EventNotFoundException,
             NotFoundException,
             AlreadyCheckedException,
             EventRegistrationException,
-            DefaltEventException
+            DefaltEventException,
+            IdempotencyKeyReusedException,
+            InvalidIdempotencyKeyException
         ) as e:
         return LambdaResponse(
             status_code=e.status_code,
@@ -89,7 +203,49 @@ def handle_check_attendance(event, context):
 
     except Exception as e:
         logger.error(f"Error in handle_check_attendance: {e}")
+        set_property("ErrorType", type(e).__name__)
         return LambdaResponse(
             status_code=500,
             body=json.dumps({"message": "An error occurred"})
-        ).to_dict()
\ No newline at end of file
+        ).to_dict()
+
+
+def handle_check_attendance_batch(event, context):
+    """
+    키오스크가 오프라인 동안 쌓아 둔 체크인을 한 번에 올린다.
+    CHECKIN_BATCH_CHUNK_SIZE건씩 따로 커밋하므로(DSQL 트랜잭션당 행 수 제한), 한 청크가 실패하면
+    그 청크의 항목만 500으로 돌려주고 나머지는 계속 처리한다. 실패한 항목만 다시 보내면 된다.
+    """
+    try:
+        request = CheckInBatchRequest.from_dict(json.loads(event.get('body') or '{}'))
+    except (ValueError, KeyError, TypeError):
+        return LambdaResponse(
+            status_code=400,
+            body=json.dumps({"message": "items must be a list of {event_code, phone}"})
+        ).to_dict()
+
+    if not 0 < len(request.items) <= settings.checkin_batch_max_items:
+        return LambdaResponse(
+            status_code=400,
+            body=json.dumps({"message": f"items must contain 1 to {settings.checkin_batch_max_items} entries"})
+        ).to_dict()
+
+    results: list[CheckinBatchItemResponse] = []
+    chunk_size = settings.checkin_batch_chunk_size
+    for start in range(0, len(request.items), chunk_size):
+        chunk = request.items[start:start + chunk_size]
+        try:
+            results.extend(run_transaction(
+                lambda session: ApiContainer(session).service.check_attendance_batch(chunk)
+            ))
+        except Exception as e:
+            logger.error(f"Error in handle_check_attendance_batch: {e}")
+            set_property("ErrorType", type(e).__name__)
+            results.extend(
+                CheckinBatchItemResponse(status_code=500, message="An error occurred") for _ in chunk
+            )
+
+    return LambdaResponse(
+        status_code=200,
+        body=_serialize(lambda: {"results": [asdict(result) for result in results]})
+    ).to_dict()
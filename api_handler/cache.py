@@ -0,0 +1,192 @@
+"""
+컨테이너(프로세스) 수명 동안 유지되는 인메모리 캐시.
+
+Lambda 컨테이너는 요청 사이에 모듈 전역 상태를 유지하므로, 밋업 중 반복되는
+조회(같은 Event 한두 개)는 여기서 DB 왕복 없이 처리한다.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+
+class TTLCache:
+    """
+    크기 상한과 LRU 축출을 갖는 TTL 캐시.
+
+    만료된 항목도 바로 지우지 않고 get_entry로 돌려줘서, 호출 측이 값 전체를 다시
+    읽는 대신 싼 쿼리로 재검증(revalidate)한 뒤 touch로 수명을 연장할 수 있게 한다.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return entry.is_fresh(self._clock())
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = CacheEntry(value=value, expires_at=self._clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def touch(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = self._clock() + self.ttl_seconds
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.revalidations = self.evictions = 0
+
+    def record_hit(self) -> None:
+        self.hits += 1
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def record_revalidation(self) -> None:
+        self.revalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+        }
+
+
+class SnapshotIndex:
+    """
+    작고 거의 바뀌지 않는 테이블 전체를 한 번의 쿼리로 읽어 키 → 값 인덱스로 들고 있는다.
+
+    - refresh_seconds마다 전체를 다시 읽는다.
+    - 인덱스에 없는 키는 negative 캐시에 기록해 봇/오타 트래픽이 DB에 닿지 않게 한다.
+      새로 생긴 행을 빨리 보기 위해 모르는 키가 오면 인덱스를 다시 읽되,
+      그 재적재는 miss_reload_seconds에 한 번으로 제한한다.
+    """
+
+    def __init__(
+        self,
+        refresh_seconds: float,
+        negative_ttl_seconds: float,
+        miss_reload_seconds: float = 30,
+        negative_max_size: int = 1024,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.miss_reload_seconds = miss_reload_seconds
+        self._clock = clock
+        self._negative = TTLCache(max_size=negative_max_size, ttl_seconds=negative_ttl_seconds, clock=clock)
+        self._items: dict = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_seconds > 0
+
+    def get(self, key: Hashable, loader: Callable[[], dict]) -> Optional[Any]:
+        with self._lock:
+            if self._loaded_at is None or self._age() >= self.refresh_seconds:
+                self._reload(loader)
+
+            value = self._items.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            entry = self._negative.get_entry(key)
+            if entry is not None and self._negative.is_fresh(entry):
+                self.negative_hits += 1
+                return None
+
+            if self._age() >= self.miss_reload_seconds:
+                self._reload(loader)
+                value = self._items.get(key)
+                if value is not None:
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            self._negative.put(key, True)
+            return None
+
+    def prime(self, loader: Callable[[], dict]) -> int:
+        """인덱스가 없거나 refresh_seconds가 지났으면 다시 읽고 항목 수를 돌려준다."""
+        with self._lock:
+            if self._loaded_at is None or self._age() >= self.refresh_seconds:
+                self._reload(loader)
+            return len(self._items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items = {}
+            self._loaded_at = None
+            self._negative.clear()
+            self.hits = self.negative_hits = self.misses = self.reloads = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._items),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+        }
+
+    def _age(self) -> float:
+        return self._clock() - self._loaded_at
+
+    def _reload(self, loader: Callable[[], dict]) -> None:
+        self._items = loader()
+        self._loaded_at = self._clock()
+        self._negative.clear()
+        self.reloads += 1
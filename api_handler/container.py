@@ -1,13 +1,22 @@
 from service import ApiService
 from repository import ApiRepository
+from settings import settings
 from sqlalchemy.orm import Session
 
 import os
 
 
+def repository_class() -> type[ApiRepository]:
+    if settings.api_repository_backend == "core":
+        # core 백엔드를 쓰는 컨테이너만 문장 생성 비용을 치르도록 필요할 때 import한다.
+        from core_repository import CoreApiRepository
+        return CoreApiRepository
+    return ApiRepository
+
+
 class ApiContainer:
     def __init__(self, session: Session):
         self.env = os.environ.get('ENV', 'dev')
         self.session = session
-        self.repository = ApiRepository(session)
+        self.repository = repository_class()(session)
         self.service = ApiService(session, self.repository)
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+체크인 hot path용 Core 백엔드.
+
+ApiRepository는 호출마다 ORM Query를 새로 만들고, 두세 컬럼만 쓰면서도 identity map에
+올라가는 모델 객체 전체를 만든다. CoreApiRepository는 같은 결과를 돌려주되
+
+- SQLAlchemy Core select()/insert()를 모듈 로드 때 한 번만 만들고 bindparam으로 값만
+  바꿔 실행한다. 문장 객체가 그대로 재사용되므로 캐시 키가 memoize되고 컴파일 캐시에 바로 맞는다.
+- 필요한 컬럼만 골라 Row(named tuple)로 돌려준다.
+- Session.execute의 ORM 실행 단계를 거치지 않고 세션의 Connection에서 바로 실행한다
+  (같은 트랜잭션이므로 run_transaction의 commit/rollback은 그대로 적용된다).
+
+API_REPOSITORY_BACKEND=core일 때 ApiContainer가 이 클래스를 쓴다.
+"""
+from typing import Optional
+
+from db_connection import session_connection
+from kst import kst_year_range
+from metrics import timed_methods
+from model import Event, EventCheckIn, EventRegistration, CheckinCounter
+from sqlalchemy import select, func, and_, bindparam, Row
+from sqlalchemy.dialects.postgresql import insert
+
+from repository import ApiRepository
+
+_event = Event.__table__
+_registration = EventRegistration.__table__
+_checkin = EventCheckIn.__table__
+_counter = CheckinCounter.__table__
+
+# 서비스가 Event에서 읽는 컬럼(검증/체크인 비정규화/캐시 재검증)만 가져온다.
+_SELECT_EVENT = select(
+    _event.c.event_code,
+    _event.c.code_expired_at,
+    _event.c.event_version,
+    _event.c.organization_code,
+    _event.c.updated_at,
+).where(_event.c.event_code == bindparam("event_code"))
+
+_SELECT_EVENT_UPDATED_AT = select(
+    _event.c.updated_at
+).where(_event.c.event_code == bindparam("event_code"))
+
+_SELECT_REGISTRATION = select(
+    _registration.c.event_code,
+    _registration.c.phone,
+    _registration.c.name,
+).where(
+    _registration.c.event_code == bindparam("event_code"),
+    _registration.c.phone == bindparam("phone")
+)
+
+_INSERT_CHECKIN = insert(_checkin).on_conflict_do_nothing(
+    index_elements=['phone', 'event_code']
+).returning(_checkin.c.phone)
+
+_INCREMENT_COUNTER = insert(_counter).on_conflict_do_update(
+    index_elements=['phone', 'organization_code', 'event_version', 'year'],
+    set_={'checkin_count': _counter.c.checkin_count + 1}
+)
+
+
+def _scan_counts():
+    this_year = and_(_checkin.c.checked_at >= bindparam("year_start"), _checkin.c.checked_at < bindparam("year_end"))
+    by_organization = _checkin.c.organization_code == bindparam("organization_code")
+    by_version = and_(by_organization, _checkin.c.event_version == bindparam("event_version"))
+    return select(
+        func.count().filter(by_version).label('count'),
+        func.count().filter(this_year).label('this_year_count'),
+        func.count().filter(and_(this_year, by_organization)).label('this_year_by_organization_count'),
+        func.count().label('all_count'),
+        func.count().filter(by_organization).label('all_by_organization_count'),
+    ).where(_checkin.c.phone == bindparam("phone"))
+
+
+def _counter_counts():
+    this_year = _counter.c.year == bindparam("year")
+    by_organization = _counter.c.organization_code == bindparam("organization_code")
+    by_version = and_(by_organization, _counter.c.event_version == bindparam("event_version"))
+    total = _counter.c.checkin_count
+    return select(
+        func.coalesce(func.sum(total).filter(by_version), 0).label('count'),
+        func.coalesce(func.sum(total).filter(this_year), 0).label('this_year_count'),
+        func.coalesce(func.sum(total).filter(and_(this_year, by_organization)), 0).label('this_year_by_organization_count'),
+        func.coalesce(func.sum(total), 0).label('all_count'),
+        func.coalesce(func.sum(total).filter(by_organization), 0).label('all_by_organization_count'),
+    ).where(_counter.c.phone == bindparam("phone"))
+
+
+_SELECT_SCAN_COUNTS = _scan_counts()
+_SELECT_COUNTER_COUNTS = _counter_counts()
+
+
+@timed_methods("Repository")
+class CoreApiRepository(ApiRepository):
+    def _execute(self, statement, parameters: dict):
+        return session_connection(self._db).execute(statement, parameters)
+
+    def get_event_registration(self, event_code: str, phone: str) -> Optional[Row]:
+        return self._execute(_SELECT_REGISTRATION, {"event_code": event_code, "phone": phone}).first()
+
+    def _load_event(self, event_code: str) -> Optional[Event]:
+        row = self._execute(_SELECT_EVENT, {"event_code": event_code}).first()
+        if row is None:
+            return None
+        # validate_event를 쓰기 위해 세션에 붙지 않은 Event로 감싼다.
+        return Event(**row._mapping)
+
+    def _load_event_updated_at(self, event_code: str) -> Optional[Row]:
+        return self._execute(_SELECT_EVENT_UPDATED_AT, {"event_code": event_code}).first()
+
+    def insert_event_checkin(self, event_checkin: EventCheckIn) -> bool:
+        return self._execute(_INSERT_CHECKIN, {
+            "phone": event_checkin.phone,
+            "event_code": event_checkin.event_code,
+            "name": event_checkin.name,
+            "checked_at": event_checkin.checked_at,
+            "event_version": event_checkin.event_version,
+            "organization_code": event_checkin.organization_code,
+        }).first() is not None
+
+    def increment_checkin_counter(self, event_checkin: EventCheckIn) -> None:
+        self._execute(_INCREMENT_COUNTER, {
+            "phone": event_checkin.phone,
+            "organization_code": event_checkin.organization_code,
+            "event_version": event_checkin.event_version,
+            "year": event_checkin.checked_at.year,
+            "checkin_count": 1,
+        })
+
+    def get_checkin_counts(self, phone: str, organization_code: str, event_version: Optional[str] = None) -> Row:
+        return self._execute(_SELECT_SCAN_COUNTS, self._count_parameters(phone, organization_code, event_version)).one()
+
+    def get_checkin_counts_from_counter(self, phone: str, organization_code: str, event_version: Optional[str] = None) -> Row:
+        return self._execute(_SELECT_COUNTER_COUNTS, self._count_parameters(phone, organization_code, event_version)).one()
+
+    @staticmethod
+    def _count_parameters(phone: str, organization_code: str, event_version: Optional[str]) -> dict:
+        year_start, year_end = kst_year_range()
+        return {
+            "phone": phone,
+            "organization_code": organization_code,
+            "event_version": event_version,
+            "year": year_start.year,
+            "year_start": year_start,
+            "year_end": year_end,
+        }
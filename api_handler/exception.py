@@ -16,4 +16,22 @@ class EventNotFoundException(Exception):
     def __init__(self):
         self.message = "존재하지 않는 이벤트입니다."
         self.status_code = 400
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+
+class OrganizationNotFoundException(Exception):
+    def __init__(self):
+        self.message = "존재하지 않는 조직입니다."
+        self.status_code = 404
+        super().__init__(self.message)
+
+class IdempotencyKeyReusedException(Exception):
+    def __init__(self):
+        self.message = "같은 Idempotency-Key로 다른 요청을 보낼 수 없습니다."
+        self.status_code = 422
+        super().__init__(self.message)
+
+class InvalidIdempotencyKeyException(Exception):
+    def __init__(self):
+        self.message = "Idempotency-Key는 1~255자여야 합니다."
+        self.status_code = 400
+        super().__init__(self.message)
@@ -1,10 +1,153 @@
-from datetime import datetime
-from model import Event, EventCheckIn, EventRegistration, EventOrganization
+from datetime import datetime, timedelta
+from cache import TTLCache, SnapshotIndex
+from roster import RosterCache
+from settings import settings
+from kst import kst_year_range, now_kst
+from metrics import timed_methods
+from model import DEFAULT_EVENT_CODE, Event, EventCheckIn, EventRegistration, EventOrganization, CheckinCounter, IdempotencyRecord
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import event as sqlalchemy_event, func, and_, text, tuple_, Row
+from sqlalchemy.dialects.postgresql import insert
 from typing import Optional
 
 
+# 이벤트 확인 → 등록 확인 → 체크인 INSERT(+카운터 증가) → 카운트 집계를 한 번의 왕복으로 처리한다.
+# 데이터 변경 CTE(ins, counter)의 결과는 같은 문장의 다른 CTE 스냅샷에 보이지 않으므로,
+# counts는 INSERT 이전 기준이며 inserted = 1이면 호출 측에서 1을 더해야 한다.
+# ins의 WHERE는 Event.validate_event(now=checked_at)와 같은 규칙이다. 기본 이벤트 코드는
+# model.DEFAULT_EVENT_CODE를 바인딩해서 쓰고, 만료 비교는 validate_event와 함께 바꿔야 한다.
+_CHECK_IN_WITH_COUNTS_SQL = """
+    WITH ev AS (
+        SELECT event_code, organization_code, event_version, code_expired_at
+        FROM event
+        WHERE event_code = :event_code
+    ),
+    reg AS (
+        SELECT phone, name
+        FROM event_registration
+        WHERE event_code = :event_code AND phone = :phone
+    ),
+    ins AS (
+        INSERT INTO event_check_in
+            (phone, event_code, name, checked_at, event_version, organization_code)
+        SELECT reg.phone, ev.event_code, reg.name, :checked_at, ev.event_version, ev.organization_code
+        FROM ev CROSS JOIN reg
+        WHERE ev.event_code <> :default_event_code AND ev.code_expired_at >= :checked_at
+        ON CONFLICT (phone, event_code) DO NOTHING
+        RETURNING phone, organization_code, event_version
+    ),
+    counter AS (
+        INSERT INTO checkin_counter
+            (phone, organization_code, event_version, year, checkin_count)
+        SELECT phone, organization_code, event_version, :year, 1
+        FROM ins
+        ON CONFLICT (phone, organization_code, event_version, year)
+        DO UPDATE SET checkin_count = checkin_counter.checkin_count + 1
+        RETURNING 1
+    ),
+    counts AS ({counts})
+    SELECT
+        ev.event_code,
+        ev.organization_code,
+        ev.event_version,
+        ev.code_expired_at,
+        reg.phone IS NOT NULL AS registered,
+        reg.name,
+        (SELECT COUNT(*) FROM ins) AS inserted,
+        counts.count,
+        counts.this_year_count,
+        counts.this_year_by_organization_count,
+        counts.all_count,
+        counts.all_by_organization_count
+    FROM (SELECT 1) AS one
+    LEFT JOIN ev ON TRUE
+    LEFT JOIN reg ON TRUE
+    CROSS JOIN counts
+"""
+
+_SCAN_COUNTS_SQL = """
+        SELECT
+            COUNT(*) FILTER (
+                WHERE c.organization_code = ev.organization_code
+                  AND c.event_version = ev.event_version
+            ) AS count,
+            COUNT(*) FILTER (
+                WHERE c.checked_at >= :year_start AND c.checked_at < :year_end
+            ) AS this_year_count,
+            COUNT(*) FILTER (
+                WHERE c.checked_at >= :year_start AND c.checked_at < :year_end
+                  AND c.organization_code = ev.organization_code
+            ) AS this_year_by_organization_count,
+            COUNT(*) AS all_count,
+            COUNT(*) FILTER (
+                WHERE c.organization_code = ev.organization_code
+            ) AS all_by_organization_count
+        FROM event_check_in c CROSS JOIN ev
+        WHERE c.phone = :phone
+"""
+
+_COUNTER_COUNTS_SQL = """
+        SELECT
+            COALESCE(SUM(c.checkin_count) FILTER (
+                WHERE c.organization_code = ev.organization_code
+                  AND c.event_version = ev.event_version
+            ), 0) AS count,
+            COALESCE(SUM(c.checkin_count) FILTER (
+                WHERE c.year = :year
+            ), 0) AS this_year_count,
+            COALESCE(SUM(c.checkin_count) FILTER (
+                WHERE c.year = :year
+                  AND c.organization_code = ev.organization_code
+            ), 0) AS this_year_by_organization_count,
+            COALESCE(SUM(c.checkin_count), 0) AS all_count,
+            COALESCE(SUM(c.checkin_count) FILTER (
+                WHERE c.organization_code = ev.organization_code
+            ), 0) AS all_by_organization_count
+        FROM checkin_counter c CROSS JOIN ev
+        WHERE c.phone = :phone
+"""
+
+_CHECK_IN_WITH_SCAN_COUNTS = text(_CHECK_IN_WITH_COUNTS_SQL.format(counts=_SCAN_COUNTS_SQL))
+_CHECK_IN_WITH_COUNTER_COUNTS = text(_CHECK_IN_WITH_COUNTS_SQL.format(counts=_COUNTER_COUNTS_SQL))
+
+# 밋업 중 모든 체크인이 같은 Event 한두 개를 조회하므로 컨테이너 단위로 캐시한다.
+# TTL이 지난 항목은 updated_at만 다시 읽어 재검증하므로, 관리자 수정(EventService.update_event)은
+# 최대 TTL 안에 반영된다.
+event_cache = TTLCache(
+    max_size=settings.event_cache_max_size,
+    ttl_seconds=settings.event_cache_ttl_seconds
+)
+
+# event_organization은 작고 거의 바뀌지 않으므로 slug → 조직 인덱스를 통째로 들고 있는다.
+organization_index = SnapshotIndex(
+    refresh_seconds=settings.organization_cache_refresh_seconds,
+    negative_ttl_seconds=settings.organization_negative_cache_seconds
+)
+
+# 진행 중인 이벤트의 등록자 phone을 올려두고 로스터에 없는 번호는 거절한다. 거절 전에는
+# (이벤트당 ROSTER_CACHE_MISS_REFRESH_SECONDS에 한 번) 로스터를 전부 다시 읽어 새 등록을 확인한다.
+# ROSTER_CACHE_REFRESH_SECONDS=0(기본)이면 꺼진다.
+roster_cache = RosterCache(
+    refresh_seconds=settings.roster_cache_refresh_seconds,
+    overlap_seconds=settings.registration_commit_lag_seconds,
+    miss_refresh_seconds=settings.roster_cache_miss_refresh_seconds
+)
+
+
+# 완료된 /check 응답을 Idempotency-Key별로 들고 있는다. 원본은 idempotency_record 테이블이고,
+# 여기에는 커밋된 기록만 올린다.
+idempotency_cache = TTLCache(
+    max_size=settings.idempotency_cache_max_size,
+    ttl_seconds=settings.idempotency_ttl_seconds
+)
+
+def _detached_copy(instance):
+    """세션과 무관한 모델 사본. commit 만료나 세션 종료 후에도 속성을 읽을 수 있다."""
+    model = type(instance)
+    return model(**{column.key: getattr(instance, column.key) for column in model.__table__.columns})
+
+
+@timed_methods("Repository")
 class ApiRepository:
     def __init__(
         self,
@@ -18,12 +161,59 @@ class ApiRepository:
             phone=phone
         ).first()
 
+    def might_be_registered(self, event_code: str, phone: str) -> bool:
+        if not roster_cache.enabled:
+            return True
+        return roster_cache.might_be_registered(event_code, phone, self.get_registration_phones)
+
+    def get_registration_phones(self, event_code: str, since: Optional[datetime] = None) -> list[Row]:
+        query = self._db.query(EventRegistration.phone, EventRegistration.created_at).filter(
+            EventRegistration.event_code == event_code
+        )
+        if since is not None:
+            query = query.filter(EventRegistration.created_at >= since)
+        return query.all()
+
     def get_event(self, event_code: str) -> Optional[Event]:
+        if not event_cache.enabled:
+            return self._load_event(event_code)
+
+        entry = event_cache.get_entry(event_code)
+        if entry is not None:
+            if event_cache.is_fresh(entry):
+                event_cache.record_hit()
+                return entry.value
+
+            current = self._load_event_updated_at(event_code)
+            if current is not None and current.updated_at == entry.value.updated_at:
+                event_cache.record_revalidation()
+                event_cache.touch(event_code)
+                return entry.value
+            event_cache.invalidate(event_code)
+
+        event_cache.record_miss()
+        event = self._load_event(event_code)
+        if event is None:
+            return None
+        cached = _detached_copy(event)
+        event_cache.put(event_code, cached)
+        return cached
+
+    def _load_event(self, event_code: str) -> Optional[Event]:
         return self._db.query(Event).filter_by(event_code=event_code).first()
 
-    def insert_event_checkin(self, event_checkin: EventCheckIn) -> None:
-        self._db.add(event_checkin)
-        self._db.flush()
+    def _load_event_updated_at(self, event_code: str) -> Optional[Row]:
+        return self._db.query(Event.updated_at).filter_by(event_code=event_code).first()
+
+    def insert_event_checkin(self, event_checkin: EventCheckIn) -> bool:
+        """(phone, event_code)가 이미 있으면 아무것도 하지 않고 False를 돌려준다."""
+        stmt = insert(EventCheckIn).values(
+            **{column.key: getattr(event_checkin, column.key) for column in EventCheckIn.__table__.columns}
+        )
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=['phone', 'event_code']
+        ).returning(EventCheckIn.phone)
+        return self._db.execute(stmt).first() is not None
 
     def get_event_checkin(self, phone: str, event_code: str) -> Optional[EventCheckIn]:
         return self._db.query(EventCheckIn).filter_by(
@@ -39,18 +229,20 @@ class ApiRepository:
         ).all()
 
     def get_this_year_checkin(self, phone: str) -> int:
-        current_year = datetime.now().year
+        year_start, year_end = kst_year_range()
         return self._db.query(func.count(EventCheckIn.event_code)).filter(
             EventCheckIn.phone == phone,
-            extract('year', EventCheckIn.checked_at) == current_year
+            EventCheckIn.checked_at >= year_start,
+            EventCheckIn.checked_at < year_end
         ).scalar() or 0
 
     def get_this_year_checkin_by_organization(self, phone: str, organization_code: str) -> int:
-        current_year = datetime.now().year
+        year_start, year_end = kst_year_range()
         return self._db.query(func.count(EventCheckIn.event_code)).filter(
             EventCheckIn.phone == phone,
             EventCheckIn.organization_code == organization_code,
-            extract('year', EventCheckIn.checked_at) == current_year
+            EventCheckIn.checked_at >= year_start,
+            EventCheckIn.checked_at < year_end
         ).scalar() or 0
 
     def get_all_checkin(self, phone: str) -> int:
@@ -64,7 +256,229 @@ class ApiRepository:
             EventCheckIn.organization_code == organization_code
         ).scalar() or 0
 
+    def check_in_with_counts(self, event_code: str, phone: str, checked_at: datetime, use_counter: bool = False) -> Row:
+        statement = _CHECK_IN_WITH_COUNTER_COUNTS if use_counter else _CHECK_IN_WITH_SCAN_COUNTS
+        year_start, year_end = kst_year_range(checked_at.year)
+        return self._db.execute(statement, {
+            "event_code": event_code,
+            "phone": phone,
+            "checked_at": checked_at,
+            "default_event_code": DEFAULT_EVENT_CODE,
+            "year": checked_at.year,
+            "year_start": year_start,
+            "year_end": year_end,
+        }).one()
+
+    def get_event_registrations(self, keys: list[tuple[str, str]]) -> list[Row]:
+        """(event_code, phone) 목록의 등록을 PK IN 조회 한 번으로 가져온다."""
+        if not keys:
+            return []
+        return self._db.query(
+            EventRegistration.event_code,
+            EventRegistration.phone,
+            EventRegistration.name
+        ).filter(
+            tuple_(EventRegistration.event_code, EventRegistration.phone).in_(keys)
+        ).all()
+
+    def insert_event_checkins(self, event_checkins: list[EventCheckIn]) -> set[tuple[str, str]]:
+        """
+        여러 체크인을 multi-row INSERT 한 문장으로 넣고, 새로 들어간 (phone, event_code)를 돌려준다.
+        이미 있는 (phone, event_code)는 insert_event_checkin처럼 건너뛴다.
+        """
+        if not event_checkins:
+            return set()
+        columns = EventCheckIn.__table__.columns
+        stmt = insert(EventCheckIn).values([
+            {column.key: getattr(event_checkin, column.key) for column in columns}
+            for event_checkin in event_checkins
+        ])
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=['phone', 'event_code']
+        ).returning(EventCheckIn.phone, EventCheckIn.event_code)
+        return {(row.phone, row.event_code) for row in self._db.execute(stmt)}
+
+    def increment_checkin_counters(self, event_checkins: list[EventCheckIn]) -> None:
+        """increment_checkin_counter의 다건 버전. 한 문장 안에서 같은 키를 두 번 갱신할 수 없으므로 키별로 합친다."""
+        increments: dict[tuple, int] = {}
+        for event_checkin in event_checkins:
+            key = (event_checkin.phone, event_checkin.organization_code, event_checkin.event_version, event_checkin.checked_at.year)
+            increments[key] = increments.get(key, 0) + 1
+        if not increments:
+            return
+        stmt = insert(CheckinCounter).values([
+            {"phone": phone, "organization_code": organization_code, "event_version": event_version,
+             "year": year, "checkin_count": count}
+            for (phone, organization_code, event_version, year), count in sorted(increments.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['phone', 'organization_code', 'event_version', 'year'],
+            set_={'checkin_count': CheckinCounter.checkin_count + stmt.excluded.checkin_count}
+        )
+        self._db.execute(stmt)
+
+    def get_checkin_count_groups(self, phones: list[str], use_counter: bool = False) -> list[Row]:
+        """
+        여러 phone의 카운트 재료를 한 번에 읽는다. (phone, organization_code, event_version, this_year)별
+        합계(total)를 돌려주고, 호출 측이 get_checkin_counts와 같은 다섯 카운트로 접는다.
+        """
+        if not phones:
+            return []
+        if use_counter:
+            this_year = (CheckinCounter.year == now_kst().year).label('this_year')
+            return self._db.query(
+                CheckinCounter.phone,
+                CheckinCounter.organization_code,
+                CheckinCounter.event_version,
+                this_year,
+                func.sum(CheckinCounter.checkin_count).label('total'),
+            ).filter(
+                CheckinCounter.phone.in_(phones)
+            ).group_by(
+                CheckinCounter.phone, CheckinCounter.organization_code, CheckinCounter.event_version, this_year
+            ).all()
+
+        year_start, year_end = kst_year_range()
+        this_year = and_(EventCheckIn.checked_at >= year_start, EventCheckIn.checked_at < year_end).label('this_year')
+        return self._db.query(
+            EventCheckIn.phone,
+            EventCheckIn.organization_code,
+            EventCheckIn.event_version,
+            this_year,
+            func.count().label('total'),
+        ).filter(
+            EventCheckIn.phone.in_(phones)
+        ).group_by(
+            EventCheckIn.phone, EventCheckIn.organization_code, EventCheckIn.event_version, this_year
+        ).all()
+
+    def get_checkin_counts(self, phone: str, organization_code: str, event_version: Optional[str] = None) -> Row:
+        """phone의 체크인 행을 한 번만 훑어 버전별/올해/조직별/전체 카운트를 함께 집계한다."""
+        year_start, year_end = kst_year_range()
+        this_year = and_(EventCheckIn.checked_at >= year_start, EventCheckIn.checked_at < year_end)
+        by_organization = EventCheckIn.organization_code == organization_code
+        by_version = and_(by_organization, EventCheckIn.event_version == event_version)
+
+        return self._db.query(
+            func.count().filter(by_version).label('count'),
+            func.count().filter(this_year).label('this_year_count'),
+            func.count().filter(and_(this_year, by_organization)).label('this_year_by_organization_count'),
+            func.count().label('all_count'),
+            func.count().filter(by_organization).label('all_by_organization_count'),
+        ).filter(
+            EventCheckIn.phone == phone
+        ).one()
+
+    def increment_checkin_counter(self, event_checkin: EventCheckIn) -> None:
+        stmt = insert(CheckinCounter).values(
+            phone=event_checkin.phone,
+            organization_code=event_checkin.organization_code,
+            event_version=event_checkin.event_version,
+            year=event_checkin.checked_at.year,
+            checkin_count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['phone', 'organization_code', 'event_version', 'year'],
+            set_={'checkin_count': CheckinCounter.checkin_count + 1}
+        )
+        self._db.execute(stmt)
+
+    def get_checkin_counts_from_counter(self, phone: str, organization_code: str, event_version: Optional[str] = None) -> Row:
+        """get_checkin_counts와 같은 결과를 checkin_counter의 phone 범위 조회로 구한다."""
+        this_year = CheckinCounter.year == now_kst().year
+        by_organization = CheckinCounter.organization_code == organization_code
+        by_version = and_(by_organization, CheckinCounter.event_version == event_version)
+        total = CheckinCounter.checkin_count
+
+        return self._db.query(
+            func.coalesce(func.sum(total).filter(by_version), 0).label('count'),
+            func.coalesce(func.sum(total).filter(this_year), 0).label('this_year_count'),
+            func.coalesce(func.sum(total).filter(and_(this_year, by_organization)), 0).label('this_year_by_organization_count'),
+            func.coalesce(func.sum(total), 0).label('all_count'),
+            func.coalesce(func.sum(total).filter(by_organization), 0).label('all_by_organization_count'),
+        ).filter(
+            CheckinCounter.phone == phone
+        ).one()
+
+    def get_active_event_codes(self, now: datetime, limit: int) -> list[str]:
+        """아직 코드가 만료되지 않은 이벤트를 만료가 빠른 순으로 돌려준다."""
+        rows = self._db.query(Event.event_code).filter(
+            Event.code_expired_at >= now
+        ).order_by(Event.code_expired_at).limit(limit).all()
+        return [row.event_code for row in rows]
+
+    def prime_event_caches(self, event_code: str) -> bool:
+        """event_code의 Event(와 켜져 있으면 로스터)를 캐시에 올린다. 이벤트가 없으면 False."""
+        if self.get_event(event_code) is None:
+            return False
+        if roster_cache.enabled:
+            roster_cache.prime(event_code, self.get_registration_phones)
+        return True
+
+    def prime_organizations(self) -> int:
+        if not organization_index.enabled:
+            return 0
+        return organization_index.prime(self._load_organizations_by_slug)
+
+    def get_idempotency_record(self, idempotency_key: str) -> Optional[IdempotencyRecord]:
+        entry = idempotency_cache.get_entry(idempotency_key)
+        if entry is not None and idempotency_cache.is_fresh(entry):
+            idempotency_cache.record_hit()
+            return entry.value
+
+        idempotency_cache.record_miss()
+        now = datetime.now()
+        record = self._db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.idempotency_key == idempotency_key,
+            IdempotencyRecord.expires_at > now
+        ).first()
+        if record is None:
+            return None
+        cached = _detached_copy(record)
+        if idempotency_cache.enabled:
+            idempotency_cache.put(idempotency_key, cached, ttl_seconds=(record.expires_at - now).total_seconds())
+        return cached
+
+    def save_idempotency_record(self, idempotency_key: str, request_hash: str, response_body: str, now: datetime) -> bool:
+        """
+        응답 기록을 남긴다. 같은 키의 살아 있는 기록이 이미 있으면(동시 요청이 먼저 커밋함)
+        덮어쓰지 않고 False를 돌려준다.
+        """
+        record = IdempotencyRecord(
+            idempotency_key=idempotency_key,
+            request_hash=request_hash,
+            response_body=response_body,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.idempotency_ttl_seconds)
+        )
+        values = {column.key: getattr(record, column.key) for column in IdempotencyRecord.__table__.columns}
+        # 같은 키의 만료된 기록만 덮어쓴다(get_idempotency_record와 같은 만료 기준).
+        stmt = insert(IdempotencyRecord).values(**values).on_conflict_do_update(
+            index_elements=['idempotency_key'],
+            set_={key: value for key, value in values.items() if key != 'idempotency_key'},
+            where=IdempotencyRecord.expires_at <= now
+        ).returning(IdempotencyRecord.idempotency_key)
+        if self._db.execute(stmt).first() is None:
+            return False
+
+        # 커밋 전에 캐시에 올리면 OCC로 재시도되거나 롤백된 응답이 재생될 수 있다.
+        if idempotency_cache.enabled:
+            sqlalchemy_event.listen(
+                self._db, "after_commit",
+                lambda session: idempotency_cache.put(idempotency_key, record),
+                once=True
+            )
+        return True
+
     def get_organization_by_slug(self, slug: str) -> Optional[EventOrganization]:
-        return self._db.query(EventOrganization).filter_by(
-            slug=slug
-        ).first()
\ No newline at end of file
+        if not organization_index.enabled:
+            return self._db.query(EventOrganization).filter_by(
+                slug=slug
+            ).first()
+        return organization_index.get(slug, self._load_organizations_by_slug)
+
+    def _load_organizations_by_slug(self) -> dict[str, EventOrganization]:
+        return {
+            organization.slug: _detached_copy(organization)
+            for organization in self._db.query(EventOrganization).all()
+        }
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+이벤트 등록자 로스터 캐시.
+
+실패한 체크인의 대부분은 전화번호 오타다. 진행 중인 이벤트의 해시 phone 목록을
+컨테이너 메모리에 올려두면, 로스터에 없는 번호는 DB 조회 없이 404로 돌려보낼 수 있다.
+
+- 로스터는 "없음"만 판정한다. 로스터에 있다고 나오면(오탐 포함) 기존처럼 DB에서
+  등록 행을 읽으므로, 삭제된 등록이나 Bloom 필터 오탐은 결과에 영향이 없다.
+- csv_handler가 이벤트 도중 등록자를 추가해도, 로스터는 refresh_seconds마다
+  created_at 기준으로 증분 갱신된다. created_at은 업로드 트랜잭션의 시작 시각이므로
+  워터마크보다 overlap_seconds(최장 트랜잭션 길이 이상) 앞에서부터 다시 읽는다.
+- 로스터에 없다고 나오면 거절하기 전에 그 이벤트의 로스터를 전부 다시 읽고 다시 본다.
+  커밋이 얼마나 늦었든 방금 등록된 사람이 404를 받지 않게 하기 위해서다. 오타가 몰려도
+  DB에 닿는 건 이벤트마다 miss_refresh_seconds에 한 번이고, 그 사이의 거절은 그만큼만
+  오래된 로스터 기준이다.
+- Bloom 필터는 적재 시 크기의 2배를 용량으로 잡는다. 증분으로 용량을 넘기면 오탐률을
+  지키기 위해 다음 갱신에서 전체를 다시 읽어 새로 만든다.
+"""
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from cache import TTLCache
+
+
+def _phone_key(hashed_phone: str) -> int:
+    # SHA-256 hex의 앞 64비트만 보관한다. 충돌은 오탐(DB 조회로 넘어감)일 뿐이다.
+    return int(hashed_phone[:16], 16)
+
+
+class BloomFilter:
+    """해시 phone(SHA-256 hex)용 Bloom 필터. 입력이 이미 균등 해시이므로 hex 조각을 해시값으로 쓴다."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, hashed_phone: str) -> Iterable[int]:
+        h1 = int(hashed_phone[:16], 16)
+        h2 = int(hashed_phone[16:32], 16) | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, hashed_phone: str) -> None:
+        for position in self._positions(hashed_phone):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, hashed_phone: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(hashed_phone))
+
+
+class EventRoster:
+    def __init__(self, phones: list[str], watermark: Optional[datetime], loaded_at: float, bloom_threshold: int):
+        if len(phones) > bloom_threshold:
+            self.capacity = len(phones) * 2
+            self._members = BloomFilter(capacity=self.capacity)
+            self._contains = self._members.__contains__
+            self._add = self._members.add
+        else:
+            # set은 용량 제한이 없다.
+            self.capacity = None
+            self._members = set()
+            self._contains = lambda phone: _phone_key(phone) in self._members
+            self._add = lambda phone: self._members.add(_phone_key(phone))
+        self.added = 0
+        self.watermark = watermark
+        self.refreshed_at = loaded_at
+        self.add_all(phones)
+
+    def add_all(self, phones: Iterable[str]) -> None:
+        for phone in phones:
+            self._add(phone)
+            self.added += 1
+
+    @property
+    def over_capacity(self) -> bool:
+        # overlap 구간의 중복도 세므로 실제보다 일찍 다시 만들 뿐, 늦게 만들지는 않는다.
+        return self.capacity is not None and self.added > self.capacity
+
+    def might_contain(self, hashed_phone: str) -> bool:
+        return self._contains(hashed_phone)
+
+
+class RosterCache:
+    def __init__(
+        self,
+        refresh_seconds: float,
+        overlap_seconds: float = 300,
+        miss_refresh_seconds: float = 1,
+        bloom_threshold: int = 50000,
+        max_events: int = 8,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self.bloom_threshold = bloom_threshold
+        self._clock = clock
+        self._rosters = TTLCache(max_size=max_events, ttl_seconds=float("inf"), clock=clock)
+        self._lock = threading.Lock()
+        self.rejections = 0
+        self.passes = 0
+        self.loads = 0
+        self.refreshes = 0
+        self.miss_refreshes = 0
+        self.rebuilds = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_seconds > 0
+
+    def might_be_registered(
+        self,
+        event_code: str,
+        hashed_phone: str,
+        loader: Callable[[str, Optional[datetime]], list]
+    ) -> bool:
+        """
+        False면 등록되지 않은 것이 확실하다(최대 miss_refresh_seconds 전 기준).
+        loader(event_code, since)는 since 이후(None이면 전체) 등록의 (phone, created_at) 행을 돌려준다.
+        """
+        with self._lock:
+            roster = self._get_roster(event_code, loader)
+            if not roster.might_contain(hashed_phone) \
+                    and self._clock() - roster.refreshed_at >= self.miss_refresh_seconds:
+                # 늦게 커밋된 업로드는 워터마크 - overlap보다 이른 created_at을 가질 수 있어 전부 다시 읽는다.
+                roster = self._load(event_code, loader)
+                self.miss_refreshes += 1
+            if roster.might_contain(hashed_phone):
+                self.passes += 1
+                return True
+            self.rejections += 1
+            return False
+
+    def prime(self, event_code: str, loader: Callable[[str, Optional[datetime]], list]) -> None:
+        """체크인 없이 event_code의 로스터를 적재(또는 갱신)해 둔다."""
+        with self._lock:
+            self._get_roster(event_code, loader)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rosters.clear()
+            self.rejections = self.passes = self.loads = self.refreshes = self.miss_refreshes = self.rebuilds = 0
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self._rosters),
+            "rejections": self.rejections,
+            "passes": self.passes,
+            "loads": self.loads,
+            "refreshes": self.refreshes,
+            "miss_refreshes": self.miss_refreshes,
+            "rebuilds": self.rebuilds,
+        }
+
+    def _get_roster(self, event_code: str, loader) -> EventRoster:
+        entry = self._rosters.get_entry(event_code)
+        if entry is None:
+            self.loads += 1
+            return self._load(event_code, loader)
+
+        roster: EventRoster = entry.value
+        if self._clock() - roster.refreshed_at >= self.refresh_seconds:
+            if roster.over_capacity:
+                roster = self._load(event_code, loader)
+                self.rebuilds += 1
+            else:
+                self._refresh(roster, event_code, loader)
+            self.refreshes += 1
+        return roster
+
+    def _load(self, event_code: str, loader) -> EventRoster:
+        """event_code의 등록 전체를 읽어 로스터를 새로 만든다."""
+        rows = loader(event_code, None)
+        roster = EventRoster(
+            phones=[row.phone for row in rows],
+            watermark=max((row.created_at for row in rows if row.created_at), default=None),
+            loaded_at=self._clock(),
+            bloom_threshold=self.bloom_threshold
+        )
+        self._rosters.put(event_code, roster)
+        return roster
+
+    def _refresh(self, roster: EventRoster, event_code: str, loader) -> None:
+        """워터마크 - overlap 이후의 등록만 읽어 로스터에 더한다."""
+        since = roster.watermark - self.overlap if roster.watermark else None
+        rows = loader(event_code, since)
+        roster.add_all(row.phone for row in rows)
+        roster.watermark = max(
+            [row.created_at for row in rows if row.created_at] + ([roster.watermark] if roster.watermark else []),
+            default=None
+        )
+        roster.refreshed_at = self._clock()
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -18,4 +19,33 @@ class CheckinCountResponse:
 class CheckinResponse:
     name: str
     count: int
-    checkin_count_info: CheckinCountResponse
\ No newline at end of file
+    checkin_count_info: CheckinCountResponse
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CheckinResponse":
+        return cls(
+            name=data["name"],
+            count=data["count"],
+            checkin_count_info=CheckinCountResponse(**data["checkin_count_info"])
+        )
+
+@dataclass
+class CheckInBatchRequest:
+    items: list[CheckInRequest]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CheckInBatchRequest":
+        items = [CheckInRequest(**item) for item in data["items"]]
+        # 항목 처리 중(phone.replace 등)이 아니라 여기서 걸러야 청크 전체가 500이 되지 않는다.
+        for item in items:
+            if not isinstance(item.event_code, str) or not isinstance(item.phone, str):
+                raise TypeError("event_code와 phone은 문자열이어야 합니다.")
+        return cls(items=items)
+
+
+@dataclass
+class CheckinBatchItemResponse:
+    """/check/batch의 항목별 결과. status_code와 result/message는 같은 요청을 /check로 보냈을 때와 같다."""
+    status_code: int
+    result: Optional[CheckinResponse] = None
+    message: Optional[str] = None
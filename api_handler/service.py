@@ -1,15 +1,39 @@
 from model import Event, EventRegistration, EventCheckIn
-from hash_tool import hash_phone_number
+from hash_tool import hash_phone_number, hash_phone_numbers
+from settings import settings
 
-from schema import CheckInRequest, CheckinResponse, CheckinCountResponse
+import hashlib
+import json
+from dataclasses import asdict
+
+from schema import CheckInRequest, CheckinResponse, CheckinCountResponse, CheckinBatchItemResponse
+from exceptions.domain_exception import EventRegistrationException, DefaltEventException
 from exception import (
     EventNotFoundException,
     NotFoundException,
-    AlreadyCheckedException
+    AlreadyCheckedException,
+    OrganizationNotFoundException,
+    IdempotencyKeyReusedException,
+    InvalidIdempotencyKeyException
 )
 from repository import ApiRepository
 
 from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import NamedTuple, Optional, Union
+
+CHECKIN_MODE_SINGLE_STATEMENT = "single_statement"
+CHECKIN_COUNT_SOURCE_COUNTER = "counter"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class _CheckinCounts(NamedTuple):
+    count: int
+    this_year_count: int
+    this_year_by_organization_count: int
+    all_count: int
+    all_by_organization_count: int
+
 
 class ApiService:
     def __init__(
@@ -21,11 +45,17 @@ class ApiService:
         self._repo: ApiRepository = api_repository
 
     def check_attendance(self, request: CheckInRequest) -> CheckinResponse:
+        if settings.checkin_mode == CHECKIN_MODE_SINGLE_STATEMENT:
+            return self._check_attendance_single_statement(request)
+
         event: Event = self._repo.get_event(request.event_code)
         self._check_event(event)
 
         origin_phone_number: str = request.phone.replace('-', '')
         target_phone_number = hash_phone_number(origin_phone_number)
+        if not self._repo.might_be_registered(request.event_code, target_phone_number):
+            raise NotFoundException()
+
         event_registration: EventRegistration = self._repo.get_event_registration(
             event_code=request.event_code,
             phone=target_phone_number
@@ -33,30 +63,230 @@ class ApiService:
         if not event_registration:
             raise NotFoundException()
 
-        self._check_already_checked(request.event_code, event.organization_code, event.event_version, target_phone_number)
-
         checkin: EventCheckIn = EventCheckIn.create(event, event_registration)
-        self._repo.insert_event_checkin(checkin)
-        self._db.commit()
-        
-        result = self._make_checkin_response(request.event_code, event.organization_code, event.event_version, target_phone_number)
-        return result
+        # rollback 후 ORM 객체 속성에 접근하면 만료된 객체를 다시 SELECT하므로 미리 꺼내 둔다.
+        organization_code, event_version = event.organization_code, event.event_version
+        name = event_registration.name
+
+        if not self._repo.insert_event_checkin(checkin):
+            self._raise_already_checked(target_phone_number, organization_code, event_version)
+        self._repo.increment_checkin_counter(checkin)
+
+        return self._make_checkin_response(name, organization_code, event_version, target_phone_number)
+
+    def check_attendance_batch(self, requests: list[CheckInRequest]) -> list[CheckinBatchItemResponse]:
+        """
+        여러 체크인을 한 트랜잭션에서 처리한다. 이벤트는 event_code별로 한 번, 등록은 IN 조회 한 번,
+        체크인과 카운터는 multi-row 문장 한 번씩, 카운트는 phone 묶음 조회 한 번으로 끝낸다.
+        항목별 결과는 같은 요청을 check_attendance로 보냈을 때의 응답/예외와 같다.
+        (이미 체크인됨은 rollback 대신 항목 결과로만 남기고, 같은 배치 안의 중복은 첫 항목만 성공한다.)
+        """
+        results: list[Optional[CheckinBatchItemResponse]] = [None] * len(requests)
+        hashed = hash_phone_numbers([request.phone.replace('-', '') for request in requests])
+        events = {code: self._load_batch_event(code) for code in dict.fromkeys(request.event_code for request in requests)}
+
+        pending = []
+        for index, request in enumerate(requests):
+            event = events[request.event_code]
+            if isinstance(event, Exception):
+                results[index] = self._batch_error(event)
+            else:
+                pending.append((index, event, hashed[request.phone.replace('-', '')]))
+
+        registrations = {
+            (registration.event_code, registration.phone): registration
+            for registration in self._repo.get_event_registrations(
+                sorted({(event.event_code, phone) for _, event, phone in pending})
+            )
+        }
+
+        checkins: dict[tuple[str, str], EventCheckIn] = {}
+        registered = []
+        for index, event, phone in pending:
+            registration = registrations.get((event.event_code, phone))
+            if registration is None:
+                results[index] = self._batch_error(NotFoundException())
+                continue
+            key = (phone, event.event_code)
+            if key not in checkins:
+                checkins[key] = EventCheckIn.create(event, registration)
+            registered.append((index, event, registration, key))
+
+        inserted = self._repo.insert_event_checkins([checkins[key] for key in sorted(checkins)])
+        self._repo.increment_checkin_counters([checkins[key] for key in sorted(inserted)])
+
+        groups: dict[str, list] = {}
+        for row in self._repo.get_checkin_count_groups(
+            sorted({key[0] for _, _, _, key in registered}),
+            use_counter=self._use_checkin_counter()
+        ):
+            groups.setdefault(row.phone, []).append(row)
+
+        for index, event, registration, key in registered:
+            counts = self._fold_counts(groups.get(key[0], []), event.organization_code, event.event_version)
+            if key in inserted:
+                inserted.discard(key)
+                results[index] = CheckinBatchItemResponse(
+                    status_code=200,
+                    result=CheckinResponse(
+                        name=registration.name,
+                        count=counts.count,
+                        checkin_count_info=self._to_checkin_count_response(counts)
+                    )
+                )
+            else:
+                results[index] = self._batch_error(AlreadyCheckedException(counts.count))
+        return results
+
+    def _load_batch_event(self, event_code: str) -> Union[Event, Exception]:
+        try:
+            event = self._repo.get_event(event_code)
+            self._check_event(event)
+            return event
+        except (EventNotFoundException, EventRegistrationException, DefaltEventException) as e:
+            return e
+
+    @staticmethod
+    def _batch_error(error: Exception) -> CheckinBatchItemResponse:
+        return CheckinBatchItemResponse(status_code=error.status_code, message=error.message)
+
+    @staticmethod
+    def _fold_counts(groups: list, organization_code: str, event_version: str) -> _CheckinCounts:
+        count = this_year = this_year_by_organization = total = by_organization = 0
+        for group in groups:
+            same_organization = group.organization_code == organization_code
+            total += group.total
+            if same_organization:
+                by_organization += group.total
+                if group.event_version == event_version:
+                    count += group.total
+            if group.this_year:
+                this_year += group.total
+                if same_organization:
+                    this_year_by_organization += group.total
+        return _CheckinCounts(count, this_year, this_year_by_organization, total, by_organization)
+
+    def check_attendance_idempotent(self, request: CheckInRequest, idempotency_key: str) -> CheckinResponse:
+        """
+        Idempotency-Key가 붙은 /check. 같은 키로 이미 완료된 요청이 있으면 체크인을 다시 하지 않고
+        처음 응답을 그대로 돌려준다. 응답 기록은 체크인과 같은 트랜잭션에서 남긴다.
+        """
+        if not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise InvalidIdempotencyKeyException()
+
+        request_hash = self._request_hash(request)
+        replayed = self._replay(idempotency_key, request_hash)
+        if replayed:
+            return replayed
+
+        try:
+            response = self.check_attendance(request)
+        except AlreadyCheckedException:
+            # 같은 키의 동시 재시도가 먼저 커밋했을 수 있다. _raise_already_checked가 rollback했으므로
+            # 여기서 다시 읽으면 그 커밋이 보인다.
+            replayed = self._replay(idempotency_key, request_hash)
+            if replayed:
+                return replayed
+            raise
+
+        if not self._repo.save_idempotency_record(
+            idempotency_key,
+            request_hash,
+            json.dumps(asdict(response)),
+            datetime.now()
+        ):
+            # 같은 키의 동시 요청이 먼저 기록을 커밋했다. 이 요청의 체크인은 되돌리고 그 기록을 따른다.
+            self._db.rollback()
+            replayed = self._replay(idempotency_key, request_hash)
+            if replayed is None:
+                raise IdempotencyKeyReusedException()
+            return replayed
+        return response
+
+    def _replay(self, idempotency_key: str, request_hash: str) -> Optional[CheckinResponse]:
+        record = self._repo.get_idempotency_record(idempotency_key)
+        if record is None:
+            return None
+        if record.request_hash != request_hash:
+            raise IdempotencyKeyReusedException()
+        return CheckinResponse.from_dict(json.loads(record.response_body))
+
+    @staticmethod
+    def _request_hash(request: CheckInRequest) -> str:
+        # 원본 번호 대신 salt가 들어간 해시를 섞어 기록에서 전화번호를 역산할 수 없게 한다.
+        hashed_phone = hash_phone_number(request.phone.replace('-', ''))
+        return hashlib.sha256(f"{request.event_code}\n{hashed_phone}".encode('utf-8')).hexdigest()
+
+    def _check_attendance_single_statement(self, request: CheckInRequest) -> CheckinResponse:
+        origin_phone_number: str = request.phone.replace('-', '')
+        target_phone_number = hash_phone_number(origin_phone_number)
+        checked_at = datetime.now()
+        row = self._repo.check_in_with_counts(
+            request.event_code,
+            target_phone_number,
+            checked_at,
+            use_counter=self._use_checkin_counter()
+        )
+
+        if row.event_code is None:
+            raise EventNotFoundException()
+        Event(event_code=row.event_code, code_expired_at=row.code_expired_at).validate_event(now=checked_at)
+
+        if not row.registered:
+            raise NotFoundException()
+
+        if not row.inserted:
+            # 충돌한 체크인이 이 문장의 스냅샷 이후에 커밋됐을 수 있으므로(동시 요청) 카운트는 다시 읽는다.
+            self._raise_already_checked(target_phone_number, row.organization_code, row.event_version)
+
+        return CheckinResponse(
+            name=row.name,
+            count=row.count + 1,
+            checkin_count_info=CheckinCountResponse(
+                this_year_count=row.this_year_count + 1,
+                this_year_by_organization_count=row.this_year_by_organization_count + 1,
+                all_count=row.all_count + 1,
+                all_by_organization_count=row.all_by_organization_count + 1
+            )
+        )
+
+    def warm_up(self, event_codes: Optional[list[str]] = None) -> dict:
+        """
+        워밍업 이벤트용. 지정한(없으면 아직 만료되지 않은) 이벤트와 조직 인덱스를
+        컨테이너 캐시에 올려 두고, 무엇을 올렸는지 돌려준다.
+        """
+        if event_codes is None:
+            event_codes = self._repo.get_active_event_codes(datetime.now(), limit=settings.event_cache_max_size)
+        warmed = [code for code in event_codes if self._repo.prime_event_caches(code)]
+        return {
+            "events": warmed,
+            "organizations": self._repo.prime_organizations(),
+        }
 
     def get_checkin_count_info(self, phone: str, slug: str) -> CheckinCountResponse:
         organization = self._repo.get_organization_by_slug(slug)
+        if not organization:
+            raise OrganizationNotFoundException()
         return self._get_checkin_count(phone, organization.organization_code)
 
     def _get_checkin_count(self, phone: str, organization_code: str) -> CheckinCountResponse:
-        this_year_checkin = self._repo.get_this_year_checkin(phone)
-        this_year_checkin_by_organization = self._repo.get_this_year_checkin_by_organization(phone, organization_code)
-        all_checkin = self._repo.get_all_checkin(phone)
-        all_checkin_by_organization = self._repo.get_all_checkin_by_organization(phone, organization_code)
+        counts = self._get_counts(phone, organization_code)
+        return self._to_checkin_count_response(counts)
+
+    def _use_checkin_counter(self) -> bool:
+        return settings.checkin_count_source == CHECKIN_COUNT_SOURCE_COUNTER
 
+    def _get_counts(self, phone: str, organization_code: str, event_version: Optional[str] = None):
+        if self._use_checkin_counter():
+            return self._repo.get_checkin_counts_from_counter(phone, organization_code, event_version)
+        return self._repo.get_checkin_counts(phone, organization_code, event_version)
+
+    def _to_checkin_count_response(self, counts) -> CheckinCountResponse:
         return CheckinCountResponse(
-            this_year_count=this_year_checkin,
-            this_year_by_organization_count=this_year_checkin_by_organization,
-            all_count=all_checkin,
-            all_by_organization_count=all_checkin_by_organization
+            this_year_count=counts.this_year_count,
+            this_year_by_organization_count=counts.this_year_by_organization_count,
+            all_count=counts.all_count,
+            all_by_organization_count=counts.all_by_organization_count
         )
 
     def _check_event(self, event: Event) -> None:
@@ -65,21 +295,15 @@ class ApiService:
 
         event.validate_event()
 
-    def _check_already_checked(self, event_code: str, organization_code: str, event_version: str, phone: str) -> None:
-        existing_checkin = self._repo.get_event_checkin(phone, event_code)
-        if existing_checkin:
-            all_checkins = self._repo.get_all_event_checkin(phone, organization_code, event_version)
-            raise AlreadyCheckedException(len(all_checkins))
-
-    def _make_checkin_response(self, event_code: str, organization_code: str, event_version: str, phone: str) -> CheckinResponse:
-        all_checkins = self._repo.get_all_event_checkin(phone, organization_code, event_version)
-        checkin_count_info = self._get_checkin_count(phone, organization_code)
-        event_registration = self._repo.get_event_registration(event_code, phone)
+    def _raise_already_checked(self, phone: str, organization_code: str, event_version: str) -> None:
+        self._db.rollback()
+        counts = self._get_counts(phone, organization_code, event_version)
+        raise AlreadyCheckedException(counts.count)
 
-        if not event_registration:
-            raise NotFoundException()
+    def _make_checkin_response(self, name: str, organization_code: str, event_version: str, phone: str) -> CheckinResponse:
+        counts = self._get_counts(phone, organization_code, event_version)
         return CheckinResponse(
-            name=event_registration.name,
-            count=len(all_checkins),
-            checkin_count_info=checkin_count_info
-        )
\ No newline at end of file
+            name=name,
+            count=counts.count,
+            checkin_count_info=self._to_checkin_count_response(counts)
+        )
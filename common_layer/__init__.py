@@ -8,22 +8,33 @@ while maintaining Lambda Layer compatibility
 # This allows both:
 # - from common_layer.model import Event (explicit)
 # - from common_layer import Event (convenient)
+#
+# 재노출은 처음 접근할 때 import한다(PEP 562). 패키지 import만으로 SQLAlchemy 모델
+# 전체가 로드되지 않게 해 콜드 스타트 import 시간을 줄인다.
+import importlib
 
-from common_layer.model import (
-    Base,
-    Event,
-    EventOrganization,
-    EventRegistration,
-    EventCheckIn,
-)
+_EXPORTS = {
+    "Base": "common_layer.model",
+    "Event": "common_layer.model",
+    "EventOrganization": "common_layer.model",
+    "EventRegistration": "common_layer.model",
+    "EventCheckIn": "common_layer.model",
+    "CheckinCounter": "common_layer.model",
+    "IdempotencyRecord": "common_layer.model",
+    "Settings": "common_layer.settings",
+}
 
-from common_layer.settings import Settings
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    "Base",
-    "Event",
-    "EventOrganization",
-    "EventRegistration",
-    "EventCheckIn",
-    "Settings",
-]
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
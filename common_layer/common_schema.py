@@ -12,13 +12,29 @@ class LambdaResponse:
         "Access-Control-Allow-Origin": "https://checkin.awskr.org",
         "Access-Control-Allow-Credentials": "true",
         "Access-Control-Allow-Methods": "POST,GET,PUT,DELETE,OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Accept",
-        "Access-Control-Expose-Headers": "x-amzn-RequestId,x-amzn-ErrorType"
+        "Access-Control-Allow-Headers": "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Accept,Idempotency-Key,If-None-Match",
+        "Access-Control-Expose-Headers": "x-amzn-RequestId,x-amzn-ErrorType,ETag"
     })
+    etag: Optional[str] = None
+
+    @classmethod
+    def not_modified(cls, etag: str) -> LambdaResponse:
+        return cls(status_code=304, etag=etag)
 
     def to_dict(self) -> dict:
+        headers = self.headers
+        if self.etag is not None:
+            headers = {**headers, "ETag": self.etag}
         return {
             "statusCode": self.status_code,
             "body": self.body,
-            "headers": self.headers
-        }
\ No newline at end of file
+            "headers": headers
+        }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match(콤마로 구분된 목록 또는 *)가 etag와 맞는지. 약한 비교(W/ 무시)를 쓴다."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in [candidate.removeprefix("W/") for candidate in candidates]
\ No newline at end of file
@@ -1,22 +1,61 @@
-import boto3
+import logging
+import random
+import threading
+import time
+import weakref
 from sqlalchemy import create_engine, event, Engine
 from sqlalchemy.engine.url import URL
+from sqlalchemy.exc import DBAPIError, DisconnectionError
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional, TypeVar
 from settings import settings
+import metrics
+
+T = TypeVar("T")
+logger = logging.getLogger()
 
 _engine = None
 _SessionLocal = None
 _dsql_client = None
+_token_provider = None
+
+# DSQL은 낙관적 동시성 제어(OCC)라 충돌한 트랜잭션이 commit 시점에 실패한다.
+# 40001(serialization_failure), OC000(데이터 충돌), OC001(스키마 충돌)
+OCC_SQLSTATES = frozenset({"40001", "OC000", "OC001"})
+
+TX_BACKOFF_BASE_SECONDS = 0.02
+TX_BACKOFF_MAX_SECONDS = 0.5
+
+# single: 컨테이너당 커넥션 1개, 일정 시간 놀았던 커넥션만 체크아웃 때 검증
+# null: 풀 없이 요청마다 새 커넥션
+# queue: 기존 QueuePool(pool_size=5, max_overflow=10, 체크아웃마다 pre-ping)
+POOL_STRATEGIES = ("single", "null", "queue")
+POOL_RECYCLE_SECONDS = 840
+
+# generate_db_connect_admin_auth_token의 기본 ExpiresIn
+DSQL_TOKEN_LIFETIME_SECONDS = 900
+# 토큰 수명의 이 비율 이상은 캐시하지 않는다(시계 오차/서명 지연 여유).
+DSQL_TOKEN_MAX_REFRESH_FRACTION = 0.9
+
+
+def _create_dsql_client():
+    # 토큰 서명에는 botocore 클라이언트면 충분하다. boto3(+s3transfer)를 import하지 않아
+    # 콜드 스타트에서 100ms 가까이 아낀다.
+    import botocore.session
+    return botocore.session.get_session().create_client('dsql', region_name=settings.region)
 
 
 def _get_dsql_client():
     global _dsql_client
     if _dsql_client is None:
-        _dsql_client = boto3.client('dsql', region_name=settings.region)
+        _dsql_client = _create_dsql_client()
     return _dsql_client
 
 
+@metrics.timed("TokenGeneration")
 def _generate_token() -> str:
     """매 호출마다 새 DSQL IAM 인증 토큰을 발급한다."""
     return _get_dsql_client().generate_db_connect_admin_auth_token(
@@ -25,16 +64,175 @@ def _generate_token() -> str:
     )
 
 
+class DsqlTokenProvider:
+    """
+    DSQL IAM 토큰 캐시.
+
+    토큰은 발급 후 lifetime_seconds(900초) 동안 유효하다. 수명의 refresh_fraction이
+    지나면 만료 전에 미리 새로 발급하므로, 만료됐거나 만료 직전인 토큰은 절대 돌려주지
+    않는다. refresh_fraction이 0이면 캐시하지 않고 매번 새로 발급한다.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[], str],
+        lifetime_seconds: float = DSQL_TOKEN_LIFETIME_SECONDS,
+        refresh_fraction: float = 0.5,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._generate = generate
+        self.lifetime_seconds = lifetime_seconds
+        self.refresh_fraction = min(max(refresh_fraction, 0.0), DSQL_TOKEN_MAX_REFRESH_FRACTION)
+        self._clock = clock
+        self._token: Optional[str] = None
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.reused = 0
+
+    def get(self) -> str:
+        with self._lock:
+            # 발급 직전 시각을 기준으로 잡아야 서명에 걸린 시간만큼 수명을 과대평가하지 않는다.
+            now = self._clock()
+            if self._token is None or now >= self._refresh_at:
+                self._token = self._generate()
+                self._refresh_at = now + self.lifetime_seconds * self.refresh_fraction
+                self.issued += 1
+            else:
+                self.reused += 1
+            return self._token
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+
+    def stats(self) -> dict:
+        return {"issued": self.issued, "reused": self.reused}
+
+
+def _get_token_provider() -> DsqlTokenProvider:
+    global _token_provider
+    if _token_provider is None:
+        _token_provider = DsqlTokenProvider(
+            _generate_token,
+            refresh_fraction=settings.dsql_token_refresh_fraction
+        )
+    return _token_provider
+
+
 def _provide_token(dialect, conn_rec, cargs, cparams):
     """
     새 물리 커넥션을 맺을 때마다 SQLAlchemy가 호출하는 do_connect 핸들러.
 
     토큰을 엔진 URL에 정적으로 박아두면, 풀이 나중에(overflow 확장 / pool_recycle /
     pool_pre_ping 재접속) 새 커넥션을 열 때 이미 서명이 만료된 토큰을 재사용해
-    'Signature expired'로 실패한다. 여기서 매 커넥션마다 갓 발급한 토큰을 password로
-    주입하면, 풀이 언제 커넥션을 열든 항상 유효한 토큰을 사용하게 된다.
+    'Signature expired'로 실패한다. 여기서 커넥션마다 토큰 공급자에게 유효한 토큰을
+    받아 password로 주입하면, 풀이 언제 커넥션을 열든 항상 유효한 토큰을 사용하게 된다.
+    토큰 서명은 공급자가 수명 안에서 캐시하므로 풀 확장 시 커넥션마다 반복되지 않는다.
     """
-    cparams["password"] = _generate_token()
+    cparams["password"] = _get_token_provider().get()
+
+
+def _pool_options(strategy: str) -> dict:
+    if strategy == "single":
+        # Lambda 컨테이너는 한 번에 요청 하나만 처리하므로 커넥션 하나면 충분하다.
+        # pre-ping(체크아웃마다 SELECT 1) 대신 _install_idle_validation이 오래 논 커넥션만 검증한다.
+        return {"pool_size": 1, "max_overflow": 0, "pool_pre_ping": False, "pool_recycle": POOL_RECYCLE_SECONDS}
+    if strategy == "null":
+        return {"poolclass": NullPool}
+    if strategy == "queue":
+        return {"pool_size": 5, "max_overflow": 10, "pool_pre_ping": True, "pool_recycle": POOL_RECYCLE_SECONDS}
+    raise ValueError(f"알 수 없는 DB_POOL_STRATEGY입니다: {strategy} (가능: {', '.join(POOL_STRATEGIES)})")
+
+
+def _install_idle_validation(engine: Engine, idle_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+    """
+    반납 후 idle_seconds 이상 지난 커넥션만 체크아웃 때 ping으로 검증한다.
+
+    검증이 실패하면 DisconnectionError를 던져 풀이 커넥션을 버리고 새로 맺게 한다.
+    연달아 들어오는 요청은 검증 없이 바로 커넥션을 받는다.
+    """
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["last_used_at"] = clock()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        last_used_at = connection_record.info.get("last_used_at")
+        if last_used_at is None or clock() - last_used_at < idle_seconds:
+            return
+        try:
+            # pre-ping과 같은 do_ping(autocommit으로 SELECT 1)이라 요청 트랜잭션을 미리 열지 않는다.
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise DisconnectionError("idle connection failed validation") from e
+
+
+def create_pooled_engine(url, strategy: str, validate_idle_seconds: float = 60, **kwargs) -> Engine:
+    """strategy(POOL_STRATEGIES)에 맞는 풀 설정으로 엔진을 만든다."""
+    engine = create_engine(url, **_pool_options(strategy), **kwargs)
+    if strategy == "single":
+        _install_idle_validation(engine, validate_idle_seconds)
+    instrument_engine(engine)
+    return engine
+
+
+def _count_statement(*args, **kwargs) -> None:
+    metrics.increment("SqlStatements")
+
+
+# SessionCheckout을 잴 엔진. 세션 이벤트는 Session 클래스 전체에 걸리므로 여기서 거른다.
+_checkout_timed_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def _mark_checkout_start(session: Session, *args) -> None:
+    # 세션이 아직 커넥션이 없을 때 처음 실행(do_orm_execute)하거나 flush하면, 여기서
+    # after_begin까지가 풀에서 커넥션을 받는 시간이다(새 물리 커넥션, 토큰, 유휴 검증 포함).
+    if "connected" not in session.info:
+        session.info.setdefault("checkout_started", time.perf_counter())
+
+
+def _mark_execute_checkout_start(orm_execute_state) -> None:
+    _mark_checkout_start(orm_execute_state.session)
+
+
+def _record_checkout(session: Session, transaction, connection) -> None:
+    session.info["connected"] = True
+    started = session.info.pop("checkout_started", None)
+    if started is not None and connection.engine in _checkout_timed_engines:
+        request = metrics.current()
+        if request is not None:
+            request.add_time("SessionCheckout", (time.perf_counter() - started) * 1000)
+
+
+def session_connection(session: Session):
+    """session.connection()과 같다. ORM을 거치지 않고 Core 문장을 바로 실행할 때도 SessionCheckout에 잡힌다."""
+    _mark_checkout_start(session)
+    return session.connection()
+
+
+def _reset_checkout(session: Session, transaction) -> None:
+    # 최상위 트랜잭션이 끝나면 커넥션이 풀로 돌아가므로 다음 실행에서 다시 잰다.
+    if transaction.parent is None:
+        session.info.pop("connected", None)
+        session.info.pop("checkout_started", None)
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """
+    현재 요청의 계측(metrics)에 SQL 문장 수(SqlStatements)와 세션이 풀에서 커넥션을 받는 데
+    걸린 시간(SessionCheckout, 새 물리 커넥션과 토큰 발급 포함)을 더한다. 여러 번 불러도 한 번만 건다.
+    """
+    if event.contains(engine, "before_cursor_execute", _count_statement):
+        return engine
+    event.listen(engine, "before_cursor_execute", _count_statement)
+    _checkout_timed_engines.add(engine)
+    if not event.contains(Session, "after_begin", _record_checkout):
+        event.listen(Session, "do_orm_execute", _mark_execute_checkout_start)
+        event.listen(Session, "before_flush", _mark_checkout_start)
+        event.listen(Session, "after_begin", _record_checkout)
+        event.listen(Session, "after_transaction_end", _reset_checkout)
+    return engine
 
 
 def _create_engine() -> Engine:
@@ -46,22 +244,20 @@ def _create_engine() -> Engine:
         database=settings.db_name
     )
 
-    engine = create_engine(
+    engine = create_pooled_engine(
         url,
+        settings.db_pool_strategy,
+        validate_idle_seconds=settings.db_pool_validate_idle_seconds,
         connect_args={
             "sslmode": "require",
             "sslrootcert": "none"
-        },
-        pool_size=5,
-        max_overflow=10,
-        pool_pre_ping=True,
-        pool_recycle=840
+        }
     )
     event.listen(engine, "do_connect", _provide_token)
     return engine
 
 
-def get_dsql_engine_and_session() -> tuple[Engine, Session]:
+def _ensure_engine() -> Engine:
     global _engine, _SessionLocal
 
     # 엔진은 컨테이너 수명 동안 하나만 유지한다.
@@ -69,8 +265,50 @@ def get_dsql_engine_and_session() -> tuple[Engine, Session]:
     if _engine is None:
         _engine = _create_engine()
         _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+    return _engine
+
+
+def use_engine(engine: Engine) -> None:
+    """Lambda 밖(부하 테스트 등 도구)에서 DSQL 대신 engine(로컬 PostgreSQL 등)을 쓰게 한다."""
+    global _engine, _SessionLocal
+    _engine = engine
+    _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def init_engine() -> Engine:
+    """
+    Lambda init 단계(핸들러 모듈 import 시)에 호출한다.
+
+    엔진 생성(다이얼렉트 entry point 탐색과 import 포함), sessionmaker, 토큰 서명용 DSQL
+    클라이언트를 첫 요청 전에 만들어 둔다. 커넥션은 열지 않는다.
+    """
+    engine = _ensure_engine()
+    _get_dsql_client()
+    return engine
+
 
-    return _engine, _SessionLocal()
+def warm_up() -> bool:
+    """
+    init 단계에서 엔진을 만들고 커넥션을 하나 열어 SELECT 1로 검증한 뒤 풀에 반납해 둔다.
+
+    토큰 서명, TLS 핸드셰이크, 다이얼렉트 initialize(서버 버전 조회 등)가 첫 요청 밖에서
+    끝난다. 실패해도 예외를 올리지 않는다. 그 경우 첫 요청이 평소처럼 새로 연결한다.
+    """
+    started = time.perf_counter()
+    try:
+        engine = init_engine()
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+    except Exception as e:
+        logger.warning(f"DB warmup failed: {e}")
+        return False
+    logger.info(f"DB warmup done in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return True
+
+
+def get_dsql_engine_and_session() -> tuple[Engine, Session]:
+    engine = _ensure_engine()
+    return engine, _SessionLocal()
 
 
 @contextmanager
@@ -80,3 +318,106 @@ def get_session():
         yield session
     finally:
         session.close()
+
+
+def is_serialization_failure(error: BaseException) -> bool:
+    """DB 예외가 OCC 충돌(재시도하면 성공할 수 있는 실패)인지 판별한다."""
+    orig = getattr(error, "orig", error)
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return sqlstate in OCC_SQLSTATES
+
+
+@dataclass
+class TransactionMetrics:
+    transactions: int = 0
+    attempts: int = 0
+    conflicts: int = 0
+    retries: int = 0
+    exhausted: int = 0
+    budget_denied: int = 0
+
+    def stats(self) -> dict:
+        return asdict(self)
+
+
+class RetryBudget:
+    """
+    컨테이너 단위 재시도 예산(토큰 버킷).
+
+    트랜잭션마다 ratio만큼 토큰을 적립하고 재시도마다 1개를 쓴다. 경합이 심해져
+    대부분의 트랜잭션이 충돌할 때 재시도가 부하를 몇 배로 키우는 것을 막는다.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+transaction_metrics = TransactionMetrics()
+_retry_budget = RetryBudget()
+
+
+def _backoff_seconds(attempt: int) -> float:
+    """full jitter 지수 백오프"""
+    return random.uniform(0, min(TX_BACKOFF_MAX_SECONDS, TX_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def run_transaction(
+    work: Callable[[Session], T],
+    max_attempts: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep
+) -> T:
+    """
+    work(session)을 한 트랜잭션으로 실행하고 commit한다.
+
+    DSQL은 OCC라 동시 트랜잭션이 같은 행을 건드리면 늦게 commit한 쪽이 직렬화 실패로
+    끝난다. 이때는 새 세션에서 work 전체를 다시 실행한다(최대 max_attempts회, 재시도 예산
+    안에서). work는 재실행돼도 안전해야 하며 commit은 직접 하지 않는다.
+    도메인 예외나 OCC가 아닌 DB 오류는 rollback 후 그대로 전파된다.
+    """
+    max_attempts = max_attempts or settings.tx_max_attempts
+    transaction_metrics.transactions += 1
+    _retry_budget.deposit()
+    metrics.increment("Transactions")
+
+    attempt = 0
+    while True:
+        attempt += 1
+        transaction_metrics.attempts += 1
+        with get_session() as session:
+            try:
+                result = work(session)
+                session.commit()
+                return result
+            except DBAPIError as e:
+                session.rollback()
+                if not is_serialization_failure(e):
+                    raise
+                transaction_metrics.conflicts += 1
+                metrics.increment("TransactionConflicts")
+                if attempt >= max_attempts:
+                    transaction_metrics.exhausted += 1
+                    raise
+                if not _retry_budget.withdraw():
+                    transaction_metrics.budget_denied += 1
+                    raise
+                transaction_metrics.retries += 1
+                metrics.increment("TransactionRetries")
+                logger.warning(f"OCC conflict, retrying transaction (attempt {attempt}): {e.orig}")
+            except Exception:
+                session.rollback()
+                raise
+        sleep(_backoff_seconds(attempt))
@@ -1,9 +1,32 @@
 from settings import settings
+from metrics import timed
 import hashlib
+import hmac
 
+@timed("PhoneHashing")
 def hash_phone_number(phone: str) -> str:
     phone_str = str(phone)
     clean_phone = ''.join(filter(str.isdigit, phone_str))
     salt = settings.salt
     hash_input = (clean_phone + salt).encode('utf-8')
-    return hashlib.sha256(hash_input).hexdigest()
\ No newline at end of file
+    return hashlib.sha256(hash_input).hexdigest()
+
+@timed("PhoneHashing")
+def hash_phone_numbers(phones: list[str]) -> dict[str, str]:
+    """여러 번호를 한 번에 해시한다. 같은 번호(하이픈 유무 포함)는 한 번만 계산한다."""
+    salt = settings.salt.encode('utf-8')
+    hashed: dict[str, str] = {}
+    by_digits: dict[str, str] = {}
+    for phone in phones:
+        if phone in hashed:
+            continue
+        clean_phone = ''.join(filter(str.isdigit, str(phone)))
+        if clean_phone not in by_digits:
+            by_digits[clean_phone] = hashlib.sha256(clean_phone.encode('utf-8') + salt).hexdigest()
+        hashed[phone] = by_digits[clean_phone]
+    return hashed
+
+
+def derive_secret(purpose: str) -> bytes:
+    """salt에서 용도별 키를 만든다. salt를 그대로 서명 키로 쓰지 않는다."""
+    return hmac.new(settings.salt.encode('utf-8'), purpose.encode('utf-8'), hashlib.sha256).digest()
@@ -0,0 +1,24 @@
+"""
+KST(Asia/Seoul) 시각 유틸.
+
+Lambda 함수는 TZ=Asia/Seoul로 돌고, checked_at 같은 시각은 datetime.now()로 만든
+naive KST 값으로 저장된다. "올해" 조건은 EXTRACT(YEAR FROM checked_at) 대신
+[1월 1일 00:00, 다음 해 1월 1일 00:00) 반열린 구간으로 걸어야 checked_at 인덱스의
+범위 스캔을 탈 수 있다.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# 한국은 서머타임이 없으므로 고정 오프셋으로 충분하다(tzdata 의존 없음).
+KST = timezone(timedelta(hours=9), "KST")
+
+
+def now_kst() -> datetime:
+    """프로세스 TZ와 무관하게 KST 기준 naive 현재 시각."""
+    return datetime.now(KST).replace(tzinfo=None)
+
+
+def kst_year_range(year: Optional[int] = None) -> tuple[datetime, datetime]:
+    """KST year년(기본: 올해)을 덮는 naive [start, end) 구간."""
+    year = year if year is not None else now_kst().year
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1)
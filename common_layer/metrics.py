@@ -0,0 +1,219 @@
+"""
+요청 단위 계측(CloudWatch Embedded Metric Format).
+
+핸들러 호출 하나마다 RequestMetrics를 하나 만들어 contextvar에 두고, 그 안에서
+timed()/increment()로 구간 시간과 횟수를 쌓은 뒤 호출이 끝나면 EMF JSON 한 줄을
+stdout에 쓴다. Lambda가 이 줄을 CloudWatch 메트릭으로 바꾼다.
+
+    @instrument_handler("api_handler")
+    def lambda_handler(event, context): ...
+
+    with timed("Serialization"):
+        body = json.dumps(...)
+
+요청 밖(테스트, 도구, init 단계)에서는 timed/increment가 아무것도 하지 않는다.
+테스트는 capture()로 stdout 대신 레코드를 받아 확인한다.
+
+    with metrics.capture() as records:
+        app.lambda_handler(event, None)
+    assert records[0]["SqlStatements"] == 4
+"""
+import functools
+import json
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from settings import settings
+
+UNIT_MILLISECONDS = "Milliseconds"
+UNIT_COUNT = "Count"
+
+_current: ContextVar[Optional["RequestMetrics"]] = ContextVar("request_metrics", default=None)
+_cold_start = True
+
+
+def _write_stdout(record: dict) -> None:
+    sys.stdout.write(json.dumps(record, default=str) + "\n")
+    sys.stdout.flush()
+
+
+_sink: Callable[[dict], None] = _write_stdout
+
+
+class RequestMetrics:
+    def __init__(self, handler: str, route: str, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self.dimensions: dict[str, str] = {"Handler": handler, "Route": route}
+        self.timings: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.properties: dict[str, Any] = {}
+
+    def add_time(self, name: str, milliseconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + milliseconds
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def set_dimension(self, name: str, value: str) -> None:
+        self.dimensions[name] = value
+
+    def set_property(self, name: str, value: Any) -> None:
+        self.properties[name] = value
+
+    def elapsed_ms(self) -> float:
+        return (self._clock() - self.started) * 1000
+
+    def to_emf(self, namespace: str, timestamp_ms: Optional[int] = None) -> dict:
+        metrics = [{"Name": name, "Unit": UNIT_MILLISECONDS} for name in self.timings]
+        metrics += [{"Name": name, "Unit": UNIT_COUNT} for name in self.counts]
+        record = {
+            "_aws": {
+                "Timestamp": timestamp_ms if timestamp_ms is not None else int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": namespace,
+                    "Dimensions": [list(self.dimensions)],
+                    "Metrics": metrics,
+                }],
+            },
+        }
+        record.update(self.properties)
+        record.update(self.dimensions)
+        record.update({name: round(value, 3) for name, value in self.timings.items()})
+        record.update(self.counts)
+        return record
+
+
+def current() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+def increment(name: str, value: int = 1) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.increment(name, value)
+
+
+def set_property(name: str, value: Any) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.set_property(name, value)
+
+
+class timed:
+    """구간 시간을 현재 요청의 name 메트릭에 더한다. with 문과 데코레이터 둘 다 된다."""
+
+    __slots__ = ("name", "_metrics", "_started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._metrics = None
+        self._started = 0.0
+
+    def __enter__(self) -> "timed":
+        self._metrics = _current.get()
+        if self._metrics is not None:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        if self._metrics is not None:
+            self._metrics.add_time(self.name, (time.perf_counter() - self._started) * 1000)
+            self._metrics = None
+        return False
+
+    def __call__(self, function: Callable) -> Callable:
+        name = self.name
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            metrics = _current.get()
+            if metrics is None:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.add_time(name, (time.perf_counter() - started) * 1000)
+
+        return wrapper
+
+
+def timed_methods(prefix: str):
+    """클래스 데코레이터. 클래스에 정의된 public 메서드를 "{prefix}.{메서드}" 시간으로 잰다."""
+    def decorate(cls):
+        for name, value in list(vars(cls).items()):
+            if not name.startswith("_") and callable(value) and not isinstance(value, (staticmethod, classmethod, type)):
+                setattr(cls, name, timed(f"{prefix}.{name}")(value))
+        return cls
+    return decorate
+
+
+def _route(event: Any) -> str:
+    if not isinstance(event, dict):
+        return "invoke"
+    if event.get("httpMethod"):
+        return f"{event['httpMethod']} {event.get('resource') or event.get('path') or ''}".strip()
+    if event.get("Records"):
+        return event["Records"][0].get("eventSource") or event["Records"][0].get("EventSource") or "records"
+    return "invoke"
+
+
+@contextmanager
+def request(handler: str, route: str = "invoke") -> Iterator[RequestMetrics]:
+    """요청 하나의 계측 범위. 끝나면 Duration을 더해 EMF 레코드를 내보낸다."""
+    global _cold_start
+    metrics = RequestMetrics(handler, route)
+    metrics.set_property("ColdStart", _cold_start)
+    _cold_start = False
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    except Exception:
+        metrics.increment("Errors")
+        raise
+    finally:
+        _current.reset(token)
+        metrics.add_time("Duration", metrics.elapsed_ms())
+        if settings.metrics_enabled:
+            try:
+                _sink(metrics.to_emf(settings.metrics_namespace))
+            except Exception:
+                # 계측 실패가 응답을 바꾸면 안 된다.
+                pass
+
+
+def instrument_handler(handler: str):
+    """lambda_handler 데코레이터. 응답의 statusCode를 StatusCode 속성으로, 5xx를 Errors로 남긴다."""
+    def decorate(lambda_handler: Callable) -> Callable:
+        @functools.wraps(lambda_handler)
+        def wrapper(event, context):
+            with request(handler, _route(event)) as metrics:
+                request_id = getattr(context, "aws_request_id", None)
+                if request_id:
+                    metrics.set_property("RequestId", request_id)
+                response = lambda_handler(event, context)
+                status_code = response.get("statusCode") if isinstance(response, dict) else None
+                if status_code is not None:
+                    metrics.set_property("StatusCode", status_code)
+                    if status_code >= 500:
+                        metrics.increment("Errors")
+                return response
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def capture() -> Iterator[list[dict]]:
+    """with 블록 안에서 내보낸 EMF 레코드를 stdout 대신 리스트에 모은다(테스트용)."""
+    global _sink
+    records: list[dict] = []
+    previous = _sink
+    _sink = records.append
+    try:
+        yield records
+    finally:
+        _sink = previous
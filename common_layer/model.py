@@ -6,7 +6,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, String, Text, DateTime, PrimaryKeyConstraint, Index
+from sqlalchemy import Column, String, Text, DateTime, Integer, PrimaryKeyConstraint, Index
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
 
@@ -17,6 +17,10 @@ from exceptions.domain_exception import (
 
 Base = declarative_base()
 
+# 체크인할 수 없는 기본(테스트) 이벤트 코드. Event.validate_event와 단건 체크인 SQL
+# (api_handler/repository.py의 _CHECK_IN_WITH_COUNTS_SQL)이 같이 쓴다.
+DEFAULT_EVENT_CODE = "test"
+
 
 class EventOrganization(Base):
     """
@@ -81,6 +85,8 @@ class Event(Base):
     description = Column(Text, nullable=True)
     event_name = Column(String(255), nullable=False)
     qr_url = Column(Text, nullable=True)  # CloudFront URL
+    # 'pending'이면 qr_url의 이미지를 아직 만드는 중이다. 이미지가 올라가면 NULL로 되돌린다.
+    qr_status = Column(String(20), nullable=True)
     code_expired_at = Column(DateTime, nullable=False)
     event_version = Column(String(50), nullable=False)
     organization_code = Column(String(100), nullable=False)
@@ -92,6 +98,10 @@ class Event(Base):
         Index('idx_event_date_time', 'event_date_time'),
         Index('idx_event_organization_code', 'organization_code'),
         Index('idx_event_code_expired_at', 'code_expired_at'),
+        # 목록 버전(count, max(updated_at))을 index-only scan으로 구한다.
+        Index('idx_event_org_date_time_expired_updated', 'organization_code', 'event_date_time', 'code_expired_at', 'updated_at'),
+        # QR 재생성 대상(pending) 조회
+        Index('idx_event_qr_status_created_at', 'qr_status', 'created_at'),
     )
 
 
@@ -105,7 +115,8 @@ class Event(Base):
         event_version: str,
         organization_code: str,
         description: Optional[str] = None,
-        qr_url: Optional[str] = None
+        qr_url: Optional[str] = None,
+        qr_status: Optional[str] = None
     ) -> Event:
         return cls(
             event_code=event_code,
@@ -113,16 +124,19 @@ class Event(Base):
             description=description,
             event_name=event_name,
             qr_url=qr_url,
+            qr_status=qr_status,
             code_expired_at=code_expired_at,
             event_version=event_version,
             organization_code=organization_code
         )
 
-    def validate_event(self) -> None:
-        if self.event_code == "test":
+    def validate_event(self, now: Optional[datetime] = None) -> None:
+        # 단건 체크인 SQL의 WHERE(event_code <> DEFAULT_EVENT_CODE AND code_expired_at >= now)와
+        # 같은 규칙이다. 한쪽을 바꾸면 다른 쪽도 바꿔야 한다.
+        if self.event_code == DEFAULT_EVENT_CODE:
             raise DefaltEventException()
 
-        if self.code_expired_at < datetime.now():
+        if self.code_expired_at < (now or datetime.now()):
             raise EventRegistrationException()
 
     def __repr__(self):
@@ -146,6 +160,7 @@ class EventRegistration(Base):
     __table_args__ = (
         PrimaryKeyConstraint('event_code', 'phone'),
         Index('idx_registration_phone', 'phone'),
+        Index('idx_registration_event_created_at', 'event_code', 'created_at'),
     )
 
     @classmethod
@@ -186,6 +201,9 @@ class EventCheckIn(Base):
         Index('idx_checkin_checked_at', 'checked_at'),
         Index('idx_checkin_organization_code', 'organization_code'),
         Index('idx_checkin_org_version', 'organization_code', 'event_version'),
+        # phone 단위 카운트 조회: 올해 구간 / 조직·버전별 (+올해) 구간
+        Index('idx_checkin_phone_checked_at', 'phone', 'checked_at'),
+        Index('idx_checkin_phone_org_version_checked_at', 'phone', 'organization_code', 'event_version', 'checked_at'),
     )
 
 
@@ -206,3 +224,48 @@ class EventCheckIn(Base):
 
     def __repr__(self):
         return f"<EventCheckIn(phone={self.phone}, event_code={self.event_code}, checked_at={self.checked_at})>"
+
+
+class CheckinCounter(Base):
+    """
+    Per-attendee check-in counter rollup
+    Incremented in the same transaction as each EventCheckIn insert so that
+    CheckinCountResponse can be read without scanning event_check_in
+    """
+    __tablename__ = 'checkin_counter'
+
+    phone = Column(String(255), nullable=False)
+    organization_code = Column(String(100), nullable=False)
+    event_version = Column(String(50), nullable=False)
+    year = Column(Integer, nullable=False)
+    checkin_count = Column(Integer, nullable=False, default=0)
+
+    # Composite primary key (phone 선두 → phone 단위 범위 조회)
+    __table_args__ = (
+        PrimaryKeyConstraint('phone', 'organization_code', 'event_version', 'year'),
+    )
+
+    def __repr__(self):
+        return f"<CheckinCounter(phone={self.phone}, organization_code={self.organization_code}, event_version={self.event_version}, year={self.year}, checkin_count={self.checkin_count})>"
+
+
+class IdempotencyRecord(Base):
+    """
+    Completed POST /check responses keyed by the client's Idempotency-Key
+    Written in the same transaction as the check-in so that a retried request
+    from any container replays the original response instead of re-running it
+    """
+    __tablename__ = 'idempotency_record'
+
+    idempotency_key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the request body
+    response_body = Column(Text, nullable=False)  # JSON of CheckinResponse
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('idx_idempotency_expires_at', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyRecord(idempotency_key={self.idempotency_key}, expires_at={self.expires_at})>"
@@ -0,0 +1,219 @@
+"""
+운영 호출용 샘플링 프로파일러(opt-in).
+
+가끔 중앙값보다 훨씬 느린 호출이 재현되지 않을 때 쓴다. PROFILE_SAMPLE_RATE 비율의
+호출만 골라, 핸들러가 도는 동안 백그라운드 스레드가 PROFILE_INTERVAL_MS마다 핸들러
+스레드의 스택을 떠서 collapsed-stack("a;b;c 횟수") 형식으로 모은다. 컨테이너마다
+가장 느린 PROFILE_KEEP_SLOWEST개만 남기고 PROFILE_SINK에 쓴다.
+
+    PROFILE_SAMPLE_RATE=0.05 PROFILE_SINK=s3://bucket/profiles  (또는 /tmp/profiles)
+
+    flamegraph.pl api_handler-000812ms-....collapsed > flame.svg
+    (또는 speedscope에 그대로 올린다)
+
+샘플링되지 않은 호출은 난수 하나를 뽑는 비용만 든다. 기본값(0)이면 꺼져 있다.
+"""
+import functools
+import heapq
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+import metrics
+from settings import settings
+
+logger = logging.getLogger()
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """with 블록 동안 thread_id 스레드의 스택을 interval_seconds마다 떠서 collapsed 스택별 횟수를 센다."""
+
+    def __init__(self, thread_id: int, interval_seconds: float):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks: dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = _collapse(frame)
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+class SlowestProfiles:
+    """컨테이너에서 지금까지 가장 느린 keep개 프로파일 이름을 들고 있는다."""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self._heap: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def offer(self, duration_ms: float, name: str) -> tuple[bool, Optional[str]]:
+        """(남길지, 밀려난 이름)을 돌려준다."""
+        with self._lock:
+            if len(self._heap) < self.keep:
+                heapq.heappush(self._heap, (duration_ms, name))
+                return True, None
+            if self.keep <= 0 or duration_ms <= self._heap[0][0]:
+                return False, None
+            _, evicted = heapq.heapreplace(self._heap, (duration_ms, name))
+            return True, evicted
+
+    def names(self) -> list[str]:
+        return [name for _, name in sorted(self._heap, reverse=True)]
+
+
+class LocalDirectorySink:
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, name: str, data: str) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, name), "w", encoding="utf-8") as f:
+            f.write(data)
+
+    def delete(self, name: str) -> None:
+        try:
+            os.remove(os.path.join(self.path, name))
+        except FileNotFoundError:
+            pass
+
+
+class S3Sink:
+    def __init__(self, bucket: str, prefix: str = "", client=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client = client
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def _get_client(self):
+        # boto3는 프로파일을 실제로 쓸 때만 import한다(체크인 경로 콜드 스타트에서 제외).
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("s3")
+        return self._client
+
+    def write(self, name: str, data: str) -> None:
+        self._get_client().put_object(
+            Bucket=self.bucket, Key=self._key(name), Body=data.encode("utf-8"), ContentType="text/plain"
+        )
+
+    def delete(self, name: str) -> None:
+        self._get_client().delete_object(Bucket=self.bucket, Key=self._key(name))
+
+
+def create_sink(target: str):
+    """s3://bucket/prefix면 S3Sink, 아니면(file:// 생략 가능) 로컬 디렉터리."""
+    if target.startswith("s3://"):
+        bucket, _, prefix = target[len("s3://"):].partition("/")
+        return S3Sink(bucket, prefix)
+    return LocalDirectorySink(target[len("file://"):] if target.startswith("file://") else target)
+
+
+class HandlerProfiler:
+    def __init__(
+        self,
+        sample_rate: float,
+        keep_slowest: int,
+        interval_seconds: float,
+        sink,
+        rand: Callable[[], float] = random.random
+    ):
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+        self.sink = sink
+        self.slowest = SlowestProfiles(keep_slowest)
+        self._rand = rand
+        self.sampled = 0
+        self.written = 0
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and self._rand() < self.sample_rate
+
+    def run(self, handler_name: str, lambda_handler: Callable, event, context):
+        self.sampled += 1
+        metrics.set_property("Profiled", True)
+        started = time.perf_counter()
+        with StackSampler(threading.get_ident(), self.interval_seconds) as sampler:
+            try:
+                return lambda_handler(event, context)
+            finally:
+                self._record(handler_name, (time.perf_counter() - started) * 1000, sampler, context)
+
+    def _record(self, handler_name: str, duration_ms: float, sampler: StackSampler, context) -> None:
+        if not sampler.stacks:
+            return
+        request_id = getattr(context, "aws_request_id", None) or uuid.uuid4().hex[:12]
+        name = f"{handler_name}-{int(duration_ms):06d}ms-{request_id}.collapsed"
+        keep, evicted = self.slowest.offer(duration_ms, name)
+        if not keep:
+            return
+        # 프로파일 저장 실패가 응답을 바꾸면 안 된다.
+        try:
+            self.sink.write(name, sampler.collapsed())
+            self.written += 1
+            if evicted:
+                self.sink.delete(evicted)
+        except Exception as e:
+            logger.warning(f"profile sink failed: {e}")
+
+
+_profiler: Optional[HandlerProfiler] = None
+
+
+def _get_profiler() -> HandlerProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = HandlerProfiler(
+            sample_rate=settings.profile_sample_rate,
+            keep_slowest=settings.profile_keep_slowest,
+            interval_seconds=settings.profile_interval_ms / 1000,
+            sink=create_sink(settings.profile_sink),
+        )
+    return _profiler
+
+
+def profile_handler(handler_name: str):
+    """lambda_handler 데코레이터. 샘플로 뽑힌 호출만 스택 샘플링한다."""
+    def decorate(lambda_handler: Callable) -> Callable:
+        @functools.wraps(lambda_handler)
+        def wrapper(event, context):
+            if settings.profile_sample_rate <= 0:
+                return lambda_handler(event, context)
+            profiler = _get_profiler()
+            if not profiler.should_sample():
+                return lambda_handler(event, context)
+            return profiler.run(handler_name, lambda_handler, event, context)
+        return wrapper
+    return decorate
@@ -0,0 +1,203 @@
+"""
+오프라인 체크인용 서명된 로스터 번들.
+
+큰 행사에서 키오스크가 네트워크 없이 등록 여부를 확인할 수 있게, 이벤트 하나의
+등록자(해시 phone, 이름)와 출석 가능 기간을 작은 바이너리로 묶는다.
+
+    magic "RSTB" | format u8 | kind u8 | header 길이 u32 | header(JSON)
+    | phone 키 count x 16바이트(오름차순) | 이름 count x (u16 길이 + UTF-8)
+    | HMAC-SHA256(앞부분 전체) 32바이트
+
+- phone 키는 event_registration.phone(salt가 들어간 SHA-256 hex)의 앞 16바이트다.
+  원본 번호는 들어가지 않는다.
+- 서명 키는 salt에서 유도한 키(derive_secret(BUNDLE_SECRET_PURPOSE))다.
+- kind=delta 번들은 header.since 이후 추가된 등록만 담는다. 첫 번들의 watermark를
+  since로 넘겨 받은 delta를 RosterBundleValidator.apply_delta로 합친다. 삭제된 등록은
+  반영하지 않는다(다음 전체 번들에서 빠진다).
+"""
+import hashlib
+import hmac
+import json
+import struct
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+MAGIC = b"RSTB"
+FORMAT_VERSION = 1
+KIND_FULL = "full"
+KIND_DELTA = "delta"
+_KINDS = (KIND_FULL, KIND_DELTA)
+
+BUNDLE_SECRET_PURPOSE = "roster-bundle-v1"
+PHONE_KEY_BYTES = 16
+
+_PREAMBLE = struct.Struct(">4sBBI")
+_NAME_LENGTH = struct.Struct(">H")
+_SIGNATURE_BYTES = hashlib.sha256().digest_size
+
+
+class RosterBundleError(ValueError):
+    """번들이 깨졌거나 서명이 맞지 않거나 다른 이벤트/순서의 delta일 때."""
+
+
+@dataclass
+class RosterBundleHeader:
+    event_code: str
+    event_version: str
+    organization_code: str
+    event_date_time: str
+    code_expired_at: str
+    count: int
+    # 번들에 들어간 등록의 created_at 최댓값. 다음 delta 요청의 since로 쓴다.
+    watermark: Optional[str]
+    generated_at: str
+    since: Optional[str] = None
+
+
+@dataclass
+class RosterEntry:
+    name: Optional[str]
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def phone_key(hashed_phone: str) -> bytes:
+    return bytes.fromhex(hashed_phone[:PHONE_KEY_BYTES * 2])
+
+
+def build_roster_bundle(
+    event,
+    registrations: Iterable,
+    secret: bytes,
+    since: Optional[datetime] = None,
+    watermark: Optional[datetime] = None,
+    generated_at: Optional[datetime] = None
+) -> bytes:
+    """
+    event(Event)와 등록 행(phone, name, created_at)으로 번들을 만든다. since가 있으면 delta다.
+    watermark는 등록 행의 created_at 최댓값과 인자 중 큰 값이다(delta에 새 등록이 없어도 줄지 않게).
+    """
+    entries: dict[bytes, Optional[str]] = {}
+    for registration in registrations:
+        entries[phone_key(registration.phone)] = registration.name
+        if registration.created_at and (watermark is None or registration.created_at > watermark):
+            watermark = registration.created_at
+
+    keys = sorted(entries)
+    header = RosterBundleHeader(
+        event_code=event.event_code,
+        event_version=event.event_version,
+        organization_code=event.organization_code,
+        event_date_time=event.event_date_time.isoformat(),
+        code_expired_at=event.code_expired_at.isoformat(),
+        count=len(keys),
+        watermark=watermark.isoformat() if watermark else None,
+        generated_at=(generated_at or datetime.now()).isoformat(),
+        since=since.isoformat() if since else None,
+    )
+    header_bytes = json.dumps(asdict(header), separators=(",", ":")).encode("utf-8")
+
+    names = bytearray()
+    for key in keys:
+        name = (entries[key] or "").encode("utf-8")[:0xFFFF]
+        names += _NAME_LENGTH.pack(len(name)) + name
+
+    kind = _KINDS.index(KIND_DELTA if since else KIND_FULL)
+    body = _PREAMBLE.pack(MAGIC, FORMAT_VERSION, kind, len(header_bytes)) + header_bytes + b"".join(keys) + bytes(names)
+    return body + hmac.new(secret, body, hashlib.sha256).digest()
+
+
+def read_roster_bundle(bundle: bytes, secret: bytes) -> tuple[str, RosterBundleHeader, dict[bytes, RosterEntry]]:
+    """서명을 확인하고 (kind, header, {phone 키: RosterEntry})를 돌려준다."""
+    if len(bundle) < _PREAMBLE.size + _SIGNATURE_BYTES:
+        raise RosterBundleError("번들이 너무 짧습니다")
+    body, signature = bundle[:-_SIGNATURE_BYTES], bundle[-_SIGNATURE_BYTES:]
+    if not hmac.compare_digest(signature, hmac.new(secret, body, hashlib.sha256).digest()):
+        raise RosterBundleError("번들 서명이 맞지 않습니다")
+
+    magic, version, kind, header_length = _PREAMBLE.unpack_from(body)
+    if magic != MAGIC or version != FORMAT_VERSION or kind >= len(_KINDS):
+        raise RosterBundleError(f"지원하지 않는 번들 형식입니다: {magic!r} v{version} kind={kind}")
+
+    offset = _PREAMBLE.size
+    header = RosterBundleHeader(**json.loads(body[offset:offset + header_length]))
+    offset += header_length
+
+    keys_end = offset + header.count * PHONE_KEY_BYTES
+    keys = [body[i:i + PHONE_KEY_BYTES] for i in range(offset, keys_end, PHONE_KEY_BYTES)]
+    offset = keys_end
+
+    entries: dict[bytes, RosterEntry] = {}
+    for key in keys:
+        (length,) = _NAME_LENGTH.unpack_from(body, offset)
+        offset += _NAME_LENGTH.size
+        name = body[offset:offset + length].decode("utf-8")
+        offset += length
+        entries[key] = RosterEntry(name=name or None)
+    if offset != len(body):
+        raise RosterBundleError("번들 길이가 header와 맞지 않습니다")
+    return _KINDS[kind], header, entries
+
+
+class RosterBundleValidator:
+    """
+    키오스크 쪽 검증기. 전체 번들을 한 번 읽어 메모리에 올린 뒤, 번호 하나를
+    해시 한 번과 dict 조회 한 번(수 마이크로초)으로 확인한다.
+
+    hash_phone은 서버와 같은 salt로 번호를 해시하는 함수다(기본: hash_tool.hash_phone_number).
+    """
+
+    def __init__(self, bundle: bytes, secret: bytes, hash_phone: Optional[Callable[[str], str]] = None):
+        kind, header, entries = read_roster_bundle(bundle, secret)
+        if kind != KIND_FULL:
+            raise RosterBundleError("delta 번들은 전체 번들에 apply_delta로 합쳐야 합니다")
+        if hash_phone is None:
+            from hash_tool import hash_phone_number as hash_phone
+        self._secret = secret
+        self._hash_phone = hash_phone
+        self.header = header
+        self._entries = entries
+        self._code_expired_at = _parse(header.code_expired_at)
+
+    @property
+    def event_code(self) -> str:
+        return self.header.event_code
+
+    @property
+    def watermark(self) -> Optional[str]:
+        return self.header.watermark
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def apply_delta(self, delta: bytes) -> int:
+        """delta 번들을 합치고 새로 추가된 등록 수를 돌려준다."""
+        kind, header, entries = read_roster_bundle(delta, self._secret)
+        if kind != KIND_DELTA or header.event_code != self.event_code:
+            raise RosterBundleError(f"{self.event_code}의 delta 번들이 아닙니다")
+        watermark = _parse(self.watermark)
+        if watermark is not None and (header.since is None or _parse(header.since) > watermark):
+            # since가 현재 watermark보다 뒤면 그 사이 등록이 빠져 있다.
+            raise RosterBundleError(f"delta가 {header.since}부터라 {self.watermark} 이후 등록이 빠집니다")
+
+        added = sum(1 for key in entries if key not in self._entries)
+        self._entries.update(entries)
+        if header.watermark and (watermark is None or _parse(header.watermark) > watermark):
+            self.header.watermark = header.watermark
+        self.header.count = len(self._entries)
+        return added
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        """Event.validate_event와 같은 기준으로 아직 출석할 수 있는지."""
+        now = now or datetime.now()
+        return self.event_code != "test" and now <= self._code_expired_at
+
+    def lookup_hashed(self, hashed_phone: str) -> Optional[RosterEntry]:
+        return self._entries.get(phone_key(hashed_phone))
+
+    def lookup(self, phone: str) -> Optional[RosterEntry]:
+        """번호(하이픈 포함 가능)가 등록돼 있으면 RosterEntry, 아니면 None."""
+        return self.lookup_hashed(self._hash_phone(phone.replace('-', '')))
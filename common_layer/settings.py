@@ -4,6 +4,17 @@ class Settings:
     def __init__(self):
         self.client_url = os.environ.get('CLIENT_URL')
         self.qr_s3_bucket_name = os.environ.get('QR_S3_BUCKET_NAME')
+        # png | png-optimized | svg
+        self.qr_output_format = os.environ.get('QR_OUTPUT_FORMAT', 'png')
+        self.qr_error_correction = os.environ.get('QR_ERROR_CORRECTION', 'Q')
+        # sync: 요청 안에서 렌더링/업로드, thread: 컨테이너 스레드 풀, queue: SQS로 넘겨 event_handler가 소비
+        self.qr_render_mode = os.environ.get('QR_RENDER_MODE', 'sync')
+        self.qr_render_workers = int(os.environ.get('QR_RENDER_WORKERS', '2'))
+        self.qr_render_queue_url = os.environ.get('QR_RENDER_QUEUE_URL')
+        # 이 시간이 지나도 pending인 이벤트는 재생성 작업이 다시 만든다.
+        self.qr_reconcile_grace_seconds = float(os.environ.get('QR_RECONCILE_GRACE_SECONDS', '300'))
+        self.event_batch_max_items = int(os.environ.get('EVENT_BATCH_MAX_ITEMS', '100'))
+        self.qr_batch_workers = int(os.environ.get('QR_BATCH_WORKERS', '8'))
         self.smtp_username = os.environ.get('SMTP_USERNAME')
         self.smtp_password = os.environ.get('SMTP_PASSWORD')
         self.salt = os.environ.get('SALT')
@@ -12,6 +23,44 @@ class Settings:
         self.db_user = os.environ.get('DB_USER')
         self.db_name = os.environ.get('DB_NAME')
         self.region = os.environ.get('REGION')
+        self.db_pool_strategy = os.environ.get('DB_POOL_STRATEGY', 'queue')
+        self.db_warmup_on_init = os.environ.get('DB_WARMUP_ON_INIT', 'true').lower() == 'true'
+        self.db_pool_validate_idle_seconds = float(os.environ.get('DB_POOL_VALIDATE_IDLE_SECONDS', '60'))
+        self.dsql_token_refresh_fraction = float(os.environ.get('DSQL_TOKEN_REFRESH_FRACTION', '0.5'))
+        self.tx_max_attempts = int(os.environ.get('TX_MAX_ATTEMPTS', '3'))
+        self.api_repository_backend = os.environ.get('API_REPOSITORY_BACKEND', 'orm')
+        self.checkin_mode = os.environ.get('CHECKIN_MODE', 'orm')
+        self.checkin_count_source = os.environ.get('CHECKIN_COUNT_SOURCE', 'scan')
+        self.event_cache_ttl_seconds = float(os.environ.get('EVENT_CACHE_TTL_SECONDS', '30'))
+        self.event_cache_max_size = int(os.environ.get('EVENT_CACHE_MAX_SIZE', '128'))
+        self.organization_cache_refresh_seconds = float(os.environ.get('ORGANIZATION_CACHE_REFRESH_SECONDS', '300'))
+        self.organization_negative_cache_seconds = float(os.environ.get('ORGANIZATION_NEGATIVE_CACHE_SECONDS', '60'))
+        self.idempotency_ttl_seconds = float(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+        self.idempotency_cache_max_size = int(os.environ.get('IDEMPOTENCY_CACHE_MAX_SIZE', '1024'))
+        self.roster_cache_refresh_seconds = float(os.environ.get('ROSTER_CACHE_REFRESH_SECONDS', '0'))
+        # 로스터에 없는 phone을 거절하기 전 전체 재적재는 이벤트마다 이 간격에 한 번만 한다.
+        self.roster_cache_miss_refresh_seconds = float(os.environ.get('ROSTER_CACHE_MISS_REFRESH_SECONDS', '1'))
+        # event_registration.created_at은 csv_handler 업로드 트랜잭션의 시작 시각이라, 커밋은 최대
+        # 트랜잭션 길이(DSQL 5분)만큼 늦게 보일 수 있다. created_at 워터마크로 증분을 읽는 곳(로스터
+        # 캐시, 키오스크 delta 번들)은 워터마크보다 이만큼 앞에서부터 다시 읽는다. 300초보다 짧게 둘 수 없다.
+        self.registration_commit_lag_seconds = max(float(os.environ.get('REGISTRATION_COMMIT_LAG_SECONDS', '300')), 300)
+        # 체크인 하나가 event_check_in과 checkin_counter에 한 행씩 쓰므로, DSQL 트랜잭션당
+        # 3,000행 제한 아래로 청크당 1,000건(2,000행)을 넘기지 않는다.
+        self.checkin_batch_max_items = int(os.environ.get('CHECKIN_BATCH_MAX_ITEMS', '2000'))
+        self.checkin_batch_chunk_size = min(int(os.environ.get('CHECKIN_BATCH_CHUNK_SIZE', '500')), 1000)
+        self.metrics_enabled = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+        # api_handler 컨테이너 캐시/트랜잭션 통계를 이 호출 수마다 한 번 INFO로 남긴다(0이면 끈다).
+        self.container_stats_log_interval = int(os.environ.get('CONTAINER_STATS_LOG_INTERVAL', '100'))
+        self.metrics_namespace = os.environ.get('METRICS_NAMESPACE', 'AwskrugCheckin')
+        self.profile_sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+        self.profile_keep_slowest = int(os.environ.get('PROFILE_KEEP_SLOWEST', '5'))
+        self.profile_interval_ms = float(os.environ.get('PROFILE_INTERVAL_MS', '5'))
+        self.profile_sink = os.environ.get('PROFILE_SINK', '/tmp/profiles')
+
+        # thread 모드의 렌더링 스레드도 run_transaction으로 커넥션을 쓴다. single 풀(커넥션 1개)에서는
+        # 요청의 체크아웃과 서로 막으므로 같이 쓸 수 없다.
+        if self.qr_render_mode == 'thread' and self.db_pool_strategy == 'single':
+            raise ValueError("QR_RENDER_MODE=thread는 DB_POOL_STRATEGY=single과 같이 쓸 수 없습니다")
 
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1 @@
+common_layer/common_schema.py
\ No newline at end of file
@@ -5,12 +5,16 @@ import boto3
 import io
 
 from library import process_csv_data, insert_data_to_db
-from db_connection import get_session
+from db_connection import run_transaction
+from metrics import instrument_handler
+from profiler import profile_handler
 
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+@instrument_handler("csv_handler")
+@profile_handler("csv_handler")
 def lambda_handler(event, context):
     try:
         bucket = event['Records'][0]['s3']['bucket']['name']
@@ -27,9 +31,7 @@ def lambda_handler(event, context):
         event_code = key.split('_')[-1].split('.')[0]
 
         result_df = process_csv_data(df)
-        with get_session() as session:
-            insert_data_to_db(result_df, event_code, session)
-            session.commit()
+        run_transaction(lambda session: insert_data_to_db(result_df, event_code, session))
         logger.info(f"Processed {len(result_df)} rows of data")
         
         return {
@@ -0,0 +1 @@
+common_layer/db_connection.py
\ No newline at end of file
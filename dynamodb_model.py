@@ -0,0 +1 @@
+common_layer/dynamodb_model.py
\ No newline at end of file
@@ -2,6 +2,8 @@ import json
 import yagmail
 import os
 from settings import settings
+from metrics import instrument_handler
+from profiler import profile_handler
 
 from model import Event, EventOrganization
 from dynamodb_model import DynamoDBModel
@@ -27,6 +29,8 @@ def get_organization(organization_code: str) -> str:
     organization = organization_table.get(organization_code)
     return organization
 
+@instrument_handler("email_handler")
+@profile_handler("email_handler")
 def lambda_handler(event, context):
     try:
         yag = yagmail.SMTP(settings.smtp_username, settings.smtp_password)
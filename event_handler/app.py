@@ -2,61 +2,134 @@ import json
 import logging
 from dataclasses import asdict
 from container import EventContainer
-from db_connection import get_session
-from schema import EventRequest, EventPutRequest, EventDeleteRequest
-from common_schema import LambdaResponse
+from db_connection import run_transaction
+from metrics import instrument_handler
+from profiler import profile_handler
+from schema import EventRequest, EventPutRequest, EventDeleteRequest, EventBatchRequest, EventPageRequest, RosterBundleRequest
+from common_schema import LambdaResponse, etag_matches
+from exception import EventNotFoundException, InvalidEventBatchException, InvalidEventQueryException
+from settings import settings
+from qr_worker import handle_qr_records, reconcile_pending_qr
 
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# 이 키가 있는 이벤트는 API Gateway 요청이 아니라 QR 재생성 호출(스케줄)로 처리한다.
+#   {"reconcile_qr": true} 또는 {"reconcile_qr": {"event_codes": ["0501ABC"]}}
+QR_RECONCILE_EVENT_KEY = 'reconcile_qr'
+
+
+def _get_header(event, name: str):
+    # API Gateway는 헤더 이름 대소문자를 클라이언트가 보낸 그대로 넘긴다.
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+@instrument_handler("event_handler")
+@profile_handler("event_handler")
 def lambda_handler(event, context):
+    if QR_RECONCILE_EVENT_KEY in event:
+        return handle_qr_reconcile(event, context)
+    if event.get('Records'):
+        # QR_RENDER_MODE=queue의 SQS 트리거. 실패한 메시지만 다시 받는다.
+        failed = handle_qr_records(event['Records'])
+        return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed]}
+
     try:
-        with get_session() as session:
-            response = None
-            http_method = event.get('httpMethod')
-            resource_path = event.get('resource')
+        http_method = event.get('httpMethod')
+        resource_path = event.get('resource')
+
+        if event.get('body'):
+            request_body: dict = json.loads(event.get('body'))
+        else:
+            request_body = {}
 
+        def handle(session) -> LambdaResponse:
+            response = None
             container = EventContainer(session)
-            if event.get('body'):
-                request_body: dict = json.loads(event.get('body'))
-            else:
-                request_body = {}
 
             if http_method == 'POST' and resource_path == '/event':
-                request_body = EventRequest(**request_body)
-                response = container.service.create_event(request_body)
+                response = container.service.create_event(EventRequest(**request_body))
                 response = json.dumps(asdict(response))
-            elif http_method == 'GET' and resource_path == '/event':
-                response = container.service.get_list_event()
-                response = json.dumps([asdict(event) for event in response], default=str)
+            elif http_method == 'POST' and resource_path == '/event/batch':
+                results = container.service.create_events(
+                    EventBatchRequest.from_dict(request_body, settings.event_batch_max_items).events
+                )
+                response = json.dumps({"results": [asdict(result) for result in results]})
+            elif http_method == 'GET' and resource_path in ('/event', '/event/organization/{organization_code}'):
+                page_request = None
+                if resource_path != '/event' or event.get('queryStringParameters'):
+                    page_request = EventPageRequest.from_query(
+                        event.get('queryStringParameters'),
+                        organization_code=(event.get('pathParameters') or {}).get('organization_code')
+                    )
+                # 목록보다 먼저 읽는다. 그 사이 변경이 있으면 ETag가 본문보다 오래된 쪽이라 다음 폴링에서 다시 받는다.
+                etag = container.service.get_event_list_etag(page_request)
+                if etag_matches(_get_header(event, 'If-None-Match'), etag):
+                    return LambdaResponse.not_modified(etag)
+
+                if page_request is None:
+                    # 쿼리 파라미터 없는 기존 호출은 전체 목록(배열)을 그대로 돌려준다.
+                    response = container.service.get_list_event()
+                    response = json.dumps([asdict(event) for event in response], default=str)
+                else:
+                    response = container.service.get_event_page(page_request)
+                    response = json.dumps(asdict(response), default=str)
+                return LambdaResponse(status_code=200, body=response, etag=etag)
             elif http_method == 'PUT' and resource_path == '/event':
-                request_body = EventPutRequest(**request_body)
-                response = container.service.update_event(request_body)
+                response = container.service.update_event(EventPutRequest(**request_body))
                 response = json.dumps(asdict(response), default=str)
             elif http_method == 'DELETE' and resource_path == '/event':
-                request_body = EventDeleteRequest(**request_body)
-                container.service.delete_event(request_body)
+                container.service.delete_event(EventDeleteRequest(**request_body))
+            elif http_method == 'GET' and resource_path == '/event/roster':
+                response = container.service.export_roster_bundle(
+                    RosterBundleRequest.from_query(event.get('queryStringParameters'))
+                )
+                response = json.dumps(asdict(response))
             else:
                 return LambdaResponse(
                     status_code=404,
                     body=json.dumps({"message": "Route not found"})
-                ).to_dict()
+                )
 
             return LambdaResponse(
                 status_code=200,
                 body=response
-            ).to_dict()
+            )
+
+        return run_transaction(handle).to_dict()
 
-    # except () as e:
-    #     return LambdaResponse(
-    #         status_code=e.status_code,
-    #         body=json.dumps({"message": e.message})
-    #     ).to_dict()
+    except (EventNotFoundException, InvalidEventQueryException, InvalidEventBatchException) as e:
+        return LambdaResponse(
+            status_code=e.status_code,
+            body=json.dumps({"message": e.message})
+        ).to_dict()
 
     except Exception as e:
         logger.error(f"Error in lambda_handler: {e}")
         return LambdaResponse(
             status_code=500,
             body=json.dumps({"message": "An error occurred"})
-        ).to_dict()
\ No newline at end of file
+        ).to_dict()
+
+
+def handle_qr_reconcile(event, context):
+    options = event.get(QR_RECONCILE_EVENT_KEY)
+    event_codes = options.get('event_codes') if isinstance(options, dict) else None
+    try:
+        result = reconcile_pending_qr(event_codes)
+    except Exception as e:
+        logger.error(f"Error in handle_qr_reconcile: {e}")
+        return LambdaResponse(
+            status_code=500,
+            body=json.dumps({"message": "QR reconcile failed"})
+        ).to_dict()
+
+    logger.info("qr reconcile", extra=result)
+    return LambdaResponse(
+        status_code=200,
+        body=json.dumps(result)
+    ).to_dict()
@@ -0,0 +1,26 @@
+class EventNotFoundException(Exception):
+    def __init__(self):
+        self.message = "존재하지 않는 이벤트입니다."
+        self.status_code = 404
+        super().__init__(self.message)
+
+
+class InvalidEventQueryException(Exception):
+    def __init__(self, message: str = "잘못된 조회 조건입니다."):
+        self.message = message
+        self.status_code = 400
+        super().__init__(self.message)
+
+
+class EventCodeAllocationException(Exception):
+    def __init__(self):
+        self.message = "이벤트 코드를 만들지 못했습니다. 다시 시도하세요."
+        self.status_code = 503
+        super().__init__(self.message)
+
+
+class InvalidEventBatchException(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        self.status_code = 400
+        super().__init__(self.message)
@@ -0,0 +1,220 @@
+"""
+이벤트 QR 이미지 렌더링과 S3 업로드.
+
+로고는 목표 크기별로 한 번만 열고 리사이즈해서 컨테이너에 들고 있고, S3 클라이언트도
+컨테이너마다 하나만 만든다. QR 모듈은 qrcode의 행렬에서 바로 그린다(모듈마다 사각형을
+그리지 않고 1픽셀=1모듈 이미지를 NEAREST로 키운다).
+
+    QR_OUTPUT_FORMAT=png            기존과 같은 RGBA PNG
+    QR_OUTPUT_FORMAT=png-optimized  팔레트 PNG(로고가 없으면 1-bit)
+    QR_OUTPUT_FORMAT=svg            모듈은 path, 로고는 내장 PNG
+
+로고가 가운데를 가리므로 오류 정정 수준(QR_ERROR_CORRECTION)은 로고 면적보다 넉넉해야
+한다. 로고는 한 변의 1/4(면적 약 6~11%)이라 Q(25%)로 충분하다.
+"""
+import base64
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+import qrcode
+from PIL import Image
+
+from settings import settings
+
+QR_FORMAT_PNG = "png"
+QR_FORMAT_PNG_OPTIMIZED = "png-optimized"
+QR_FORMAT_SVG = "svg"
+QR_FORMATS = (QR_FORMAT_PNG, QR_FORMAT_PNG_OPTIMIZED, QR_FORMAT_SVG)
+
+ERROR_CORRECTION_LEVELS = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo.png")
+# 팔레트 PNG의 색 수. 흑백 모듈 2색 + 로고 색.
+_PALETTE_COLORS = 64
+
+
+@dataclass
+class RenderedQr:
+    body: bytes
+    content_type: str
+
+
+class QrRenderer:
+    def __init__(
+        self,
+        logo_path: Optional[str] = LOGO_PATH,
+        error_correction: str = "Q",
+        box_size: int = 10,
+        border: int = 4
+    ):
+        self.logo_path = logo_path
+        self.error_correction = ERROR_CORRECTION_LEVELS[error_correction.upper()]
+        self.box_size = box_size
+        self.border = border
+        self._source_logo: Optional[Image.Image] = None
+        self._logos: dict[int, Image.Image] = {}
+        self._logo_pngs: dict[int, bytes] = {}
+        self._lock = threading.Lock()
+
+    def _logo(self, size: int) -> Image.Image:
+        """size x size로 줄인 RGBA 로고. 크기별로 한 번만 만든다."""
+        logo = self._logos.get(size)
+        if logo is None:
+            with self._lock:
+                logo = self._logos.get(size)
+                if logo is None:
+                    if self._source_logo is None:
+                        with Image.open(self.logo_path) as source:
+                            self._source_logo = source.convert("RGBA")
+                    logo = self._source_logo.resize((size, size), Image.Resampling.LANCZOS)
+                    self._logos[size] = logo
+        return logo
+
+    def _logo_png(self, size: int) -> bytes:
+        png = self._logo_pngs.get(size)
+        if png is None:
+            buffer = BytesIO()
+            logo = self._logo(size).quantize(_PALETTE_COLORS, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+            logo.save(buffer, format="PNG", optimize=True)
+            png = self._logo_pngs[size] = buffer.getvalue()
+        return png
+
+    def matrix(self, data: str) -> list[list[bool]]:
+        """border를 포함한 모듈 행렬(True=검정)."""
+        qr = qrcode.QRCode(
+            version=None,
+            error_correction=self.error_correction,
+            box_size=self.box_size,
+            border=self.border,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+        return qr.get_matrix()
+
+    def _modules_image(self, matrix: list[list[bool]]) -> Image.Image:
+        modules = len(matrix)
+        pixels = bytes(0 if dark else 255 for row in matrix for dark in row)
+        image = Image.frombytes("L", (modules, modules), pixels)
+        return image.resize((modules * self.box_size, modules * self.box_size), Image.Resampling.NEAREST)
+
+    def render(self, data: str, output_format: str = QR_FORMAT_PNG) -> RenderedQr:
+        matrix = self.matrix(data)
+        if output_format == QR_FORMAT_SVG:
+            return RenderedQr(self._svg(matrix), "image/svg+xml")
+        if output_format not in (QR_FORMAT_PNG, QR_FORMAT_PNG_OPTIMIZED):
+            raise ValueError(f"지원하지 않는 QR 형식입니다: {output_format}")
+
+        image = self._modules_image(matrix)
+        if self.logo_path:
+            logo_size = image.size[0] // 4
+            logo = self._logo(logo_size)
+            position = ((image.size[0] - logo_size) // 2, (image.size[1] - logo_size) // 2)
+            image = image.convert("RGBA" if output_format == QR_FORMAT_PNG else "RGB")
+            image.paste(logo, position, logo)
+
+        buffer = BytesIO()
+        if output_format == QR_FORMAT_PNG:
+            image.convert("RGBA").save(buffer, format="PNG")
+        elif image.mode == "L":
+            image.convert("1").save(buffer, format="PNG", optimize=True)
+        else:
+            image.quantize(_PALETTE_COLORS, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE).save(buffer, format="PNG", optimize=True)
+        return RenderedQr(buffer.getvalue(), "image/png")
+
+    def _svg(self, matrix: list[list[bool]]) -> bytes:
+        modules = len(matrix)
+        # 가로로 이어진 검정 모듈을 사각형 하나로 묶는다.
+        path = []
+        for y, row in enumerate(matrix):
+            x = 0
+            while x < modules:
+                if not row[x]:
+                    x += 1
+                    continue
+                start = x
+                while x < modules and row[x]:
+                    x += 1
+                path.append(f"M{start} {y}h{x - start}v1h{start - x}z")
+
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {modules} {modules}" '
+            f'width="{modules * self.box_size}" height="{modules * self.box_size}" shape-rendering="crispEdges">',
+            f'<rect width="{modules}" height="{modules}" fill="#fff"/>',
+            f'<path d="{"".join(path)}" fill="#000"/>',
+        ]
+        if self.logo_path:
+            pixel_size = modules * self.box_size // 4
+            logo = base64.b64encode(self._logo_png(pixel_size)).decode("ascii")
+            offset = (modules - modules / 4) / 2
+            parts.append(
+                f'<image x="{offset:g}" y="{offset:g}" width="{modules / 4:g}" height="{modules / 4:g}" '
+                f'href="data:image/png;base64,{logo}"/>'
+            )
+        parts.append("</svg>")
+        return "".join(parts).encode("utf-8")
+
+
+_renderer: Optional[QrRenderer] = None
+_s3_client = None
+
+
+def get_renderer() -> QrRenderer:
+    global _renderer
+    if _renderer is None:
+        _renderer = QrRenderer(error_correction=settings.qr_error_correction)
+    return _renderer
+
+
+def get_s3_client():
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+        _s3_client = boto3.client("s3")
+    return _s3_client
+
+
+def qr_object_key(event_code: str, output_format: Optional[str] = None) -> str:
+    extension = "svg" if (output_format or settings.qr_output_format) == QR_FORMAT_SVG else "png"
+    return f"{event_code}.{extension}"
+
+
+def qr_code_url(event_code: str, output_format: Optional[str] = None) -> str:
+    return f"https://{settings.qr_s3_bucket_name}.s3.amazonaws.com/{qr_object_key(event_code, output_format)}"
+
+
+def create_qr_code(event_code: str, output_format: Optional[str] = None) -> str:
+    """이벤트 QR을 그려 S3에 올리고 URL을 돌려준다."""
+    output_format = output_format or settings.qr_output_format
+    rendered = get_renderer().render(f"{settings.client_url}/?c={event_code}", output_format)
+    get_s3_client().put_object(
+        Bucket=settings.qr_s3_bucket_name,
+        Key=qr_object_key(event_code, output_format),
+        Body=rendered.body,
+        ContentType=rendered.content_type
+    )
+    return qr_code_url(event_code, output_format)
+
+
+def create_qr_codes(event_codes: list[str], output_format: Optional[str] = None, workers: int = 8) -> dict[str, Optional[Exception]]:
+    """
+    여러 이벤트의 QR을 스레드 풀에서 동시에 그리고 올린다. {event_code: 실패 예외 또는 None}.
+    렌더링은 GIL을 나눠 쓰지만 PNG 인코딩과 S3 업로드는 겹쳐서 돈다(Lambda에서는 프로세스
+    풀을 쓸 수 없다).
+    """
+    if not event_codes:
+        return {}
+    # boto3 클라이언트 생성과 로고 준비는 스레드에 넘기기 전에 한 번 해 둔다.
+    get_s3_client()
+    get_renderer()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(event_codes))), thread_name_prefix="qr-batch") as pool:
+        futures = {event_code: pool.submit(create_qr_code, event_code, output_format) for event_code in event_codes}
+    return {event_code: future.exception() for event_code, future in futures.items()}
@@ -0,0 +1,211 @@
+"""
+이벤트 QR 이미지 비동기 생성(QR_RENDER_MODE=thread|queue).
+
+create_event는 qr_url을 미리 정해(qr_code.qr_code_url) qr_status='pending'으로 이벤트를
+커밋하고, 커밋된 뒤에 렌더링을 디스패처에 넘긴다. 이미지가 올라가면 qr_status를 NULL로
+되돌린다.
+
+- thread: 프로세스 안의 스레드 풀. 로컬/테스트 전용이다. Lambda는 응답 뒤 컨테이너를 얼려
+  렌더링이 다음 호출이나 재생성 작업까지 멈추고, 스레드가 요청과 커넥션 풀을 나눠 쓰므로
+  Lambda 안(AWS_LAMBDA_FUNCTION_NAME이 있을 때)에서는 거절한다.
+- queue: SQS(QR_RENDER_QUEUE_URL)로 {"event_code", "format"}을 보내고 event_handler가
+  SQS 레코드로 받아 만든다(handle_qr_records). 로컬에서는 InMemoryQueue를 SQS 클라이언트
+  자리에 넣고 consume()으로 돌린다.
+
+재생성 작업(reconcile_pending_qr)은 QR_RECONCILE_GRACE_SECONDS가 지나도 pending인 이벤트의
+S3 객체를 확인해서, 없으면 다시 만들고 있으면 pending만 푼다.
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Iterable, Optional
+
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.orm import Session
+
+from db_connection import run_transaction
+from qr_code import QR_FORMAT_PNG, QR_FORMAT_SVG, create_qr_code, get_s3_client
+from repository import QR_STATUS_PENDING, EventRepository
+from settings import settings
+
+logger = logging.getLogger()
+
+QR_RENDER_SYNC = "sync"
+QR_RENDER_THREAD = "thread"
+QR_RENDER_QUEUE = "queue"
+QR_RENDER_MODES = (QR_RENDER_SYNC, QR_RENDER_THREAD, QR_RENDER_QUEUE)
+
+
+def render_pending_qr(event_code: str, output_format: Optional[str] = None) -> None:
+    """QR을 만들어 올리고 pending을 푼다. 다시 실행해도 같은 객체를 덮어쓸 뿐이다."""
+    create_qr_code(event_code, output_format)
+    run_transaction(lambda session: EventRepository(session).mark_qr_ready(event_code))
+
+
+class ThreadQrDispatcher:
+    def __init__(self, workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qr-render")
+        self._futures: set[Future] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, event_code: str, output_format: Optional[str] = None) -> Future:
+        future = self._executor.submit(self._run, event_code, output_format)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
+
+    def _run(self, event_code: str, output_format: Optional[str]) -> None:
+        try:
+            render_pending_qr(event_code, output_format)
+        except Exception as e:
+            # pending으로 남은 이벤트는 재생성 작업이 다시 만든다.
+            logger.error(f"QR render failed for {event_code}: {e}")
+
+    def drain(self, timeout: Optional[float] = None) -> None:
+        """제출된 작업이 끝날 때까지 기다린다(테스트, 도구용)."""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+
+
+class QueueQrDispatcher:
+    def __init__(self, queue_url: str, client=None):
+        self.queue_url = queue_url
+        self._client = client
+
+    def _get_client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("sqs")
+        return self._client
+
+    def submit(self, event_code: str, output_format: Optional[str] = None) -> None:
+        self._get_client().send_message(
+            QueueUrl=self.queue_url,
+            MessageBody=json.dumps({"event_code": event_code, "format": output_format})
+        )
+
+
+class InMemoryQueue:
+    """SQS 클라이언트 대신 쓰는 로컬 큐. consume()이 SQS 트리거 역할을 한다."""
+
+    def __init__(self):
+        self.messages: list[dict] = []
+        self._lock = threading.Lock()
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        message_id = uuid.uuid4().hex
+        with self._lock:
+            self.messages.append({"messageId": message_id, "body": MessageBody, "eventSource": "aws:sqs"})
+        return {"MessageId": message_id}
+
+    def consume(self) -> list[str]:
+        """쌓인 메시지를 모두 처리하고 실패한 messageId를 돌려준다."""
+        with self._lock:
+            records, self.messages = self.messages, []
+        return handle_qr_records(records)
+
+
+def handle_qr_records(records: Iterable[dict]) -> list[str]:
+    """SQS 레코드의 QR을 만든다. 실패한 messageId를 돌려준다(batchItemFailures)."""
+    failed = []
+    for record in records:
+        try:
+            message = json.loads(record["body"])
+            render_pending_qr(message["event_code"], message.get("format"))
+        except Exception as e:
+            logger.error(f"QR render failed for message {record.get('messageId')}: {e}")
+            failed.append(record.get("messageId"))
+    return failed
+
+
+_dispatcher = None
+
+
+def get_dispatcher():
+    """QR_RENDER_MODE에 맞는 디스패처. sync면 None이다."""
+    global _dispatcher
+    if settings.qr_render_mode == QR_RENDER_SYNC:
+        return None
+    if _dispatcher is None:
+        if settings.qr_render_mode == QR_RENDER_THREAD:
+            if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+                raise ValueError("QR_RENDER_MODE=thread는 로컬/테스트 전용입니다. Lambda에서는 queue를 쓰세요")
+            _dispatcher = ThreadQrDispatcher(settings.qr_render_workers)
+        elif settings.qr_render_mode == QR_RENDER_QUEUE:
+            if not settings.qr_render_queue_url:
+                raise ValueError("QR_RENDER_MODE=queue에는 QR_RENDER_QUEUE_URL이 필요합니다")
+            _dispatcher = QueueQrDispatcher(settings.qr_render_queue_url)
+        else:
+            raise ValueError(f"지원하지 않는 QR_RENDER_MODE입니다: {settings.qr_render_mode}")
+    return _dispatcher
+
+
+def dispatch_after_commit(session: Session, event_code: str, output_format: Optional[str] = None) -> None:
+    # 커밋 전에 넘기면 워커가 아직 없는(또는 롤백될) 이벤트를 찾게 된다.
+    dispatcher = get_dispatcher()
+    sqlalchemy_event.listen(
+        session, "after_commit",
+        lambda session: dispatcher.submit(event_code, output_format),
+        once=True
+    )
+
+
+def _output_format(qr_url: str) -> str:
+    if qr_url.endswith(".svg"):
+        return QR_FORMAT_SVG
+    return QR_FORMAT_PNG if settings.qr_output_format == QR_FORMAT_SVG else settings.qr_output_format
+
+
+def _object_exists(s3, key: str) -> bool:
+    try:
+        s3.head_object(Bucket=settings.qr_s3_bucket_name, Key=key)
+        return True
+    except Exception as e:
+        code = getattr(e, "response", {}).get("Error", {}).get("Code")
+        if code in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def reconcile_pending_qr(
+    event_codes: Optional[list[str]] = None,
+    grace_seconds: Optional[float] = None,
+    limit: int = 100
+) -> dict:
+    """
+    오래된 pending 이벤트(event_codes가 있으면 그 이벤트들)의 QR 객체를 확인해 없으면
+    다시 만든다. 처리 결과 건수를 돌려준다.
+    """
+    if event_codes:
+        rows = run_transaction(lambda session: EventRepository(session).get_event_qr_urls(event_codes))
+    else:
+        grace = settings.qr_reconcile_grace_seconds if grace_seconds is None else grace_seconds
+        rows = run_transaction(lambda session: EventRepository(session).get_pending_qr_events(grace, limit))
+
+    s3 = get_s3_client()
+    result = {"checked": 0, "regenerated": 0, "present": 0, "failed": 0}
+    for row in rows:
+        result["checked"] += 1
+        if not row.qr_url:
+            continue
+        try:
+            if _object_exists(s3, row.qr_url.rsplit("/", 1)[-1]):
+                # 업로드는 됐는데 상태 갱신 전에 멈춘 경우라면 pending만 푼다.
+                run_transaction(lambda session: EventRepository(session).mark_qr_ready(row.event_code))
+                result["present"] += 1
+            else:
+                render_pending_qr(row.event_code, _output_format(row.qr_url))
+                result["regenerated"] += 1
+        except Exception as e:
+            logger.error(f"QR reconcile failed for {row.event_code}: {e}")
+            result["failed"] += 1
+    return result
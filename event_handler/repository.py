@@ -1,9 +1,48 @@
-from model import Event
+from model import Event, EventRegistration
+from metrics import timed_methods
 
+from sqlalchemy import Row, and_, func, insert, or_
 from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
 from typing import Optional
 
 
+QR_STATUS_PENDING = "pending"
+
+# 목록 화면에서 쓰는 컬럼. description(Text)은 읽지 않는다.
+_EVENT_SUMMARY_COLUMNS = (
+    Event.event_code,
+    Event.event_date_time,
+    Event.event_name,
+    Event.code_expired_at,
+    Event.event_version,
+    Event.organization_code,
+    Event.qr_url,
+    Event.qr_status,
+    Event.created_at,
+    Event.updated_at,
+)
+
+
+def _filter_events(query, organization_code, date_from, date_to, active_at, expired_before, search=None):
+    if organization_code is not None:
+        query = query.filter(Event.organization_code == organization_code)
+    if date_from is not None:
+        query = query.filter(Event.event_date_time >= date_from)
+    if date_to is not None:
+        query = query.filter(Event.event_date_time < date_to)
+    if active_at is not None:
+        query = query.filter(Event.code_expired_at >= active_at)
+    if expired_before is not None:
+        query = query.filter(Event.code_expired_at < expired_before)
+    if search is not None:
+        # 부분 일치라 인덱스를 못 타고 위 조건으로 좁힌 행을 거른다(관리자 화면 검색용).
+        pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        query = query.filter(or_(Event.event_name.ilike(pattern, escape='\\'), Event.event_code.ilike(pattern, escape='\\')))
+    return query
+
+
+@timed_methods("Repository")
 class EventRepository:
     def __init__(
         self,
@@ -16,9 +55,69 @@ class EventRepository:
         self._db.flush()
         return event
 
+    def insert_events(self, rows: list[dict]) -> None:
+        """Event 여러 행을 INSERT 한 문장(multi-row VALUES)으로 넣는다."""
+        self._db.execute(insert(Event).values(rows))
+
+    def get_existing_event_codes(self, event_codes: list[str]) -> set[str]:
+        return {
+            row.event_code
+            for row in self._db.query(Event.event_code).filter(Event.event_code.in_(event_codes))
+        }
+
     def get_list_event(self) -> list[Event]:
         return self._db.query(Event).all()
 
+    def get_event_page(
+        self,
+        limit: int,
+        organization_code: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        expired_before: Optional[datetime] = None,
+        active_at: Optional[datetime] = None,
+        after: Optional[tuple[datetime, str]] = None,
+        search: Optional[str] = None
+    ) -> list[Row]:
+        """
+        (event_date_time, event_code) 내림차순 keyset 페이지. after는 이전 페이지 마지막 행의
+        (event_date_time, event_code)이다. 조건은 idx_event_organization_code,
+        idx_event_date_time, idx_event_code_expired_at 범위로 들어간다.
+        """
+        query = _filter_events(
+            self._db.query(*_EVENT_SUMMARY_COLUMNS),
+            organization_code, date_from, date_to, active_at, expired_before, search
+        )
+        if after is not None:
+            after_date_time, after_event_code = after
+            # row 비교 (a, b) < (x, y)는 단일 컬럼 인덱스의 Index Cond로 못 쓰므로 풀어서 쓴다.
+            query = query.filter(
+                Event.event_date_time <= after_date_time,
+                or_(
+                    Event.event_date_time < after_date_time,
+                    and_(Event.event_date_time == after_date_time, Event.event_code < after_event_code)
+                )
+            )
+        return query.order_by(Event.event_date_time.desc(), Event.event_code.desc()).limit(limit).all()
+
+    def get_event_list_version(
+        self,
+        organization_code: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        expired_before: Optional[datetime] = None,
+        active_at: Optional[datetime] = None,
+        search: Optional[str] = None
+    ) -> Row:
+        """
+        get_event_page와 같은 조건의 (count, updated_at=max(updated_at)).
+        search가 없으면 idx_event_org_date_time_expired_updated만 읽는다(index-only scan).
+        """
+        return _filter_events(
+            self._db.query(func.count().label('count'), func.max(Event.updated_at).label('updated_at')),
+            organization_code, date_from, date_to, active_at, expired_before, search
+        ).one()
+
     def get_event(self, event_code: str) -> Optional[Event]:
         return self._db.query(Event).filter_by(event_code=event_code).first()
 
@@ -40,4 +139,38 @@ class EventRepository:
             self._db.delete(event)
             self._db.flush()
         return event
-    
\ No newline at end of file
+
+    def mark_qr_ready(self, event_code: str) -> bool:
+        """pending이던 이벤트의 qr_status를 NULL로 되돌린다. 바뀐 행이 있으면 True."""
+        updated = self._db.query(Event).filter(
+            Event.event_code == event_code,
+            Event.qr_status == QR_STATUS_PENDING
+        ).update({Event.qr_status: None}, synchronize_session=False)
+        return updated > 0
+
+    def get_pending_qr_events(self, grace_seconds: float, limit: int) -> list[Row]:
+        """
+        grace_seconds보다 오래 pending인 이벤트. created_at은 DB의 current_timestamp로 찍히므로
+        (DSQL은 UTC) 기준 시각도 앱 시계가 아닌 같은 DB 시계로 계산한다.
+        """
+        return self._db.query(Event.event_code, Event.qr_url).filter(
+            Event.qr_status == QR_STATUS_PENDING,
+            Event.created_at < func.current_timestamp() - timedelta(seconds=grace_seconds)
+        ).order_by(Event.created_at).limit(limit).all()
+
+    def get_event_qr_urls(self, event_codes: list[str]) -> list[Row]:
+        return self._db.query(Event.event_code, Event.qr_url).filter(
+            Event.event_code.in_(event_codes)
+        ).all()
+
+    def get_registrations(self, event_code: str, since: Optional[datetime] = None) -> list[Row]:
+        query = self._db.query(
+            EventRegistration.phone,
+            EventRegistration.name,
+            EventRegistration.created_at
+        ).filter(
+            EventRegistration.event_code == event_code
+        )
+        if since is not None:
+            query = query.filter(EventRegistration.created_at >= since)
+        return query.all()
@@ -2,6 +2,8 @@ from dataclasses import dataclass
 from typing import Optional
 from datetime import datetime
 
+from exception import InvalidEventBatchException, InvalidEventQueryException
+
 
 @dataclass
 class EventDTO:
@@ -14,10 +16,16 @@ class EventDTO:
     organization_code: str
     description: Optional[str] = None
     qr_url: Optional[str] = None
+    qr_status: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
 
+def _parse_datetime(value):
+    # JSON 본문의 시각은 ISO 8601 문자열로 들어온다.
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
 @dataclass
 class EventRequest:
     event_date_time: datetime
@@ -27,6 +35,10 @@ class EventRequest:
     event_version: str
     organization_code: str
 
+    def __post_init__(self):
+        self.event_date_time = _parse_datetime(self.event_date_time)
+        self.code_expired_at = _parse_datetime(self.code_expired_at)
+
 
 @dataclass
 class EventPutRequest:
@@ -39,6 +51,10 @@ class EventPutRequest:
     organization_code: str
     qr_url: Optional[str] = None
 
+    def __post_init__(self):
+        self.event_date_time = _parse_datetime(self.event_date_time)
+        self.code_expired_at = _parse_datetime(self.code_expired_at)
+
 
 @dataclass
 class EventDeleteRequest:
@@ -49,8 +65,138 @@ class EventDeleteRequest:
 class EventResponse:
     event_code: str
     qr_url: Optional[str] = None
+    qr_status: Optional[str] = None
+
+
+@dataclass
+class EventBatchRequest:
+    events: list[EventRequest]
+
+    @classmethod
+    def from_dict(cls, data: dict, max_items: int) -> "EventBatchRequest":
+        try:
+            events = [EventRequest(**item) for item in data["events"]]
+        except (KeyError, TypeError, ValueError):
+            raise InvalidEventBatchException("events must be a list of event requests")
+        if not 0 < len(events) <= max_items:
+            raise InvalidEventBatchException(f"events must contain 1 to {max_items} entries")
+        return cls(events=events)
+
+
+@dataclass
+class EventBatchItemResponse:
+    """
+    /event/batch의 항목별 결과. 200이면 result는 같은 요청을 POST /event로 보냈을 때와 같고,
+    202는 QR 업로드 실패로 pending인 채 만든 항목, 503은 코드를 못 만들어 건너뛴 항목이다.
+    """
+    status_code: int
+    result: Optional[EventResponse] = None
+    message: Optional[str] = None
 
 
 @dataclass
 class EventListResponse:
-    events: list[EventDTO]
\ No newline at end of file
+    events: list[EventDTO]
+
+
+@dataclass
+class EventSummaryDTO:
+    """목록 화면용 Event. description은 읽지 않는다."""
+    event_code: str
+    event_date_time: datetime
+    event_name: str
+    code_expired_at: datetime
+    event_version: str
+    organization_code: str
+    qr_url: Optional[str] = None
+    # 'pending'이면 qr_url의 이미지가 아직 만들어지는 중이다.
+    qr_status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+EVENT_STATUS_ACTIVE = "active"
+EVENT_STATUS_EXPIRED = "expired"
+EVENT_PAGE_DEFAULT_LIMIT = 50
+EVENT_PAGE_MAX_LIMIT = 200
+EVENT_SEARCH_MAX_LENGTH = 100
+
+
+@dataclass
+class EventPageRequest:
+    organization_code: Optional[str] = None
+    # event_date_time 범위 [date_from, date_to)
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    # active: 아직 출석 가능(code_expired_at >= now), expired: 출석 마감
+    status: Optional[str] = None
+    # 이전 페이지 응답의 next_cursor
+    cursor: Optional[str] = None
+    limit: int = EVENT_PAGE_DEFAULT_LIMIT
+    # event_name 또는 event_code 부분 일치(대소문자 무시)
+    search: Optional[str] = None
+
+    @classmethod
+    def from_query(cls, params: Optional[dict], organization_code: Optional[str] = None) -> "EventPageRequest":
+        params = params or {}
+        try:
+            # size는 관리자 화면(admin_sunny)이 쓰는 limit의 다른 이름이다.
+            limit = int(params.get('limit') or params.get('size') or EVENT_PAGE_DEFAULT_LIMIT)
+            date_from = _parse_datetime(params.get('from') or None)
+            date_to = _parse_datetime(params.get('to') or None)
+        except ValueError:
+            raise InvalidEventQueryException("limit, from, to 형식이 올바르지 않습니다.")
+        status = params.get('status') or None
+        search = (params.get('search') or '').strip() or None
+        if not 1 <= limit <= EVENT_PAGE_MAX_LIMIT:
+            raise InvalidEventQueryException(f"limit은 1~{EVENT_PAGE_MAX_LIMIT} 사이여야 합니다.")
+        if status not in (None, EVENT_STATUS_ACTIVE, EVENT_STATUS_EXPIRED):
+            raise InvalidEventQueryException("status는 active 또는 expired여야 합니다.")
+        if search is not None and len(search) > EVENT_SEARCH_MAX_LENGTH:
+            raise InvalidEventQueryException(f"search는 {EVENT_SEARCH_MAX_LENGTH}자 이하여야 합니다.")
+        # 목록은 keyset 페이지라 page 번호로 건너뛸 수 없다. 첫 페이지(page=0)만 받는다.
+        if params.get('page') not in (None, '', '0'):
+            raise InvalidEventQueryException("page는 지원하지 않습니다. 이전 응답의 next_cursor를 cursor로 보내세요.")
+        return cls(
+            organization_code=organization_code or params.get('organization_code') or None,
+            date_from=date_from,
+            date_to=date_to,
+            status=status,
+            cursor=params.get('cursor') or None,
+            limit=limit,
+            search=search
+        )
+
+
+@dataclass
+class EventPageResponse:
+    events: list[EventSummaryDTO]
+    # 다음 페이지가 없으면 None
+    next_cursor: Optional[str] = None
+
+@dataclass
+class RosterBundleRequest:
+    event_code: str
+    # 이전 번들의 watermark. 있으면 그 이후 등록만 담은 delta 번들을 만든다.
+    since: Optional[datetime] = None
+
+    @classmethod
+    def from_query(cls, params: Optional[dict]) -> "RosterBundleRequest":
+        params = params or {}
+        event_code = params.get('event_code') or None
+        if event_code is None:
+            raise InvalidEventQueryException("event_code가 필요합니다.")
+        try:
+            since = _parse_datetime(params.get('since') or None)
+        except ValueError:
+            raise InvalidEventQueryException("since 형식이 올바르지 않습니다.")
+        return cls(event_code=event_code, since=since)
+
+
+@dataclass
+class RosterBundleResponse:
+    event_code: str
+    kind: str
+    count: int
+    watermark: Optional[str]
+    bundle: str  # base64
@@ -1,20 +1,77 @@
 from model import Event
-from settings import settings
+from hash_tool import derive_secret
+from roster_bundle import BUNDLE_SECRET_PURPOSE, KIND_DELTA, KIND_FULL, build_roster_bundle, phone_key
 
+import base64
+import binascii
+import hashlib
+import json
 import random
 import string
-from datetime import datetime
+from datetime import datetime, timedelta
 from dataclasses import asdict
+from typing import Optional
 
-from schema import EventRequest, EventResponse, EventPutRequest, EventDeleteRequest, EventDTO
+from schema import (
+    EventRequest,
+    EventResponse,
+    EventPutRequest,
+    EventDeleteRequest,
+    EventBatchItemResponse,
+    EventDTO,
+    EventSummaryDTO,
+    EventPageRequest,
+    EventPageResponse,
+    EVENT_STATUS_ACTIVE,
+    EVENT_STATUS_EXPIRED,
+    RosterBundleRequest,
+    RosterBundleResponse
+)
+from exception import EventCodeAllocationException, EventNotFoundException, InvalidEventQueryException
 
 from repository import EventRepository
 from sqlalchemy.orm import Session
+from settings import settings
+from qr_code import create_qr_code, create_qr_codes, qr_code_url
+from qr_worker import QR_RENDER_SYNC, QR_STATUS_PENDING, dispatch_after_commit
+
+
+# 배치 생성에서 항목마다 한 번에 뽑아 두는 후보 코드 수. 후보 전체를 한 쿼리로 확인한다.
+EVENT_CODE_CANDIDATES = 4
+# 배치 항목 중 이벤트는 만들었지만 sync 모드 QR 업로드가 실패해 재생성을 기다리는 항목
+QR_UPLOAD_PENDING_STATUS = 202
+QR_UPLOAD_PENDING_MESSAGE = "QR 이미지 업로드에 실패했습니다. 재생성 작업이 다시 만듭니다."
+
+
+def _encode_cursor(event_date_time: datetime, event_code: str) -> str:
+    raw = json.dumps([event_date_time.isoformat(), event_code], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        event_date_time, event_code = json.loads(raw)
+        return datetime.fromisoformat(event_date_time), str(event_code)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidEventQueryException("cursor가 올바르지 않습니다.")
 
-from io import BytesIO
-from PIL import Image
-import qrcode
-import boto3
+
+def _page_filters(request: EventPageRequest, now: datetime) -> dict:
+    return {
+        'organization_code': request.organization_code,
+        'date_from': request.date_from,
+        'date_to': request.date_to,
+        'active_at': now if request.status == EVENT_STATUS_ACTIVE else None,
+        'expired_before': now if request.status == EVENT_STATUS_EXPIRED else None,
+        'search': request.search,
+    }
+
+
+def _random_event_code(event_date_time: datetime) -> str:
+    date_str = event_date_time.strftime("%m%d")
+    random_chars = ''.join(random.choices(string.ascii_uppercase, k=3))
+    return f"{date_str}{random_chars}"
 
 
 class EventService:
@@ -28,7 +85,13 @@ class EventService:
 
     def create_event(self, request: EventRequest) -> EventResponse:
         event_code = self._make_event_code(request.event_date_time)
-        qr_url: str = self._create_qr_code_png(event_code)
+        if settings.qr_render_mode == QR_RENDER_SYNC:
+            qr_url: str = create_qr_code(event_code)
+            qr_status = None
+        else:
+            # URL은 event_code로 정해지므로 이미지는 커밋 뒤 워커가 만든다.
+            qr_url = qr_code_url(event_code)
+            qr_status = QR_STATUS_PENDING
         event: Event = Event.create(
             event_code=event_code,
             event_name=request.event_name,
@@ -37,15 +100,75 @@ class EventService:
             event_version=request.event_version,
             organization_code=request.organization_code,
             description=request.description,
-            qr_url=qr_url
+            qr_url=qr_url,
+            qr_status=qr_status
         )
         self._repo.insert_event(event)
-        self._db.commit()
+        if qr_status == QR_STATUS_PENDING:
+            dispatch_after_commit(self._db, event_code, settings.qr_output_format)
         return EventResponse(
             qr_url=qr_url,
-            event_code=event_code
+            event_code=event_code,
+            qr_status=qr_status
         )
     
+    def create_events(self, requests: list[EventRequest]) -> list[EventBatchItemResponse]:
+        """
+        이벤트 여러 개를 한 번에 만든다. 코드는 후보를 모아 한 쿼리로 중복을 확인하고,
+        QR은 스레드 풀에서 동시에 그려 올린 뒤, Event 행은 INSERT 한 문장으로 넣는다.
+        항목별 status_code:
+        - 200: POST /event와 같은 결과(thread/queue 모드면 qr_status='pending')
+        - 202: 만들었지만 sync 모드 QR 업로드가 실패해 qr_status='pending'으로 남겼다(재생성 작업이 채운다)
+        - 503: 코드를 배정하지 못해 만들지 않았다. 그 항목만 다시 보내면 된다.
+        """
+        allocated = self._allocate_event_codes([request.event_date_time for request in requests])
+        event_codes = [event_code for event_code in allocated if event_code]
+        output_format = settings.qr_output_format
+        upload_failed: set[str] = set()
+        if settings.qr_render_mode == QR_RENDER_SYNC:
+            failures = create_qr_codes(event_codes, output_format, workers=settings.qr_batch_workers)
+            upload_failed = {event_code for event_code, error in failures.items() if error is not None}
+            pending = upload_failed
+        else:
+            pending = set(event_codes)
+
+        rows = [
+            {
+                'event_code': event_code,
+                'event_name': request.event_name,
+                'event_date_time': request.event_date_time,
+                'code_expired_at': request.code_expired_at,
+                'event_version': request.event_version,
+                'organization_code': request.organization_code,
+                'description': request.description,
+                'qr_url': qr_code_url(event_code, output_format),
+                'qr_status': QR_STATUS_PENDING if event_code in pending else None,
+            }
+            for event_code, request in zip(allocated, requests)
+            if event_code
+        ]
+        if rows:
+            self._repo.insert_events(rows)
+        if settings.qr_render_mode != QR_RENDER_SYNC:
+            for event_code in event_codes:
+                dispatch_after_commit(self._db, event_code, output_format)
+
+        created = iter(rows)
+        results = []
+        for event_code in allocated:
+            if event_code is None:
+                error = EventCodeAllocationException()
+                results.append(EventBatchItemResponse(status_code=error.status_code, message=error.message))
+                continue
+            row = next(created)
+            failed = event_code in upload_failed
+            results.append(EventBatchItemResponse(
+                status_code=QR_UPLOAD_PENDING_STATUS if failed else 200,
+                result=EventResponse(event_code=row['event_code'], qr_url=row['qr_url'], qr_status=row['qr_status']),
+                message=QR_UPLOAD_PENDING_MESSAGE if failed else None
+            ))
+        return results
+
     def get_list_event(self) -> list[EventDTO]:
         events = self._repo.get_list_event()
         return [
@@ -55,6 +178,7 @@ class EventService:
                 description=event.description,
                 event_name=event.event_name,
                 qr_url=event.qr_url,
+                qr_status=event.qr_status,
                 code_expired_at=event.code_expired_at,
                 event_version=event.event_version,
                 organization_code=event.organization_code,
@@ -64,19 +188,53 @@ class EventService:
             for event in events
         ]
     
+    def get_event_page(self, request: EventPageRequest, now: Optional[datetime] = None) -> EventPageResponse:
+        """최근 행사부터 limit개씩. 다음 페이지는 next_cursor를 cursor로 넘겨 받는다."""
+        rows = self._repo.get_event_page(
+            limit=request.limit + 1,
+            after=_decode_cursor(request.cursor) if request.cursor else None,
+            **_page_filters(request, now or datetime.now())
+        )
+        # limit보다 하나 더 읽어서 다음 페이지가 있는지 본다.
+        page = rows[:request.limit]
+        next_cursor = None
+        if len(rows) > request.limit:
+            last = page[-1]
+            next_cursor = _encode_cursor(last.event_date_time, last.event_code)
+        return EventPageResponse(
+            events=[EventSummaryDTO(**row._asdict()) for row in page],
+            next_cursor=next_cursor
+        )
+
+    def get_event_list_etag(self, request: Optional[EventPageRequest] = None, now: Optional[datetime] = None) -> str:
+        """
+        목록 응답의 ETag. 목록을 읽지 않고 같은 조건의 (count, max(updated_at))만으로 만든다.
+        추가/수정은 max(updated_at)을, 삭제와 active/expired 경계 이동은 count를 바꾼다.
+        request가 None이면 쿼리 파라미터 없는 GET /event(전체 배열)다.
+        """
+        filters = _page_filters(request, now or datetime.now()) if request else {}
+        version = self._repo.get_event_list_version(**filters)
+        # 같은 데이터라도 조건, cursor, limit, 응답 형태가 다르면 다른 표현이다.
+        key = json.dumps([
+            version.count,
+            version.updated_at.isoformat() if version.updated_at else None,
+            asdict(request) if request else None,
+        ], default=str, separators=(',', ':'))
+        return f'W/"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
     def update_event(self, request: EventPutRequest) -> EventDTO:
         request_data = asdict(request)
         request_data.pop('event_code')
         new_event = self._repo.update_event(request.event_code, request_data)
         if not new_event:
             raise ValueError(f"Event with code {request.event_code} not found")
-        self._db.commit()
         return EventDTO(
             event_code=new_event.event_code,
             event_date_time=new_event.event_date_time,
             description=new_event.description,
             event_name=new_event.event_name,
             qr_url=new_event.qr_url,
+            qr_status=new_event.qr_status,
             code_expired_at=new_event.code_expired_at,
             event_version=new_event.event_version,
             organization_code=new_event.organization_code,
@@ -86,59 +244,69 @@ class EventService:
     
     def delete_event(self, request: EventDeleteRequest) -> None:
         self._repo.delete_event(request.event_code)
-        self._db.commit()
-
-    def _create_qr_code_png(self, event_code: str) -> str:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
+
+    def export_roster_bundle(self, request: RosterBundleRequest) -> RosterBundleResponse:
+        """키오스크 오프라인 검증용 서명된 로스터 번들. since가 있으면 그 이후 등록만 담는다."""
+        event = self._repo.get_event(request.event_code)
+        if not event:
+            raise EventNotFoundException()
+
+        since = request.since
+        # created_at은 업로드 트랜잭션 시작 시각이라 since 이전 created_at의 등록이 늦게 커밋될 수 있다.
+        # 최장 트랜잭션 길이만큼 앞에서부터 다시 읽는다(api_handler 로스터 캐시와 같은 설정).
+        registrations = self._repo.get_registrations(
+            request.event_code,
+            since - timedelta(seconds=settings.registration_commit_lag_seconds) if since else None
         )
-        qr.add_data(f"{settings.client_url}/?c={event_code}")
-        qr.make(fit=True)
-
-        qr_image = qr.make_image(fill_color="black", back_color="white").convert('RGBA')
-        
-        logo = Image.open("logo.png")
-        
-        if logo.mode != 'RGBA':
-            logo = logo.convert('RGBA')
-        
-        logo_size = qr_image.size[0] // 4
-        logo = logo.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
-
-        pos = ((qr_image.size[0] - logo.size[0]) // 2,
-               (qr_image.size[1] - logo.size[1]) // 2)
-
-        new_qr = Image.new('RGBA', qr_image.size, (255, 255, 255, 0))
-        new_qr.paste(qr_image, (0, 0))
-        new_qr.paste(logo, pos, logo)
-        
-        img_byte_arr = BytesIO()
-        new_qr.save(img_byte_arr, format='PNG')
-        img_byte_arr = img_byte_arr.getvalue()
-
-        s3_client = boto3.client('s3')
-        bucket_name = settings.qr_s3_bucket_name
-        file_name = f'{event_code}.png'
-        
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=file_name,
-            Body=img_byte_arr,
-            ContentType='image/png'
+        bundle = build_roster_bundle(
+            event,
+            registrations,
+            derive_secret(BUNDLE_SECRET_PURPOSE),
+            since=since,
+            watermark=since
         )
-        return f"https://{bucket_name}.s3.amazonaws.com/{file_name}"
-    
+        watermark = max((row.created_at for row in registrations if row.created_at), default=since)
+        return RosterBundleResponse(
+            event_code=event.event_code,
+            kind=KIND_DELTA if since else KIND_FULL,
+            # overlap으로 다시 읽은 행과 중복을 뺀, 번들 헤더와 같은 phone 키 수
+            count=len({phone_key(row.phone) for row in registrations}),
+            watermark=watermark.isoformat() if watermark else None,
+            bundle=base64.b64encode(bundle).decode('ascii')
+        )
+
     def _make_event_code(self, event_date_time: datetime) -> str:
         MAX_TRY: int = 5
         count: int = 0
         while count < MAX_TRY:
-            date_str = event_date_time.strftime("%m%d")
-            random_chars = ''.join(random.choices(string.ascii_uppercase, k=3))
-            event_code = f"{date_str}{random_chars}"
+            event_code = _random_event_code(event_date_time)
             if not self._repo.exist_event_code(event_code):
                 return event_code
             count += 1
-        raise ValueError("Failed to generate unique event code after maximum attempts")
\ No newline at end of file
+        raise ValueError("Failed to generate unique event code after maximum attempts")
+
+    def _allocate_event_codes(self, event_date_times: list[datetime]) -> list[Optional[str]]:
+        """
+        항목마다 후보를 EVENT_CODE_CANDIDATES개 뽑아 한 쿼리로 확인하고, 배치 안에서도 겹치지 않게 고른다.
+        MAX_TRY번 안에 코드를 못 고른 항목은 None으로 남긴다(배치 전체를 실패시키지 않는다).
+        """
+        MAX_TRY: int = 5
+        event_codes: list[Optional[str]] = [None] * len(event_date_times)
+        for _ in range(MAX_TRY):
+            missing = [i for i, event_code in enumerate(event_codes) if event_code is None]
+            if not missing:
+                return event_codes
+            candidates = {
+                i: [_random_event_code(event_date_times[i]) for _ in range(EVENT_CODE_CANDIDATES)]
+                for i in missing
+            }
+            taken = self._repo.get_existing_event_codes(
+                list({event_code for codes in candidates.values() for event_code in codes})
+            )
+            taken.update(event_code for event_code in event_codes if event_code)
+            for i, codes in candidates.items():
+                event_code = next((code for code in codes if code not in taken), None)
+                if event_code:
+                    event_codes[i] = event_code
+                    taken.add(event_code)
+        return event_codes
\ No newline at end of file
@@ -0,0 +1 @@
+common_layer/hash_tool.py
\ No newline at end of file
@@ -0,0 +1 @@
+common_layer/model.py
\ No newline at end of file
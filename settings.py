@@ -0,0 +1 @@
+common_layer/settings.py
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+테스트 공용 헬퍼.
+
+핸들러들은 Lambda 배포 구조(핸들러 디렉터리 + common_layer)를 그대로 따라
+`from service import ...`처럼 평면 import를 쓴다. 핸들러마다 service/repository/schema
+모듈 이름이 겹치므로, 테스트에서는 load_handler로 sys.modules를 비우고 해당 핸들러
+디렉터리를 import 경로 맨 앞에 둔 뒤 불러온다.
+
+DB가 필요한 테스트는 TEST_DATABASE_URL(로컬 PostgreSQL, 예:
+postgresql+psycopg://postgres@localhost/postgres)이 설정된 경우에만 실행한다.
+"""
+import importlib
+import os
+import sys
+from contextlib import contextmanager
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMON_LAYER = os.path.join(REPO_ROOT, "common_layer")
+
+# 레포 루트(심링크)와 common_layer를 모두 경로에 둬서 심링크가 없어도 동작하게 한다.
+for _path in (COMMON_LAYER, REPO_ROOT):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+_HANDLER_MODULES = ("app", "container", "service", "repository", "core_repository", "schema", "exception", "library", "qr_code", "qr_worker")
+_HANDLER_DIRS = ("api_handler", "event_handler", "csv_handler", "email_handler")
+
+
+def load_handler(handler: str, *module_names: str):
+    """handler 디렉터리의 모듈들을 새로 import해서 이름 순서대로 돌려준다."""
+    for name in _HANDLER_MODULES:
+        sys.modules.pop(name, None)
+    for other in _HANDLER_DIRS:
+        other_path = os.path.join(REPO_ROOT, other)
+        while other_path in sys.path:
+            sys.path.remove(other_path)
+    sys.path.insert(0, os.path.join(REPO_ROOT, handler))
+
+    modules = tuple(importlib.import_module(name) for name in module_names)
+    return modules[0] if len(modules) == 1 else modules
+
+
+def create_test_engine():
+    """TEST_DATABASE_URL에 모델 스키마를 새로 만든 엔진을 돌려준다."""
+    from sqlalchemy import create_engine
+    from model import Base
+
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def use_test_sessions(testcase, session_factory) -> None:
+    """db_connection.get_session(run_transaction 포함)이 테스트 DB 세션을 내주도록 바꾼다."""
+    import db_connection
+
+    @contextmanager
+    def _get_session():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    patcher = mock.patch.object(db_connection, "get_session", _get_session)
+    patcher.start()
+    testcase.addCleanup(patcher.stop)
+
+
+class StatementCounter:
+    """with 블록 안에서 엔진이 DB로 보낸 SQL 문장 수를 센다."""
+
+    def __init__(self, engine):
+        self._engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self._engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self._engine, "before_cursor_execute", self._on_execute)
+        return False
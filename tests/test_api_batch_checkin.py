@@ -0,0 +1,177 @@
+"""
+POST /check/batch 테스트.
+
+항목별 결과는 같은 요청을 /check로 하나씩 보냈을 때와 같아야 하고(성공/미등록/없는 이벤트/
+이미 체크인됨, 카운트 포함), 처리에 드는 SQL 문장 수는 항목 수와 무관해야 한다.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, StatementCounter, create_test_engine, load_handler, use_test_sessions
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class BatchCheckinTest(unittest.TestCase):
+    PHONES = [f"010-1234-{i:04d}" for i in range(20)]
+    UNREGISTERED = "010-9999-9999"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.repository = load_handler("api_handler", "app", "repository")
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event, EventCheckIn, EventRegistration
+        from hash_tool import hash_phone_number
+
+        patcher = mock.patch.multiple(
+            self.settings, salt="test-salt", checkin_mode="orm", checkin_count_source="scan"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository.event_cache.clear()
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        Session = sessionmaker(bind=self.engine)
+        now = datetime.now()
+        with Session() as session:
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            session.add(Event.create("E2", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            session.add(Event.create("EXPIRED", now, "meetup", now - timedelta(hours=1), "1", "AWSKRUG"))
+            for phone in self.PHONES:
+                hashed = hash_phone_number(phone.replace("-", ""))
+                session.add(EventRegistration.create("E1", hashed, f"참가자{phone[-4:]}"))
+                session.add(EventRegistration.create("E2", hashed, f"참가자{phone[-4:]}"))
+            # 지난 밋업 출석 이력
+            session.add(EventCheckIn(
+                phone=hash_phone_number(self.PHONES[0].replace("-", "")), event_code="E0", name="참가자",
+                checked_at=now - timedelta(days=30), event_version="1", organization_code="AWSKRUG",
+            ))
+            session.commit()
+        use_test_sessions(self, Session)
+
+    def _batch(self, items):
+        response = self.app.lambda_handler(
+            {"httpMethod": "POST", "path": "/check/batch", "body": json.dumps({"items": items})}, None
+        )
+        body = json.loads(response["body"])
+        return response["statusCode"], body.get("results", body)
+
+    def _check(self, event_code, phone):
+        response = self.app.lambda_handler(
+            {"httpMethod": "POST", "path": "/check", "body": json.dumps({"event_code": event_code, "phone": phone})},
+            None
+        )
+        return response["statusCode"], json.loads(response["body"])
+
+    def _count_checkins(self) -> int:
+        from sqlalchemy import text
+        with self.engine.connect() as conn:
+            return conn.execute(text("SELECT COUNT(*) FROM event_check_in")).scalar()
+
+    def test_results_match_single_check_semantics(self):
+        phone = self.PHONES[0]
+        self.assertEqual(self._check("E1", self.PHONES[1])[0], 200)
+
+        status, results = self._batch([
+            {"event_code": "E1", "phone": phone},
+            {"event_code": "E1", "phone": phone.replace("-", "")},  # 같은 번호, 배치 안 중복
+            {"event_code": "E1", "phone": self.PHONES[1]},  # 이미 /check로 체크인함
+            {"event_code": "E1", "phone": self.UNREGISTERED},
+            {"event_code": "NOPE", "phone": phone},
+            {"event_code": "EXPIRED", "phone": phone},
+            {"event_code": "E2", "phone": phone},
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual([result["status_code"] for result in results], [200, 400, 400, 404, 400, 400, 200])
+
+        first = results[0]["result"]
+        self.assertEqual(first["name"], "참가자0000")
+        self.assertEqual(first["count"], 3)  # E0, E1, E2 (같은 배치의 E2 포함)
+        self.assertEqual(first["checkin_count_info"]["all_count"], 3)
+        self.assertIn("3회", results[1]["message"])
+        self.assertEqual(self._count_checkins(), 4)
+
+        # 배치에서 체크인된 항목을 /check로 다시 보내면 이미 체크인됨이고 카운트가 같다.
+        status, body = self._check("E2", phone)
+        self.assertEqual(status, 400)
+        self.assertIn("3회", body["message"])
+
+    def test_counts_match_sequential_checks(self):
+        from sqlalchemy import text
+
+        items = [{"event_code": "E1", "phone": phone} for phone in self.PHONES[:5]]
+        _, batch_results = self._batch(items)
+
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM event_check_in WHERE event_code = 'E1'"))
+        sequential = [self._check(item["event_code"], item["phone"])[1] for item in items]
+        self.assertEqual([result["result"] for result in batch_results], sequential)
+
+    def test_counter_source_matches_scan(self):
+        items = [{"event_code": code, "phone": phone} for code in ("E1", "E2") for phone in self.PHONES[:3]]
+        with mock.patch.object(self.settings, "checkin_count_source", "counter"):
+            _, results = self._batch(items)
+        # 카운터에는 이번 배치만 쌓였으므로 E0 이력이 없는 번호는 E1, E2 두 번이다.
+        for index in (1, 4):
+            self.assertEqual(results[index]["result"]["count"], 2)
+            self.assertEqual(results[index]["result"]["checkin_count_info"], {
+                "this_year_count": 2,
+                "this_year_by_organization_count": 2,
+                "all_count": 2,
+                "all_by_organization_count": 2,
+            })
+
+    def test_statement_count_does_not_grow_with_batch_size(self):
+        counts = []
+        for code, phones in (("E1", self.PHONES[:2]), ("E2", self.PHONES)):
+            self.repository.event_cache.clear()
+            with StatementCounter(self.engine) as counter:
+                status, results = self._batch([{"event_code": code, "phone": phone} for phone in phones])
+            self.assertTrue(all(result["status_code"] == 200 for result in results))
+            counts.append(counter.count)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_chunks_commit_separately(self):
+        items = [{"event_code": "E1", "phone": phone} for phone in self.PHONES[:5]]
+        original = self.repository.ApiRepository.insert_event_checkins
+        calls = []
+
+        def failing_second_chunk(repo, checkins):
+            calls.append(len(checkins))
+            if len(calls) == 2:
+                raise RuntimeError("chunk failed")
+            return original(repo, checkins)
+
+        with mock.patch.object(self.settings, "checkin_batch_chunk_size", 2), \
+                mock.patch.object(self.repository.ApiRepository, "insert_event_checkins", failing_second_chunk):
+            status, results = self._batch(items)
+
+        self.assertEqual(status, 200)
+        self.assertEqual([result["status_code"] for result in results], [200, 200, 500, 500, 200])
+        self.assertEqual(self._count_checkins(), 1 + 3)
+
+    def test_invalid_body(self):
+        self.assertEqual(self._batch([])[0], 400)
+        self.assertEqual(self._batch([{"event_code": "E1"}])[0], 400)
+        self.assertEqual(self._batch([{"event_code": "E1", "phone": 1012345678}])[0], 400)
+        self.assertEqual(self._batch([{"event_code": None, "phone": self.PHONES[0]}])[0], 400)
+        self.assertEqual(self._batch(["E1"])[0], 400)
+        with mock.patch.object(self.settings, "checkin_batch_max_items", 2):
+            self.assertEqual(self._batch([{"event_code": "E1", "phone": p} for p in self.PHONES[:3]])[0], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,389 @@
+"""
+api_handler 컨테이너 캐시 테스트.
+
+- TTLCache: 크기 상한/LRU 축출/TTL 만료/히트·미스 카운터 (가짜 시계)
+- ApiRepository.get_event: TTL 안에서는 DB를 타지 않고, TTL이 지나면 updated_at으로
+  재검증해서 관리자 수정이 TTL 안에 반영되어야 한다.
+- SnapshotIndex(조직 slug): 전체를 한 번에 적재하고, 모르는 slug는 negative 캐시로
+  DB에 닿지 않게 한다. /checkin/info의 모르는 slug는 404여야 한다.
+- RosterCache: 로스터에 없는 phone은 거절 전에 전체 재적재(이벤트당 miss_refresh_seconds에
+  한 번)로 다시 확인해서, 이벤트 도중 추가된 등록이 늦게 커밋돼도 404를 받지 않아야 한다.
+  Bloom 모드에서도 거짓 음성은 없어야 하고, 용량을 넘기면 다시 만들어야 한다.
+"""
+import hashlib
+from collections import namedtuple
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, StatementCounter, create_test_engine, load_handler, use_test_sessions
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_mod = load_handler("api_handler", "cache")
+        self.clock = FakeClock()
+        self.cache = self.cache_mod.TTLCache(max_size=2, ttl_seconds=30, clock=self.clock)
+
+    def test_entry_expires_after_ttl(self):
+        self.cache.put("a", 1)
+        self.assertTrue(self.cache.is_fresh(self.cache.get_entry("a")))
+        self.clock.now += 30
+        entry = self.cache.get_entry("a")
+        self.assertIsNotNone(entry, "만료된 항목도 재검증을 위해 남아 있어야 한다")
+        self.assertFalse(self.cache.is_fresh(entry))
+
+    def test_touch_extends_ttl(self):
+        self.cache.put("a", 1)
+        self.clock.now += 40
+        self.cache.touch("a")
+        self.assertTrue(self.cache.is_fresh(self.cache.get_entry("a")))
+
+    def test_lru_eviction(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.get_entry("a")
+        self.cache.put("c", 3)
+        self.assertIsNone(self.cache.get_entry("b"))
+        self.assertIsNotNone(self.cache.get_entry("a"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_disabled_when_ttl_zero(self):
+        self.assertFalse(self.cache_mod.TTLCache(max_size=10, ttl_seconds=0).enabled)
+
+
+class SnapshotIndexTest(unittest.TestCase):
+    def setUp(self):
+        cache_mod = load_handler("api_handler", "cache")
+        self.clock = FakeClock()
+        self.loads = 0
+        self.rows = {"awskrug": "AWSKRUG"}
+        self.index = cache_mod.SnapshotIndex(
+            refresh_seconds=300, negative_ttl_seconds=60, miss_reload_seconds=30, clock=self.clock
+        )
+
+    def _loader(self):
+        self.loads += 1
+        return dict(self.rows)
+
+    def test_known_key_loaded_once(self):
+        for _ in range(5):
+            self.assertEqual(self.index.get("awskrug", self._loader), "AWSKRUG")
+        self.assertEqual(self.loads, 1)
+
+    def test_unknown_key_is_negatively_cached(self):
+        self.index.get("awskrug", self._loader)
+        for _ in range(5):
+            self.clock.now += 10
+            self.assertIsNone(self.index.get("nope", self._loader))
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.index.stats()["negative_hits"], 4)
+
+    def test_new_row_visible_after_miss_reload(self):
+        self.index.get("awskrug", self._loader)
+        self.rows["ausg"] = "AUSG"
+        self.assertIsNone(self.index.get("ausg", self._loader))
+        self.clock.now += 60
+        self.assertEqual(self.index.get("ausg", self._loader), "AUSG")
+        self.assertEqual(self.loads, 2)
+
+    def test_periodic_refresh(self):
+        self.index.get("awskrug", self._loader)
+        self.rows["awskrug"] = "RENAMED"
+        self.clock.now += 300
+        self.assertEqual(self.index.get("awskrug", self._loader), "RENAMED")
+
+
+RegistrationRow = namedtuple("RegistrationRow", ["phone", "created_at"])
+
+
+def _hashed(n: int) -> str:
+    return hashlib.sha256(f"phone-{n}".encode()).hexdigest()
+
+
+class RosterCacheTest(unittest.TestCase):
+    def setUp(self):
+        roster_mod = load_handler("api_handler", "roster")
+        self.clock = FakeClock()
+        self.base = datetime(2026, 10, 18, 19, 0, 0)
+        self.rows = [RegistrationRow(_hashed(n), self.base) for n in range(100)]
+        self.calls = []
+        self.roster_mod = roster_mod
+        self.cache = roster_mod.RosterCache(refresh_seconds=10, overlap_seconds=300, clock=self.clock)
+
+    def _loader(self, event_code, since):
+        self.calls.append(since)
+        return [row for row in self.rows if since is None or row.created_at >= since]
+
+    def test_unknown_phone_rejected_without_reload(self):
+        self.assertTrue(self.cache.might_be_registered("E1", _hashed(1), self._loader))
+        for _ in range(5):
+            self.assertFalse(self.cache.might_be_registered("E1", _hashed(999), self._loader))
+        self.assertEqual(self.calls, [None])
+        self.assertEqual(self.cache.stats()["rejections"], 5)
+
+    def test_registration_added_during_event_visible_after_refresh(self):
+        self.cache.might_be_registered("E1", _hashed(1), self._loader)
+        # 업로드 트랜잭션이 워터마크보다 이른 created_at으로 늦게 커밋된 경우
+        self.rows.append(RegistrationRow(_hashed(500), self.base - timedelta(seconds=30)))
+        self.assertFalse(self.cache.might_be_registered("E1", _hashed(500), self._loader))
+
+        self.clock.now += 10
+        self.assertTrue(self.cache.might_be_registered("E1", _hashed(500), self._loader))
+        self.assertEqual(self.calls[-1], self.base - timedelta(seconds=300))
+
+    def test_miss_refreshes_before_rejecting(self):
+        self.cache.might_be_registered("E1", _hashed(1), self._loader)
+        self.rows.append(RegistrationRow(_hashed(500), self.base + timedelta(seconds=5)))
+
+        # refresh_seconds(10)가 지나기 전이라도 miss면 전체를 다시 읽고 판단한다.
+        self.clock.now += self.cache.miss_refresh_seconds
+        self.assertTrue(self.cache.might_be_registered("E1", _hashed(500), self._loader))
+        self.assertEqual(self.calls, [None, None])
+
+        # 갱신 직후의 miss는 다시 읽지 않고 거절한다.
+        for _ in range(5):
+            self.assertFalse(self.cache.might_be_registered("E1", _hashed(999), self._loader))
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.cache.stats()["miss_refreshes"], 1)
+
+    def test_commit_older_than_overlap_is_found_on_miss(self):
+        self.cache.might_be_registered("E1", _hashed(1), self._loader)
+        # 워터마크 - overlap보다 먼저 시작한 업로드가 이제야 커밋됐다. 증분 갱신으로는 못 읽는다.
+        self.rows.append(RegistrationRow(_hashed(500), self.base - timedelta(seconds=400)))
+        self.clock.now += 10
+        self.cache.might_be_registered("E1", _hashed(1), self._loader)
+        self.assertEqual(self.calls[-1], self.base - timedelta(seconds=300))
+
+        self.clock.now += self.cache.miss_refresh_seconds
+        self.assertTrue(self.cache.might_be_registered("E1", _hashed(500), self._loader))
+        self.assertIsNone(self.calls[-1])
+
+    def test_bloom_filter_is_rebuilt_past_capacity(self):
+        cache = self.roster_mod.RosterCache(refresh_seconds=10, bloom_threshold=10, clock=self.clock)
+        cache.might_be_registered("E1", _hashed(1), self._loader)
+        roster = cache._rosters.get_entry("E1").value
+        self.assertEqual(roster.capacity, 200)
+
+        # 증분으로 용량(200)을 넘긴 뒤의 정기 갱신은 전체를 다시 읽어 필터를 새로 만든다.
+        self.rows += [RegistrationRow(_hashed(n), self.base + timedelta(seconds=1)) for n in range(100, 400)]
+        self.clock.now += 10
+        cache.might_be_registered("E1", _hashed(1), self._loader)
+        self.assertTrue(cache._rosters.get_entry("E1").value.over_capacity)
+        self.clock.now += 10
+        cache.might_be_registered("E1", _hashed(1), self._loader)
+        rebuilt = cache._rosters.get_entry("E1").value
+        self.assertEqual((rebuilt.capacity, cache.stats()["rebuilds"], self.calls[-1]), (800, 1, None))
+        false_positives = sum(
+            cache.might_be_registered("E1", _hashed(n), self._loader) for n in range(1000, 3000)
+        )
+        self.assertLess(false_positives, 20)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        cache = self.roster_mod.RosterCache(refresh_seconds=10, bloom_threshold=10, clock=self.clock)
+        for n in range(100):
+            self.assertTrue(cache.might_be_registered("E1", _hashed(n), self._loader))
+        false_positives = sum(
+            cache.might_be_registered("E1", _hashed(n), self._loader) for n in range(1000, 3000)
+        )
+        self.assertLess(false_positives, 20)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class EventCacheRepositoryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.repository = load_handler("api_handler", "repository")
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event
+
+        self.clock = FakeClock()
+        patcher = mock.patch.object(self.repository.event_cache, "_clock", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository.event_cache.clear()
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        self.Session = sessionmaker(bind=self.engine)
+        now = datetime.now()
+        with self.Session() as session:
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=1), "1", "AWSKRUG"))
+            session.commit()
+
+    def _get_event(self):
+        with self.Session() as session, StatementCounter(self.engine) as counter:
+            event = self.repository.ApiRepository(session).get_event("E1")
+        return event, counter.count
+
+    def test_hit_within_ttl_skips_database(self):
+        _, first = self._get_event()
+        event, second = self._get_event()
+        self.assertEqual((first, second), (1, 0))
+        self.assertEqual(event.organization_code, "AWSKRUG")
+        stats = self.repository.event_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_unchanged_event_is_revalidated_after_ttl(self):
+        self._get_event()
+        self.clock.now += self.repository.event_cache.ttl_seconds
+        _, statements = self._get_event()
+        self.assertEqual(statements, 1)
+        self.assertEqual(self.repository.event_cache.stats()["revalidations"], 1)
+
+    def test_admin_update_is_visible_after_ttl(self):
+        from model import Event
+
+        self._get_event()
+        extended = datetime.now() + timedelta(days=1)
+        with self.Session() as session:
+            event = session.query(Event).filter_by(event_code="E1").first()
+            event.code_expired_at = extended
+            session.commit()
+
+        stale, _ = self._get_event()
+        self.assertNotEqual(stale.code_expired_at, extended)
+
+        self.clock.now += self.repository.event_cache.ttl_seconds
+        fresh, statements = self._get_event()
+        self.assertEqual(fresh.code_expired_at, extended)
+        self.assertEqual(statements, 2)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class RosterCacheCheckinTest(unittest.TestCase):
+    PHONE = "010-1234-5678"
+    LATE_PHONE = "010-5555-0000"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.repository = load_handler("api_handler", "app", "repository")
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event, EventRegistration
+        from hash_tool import hash_phone_number
+
+        self.clock = FakeClock()
+        for patcher in (
+            mock.patch.multiple(self.settings, salt="test-salt", checkin_mode="orm"),
+            mock.patch.object(self.repository.roster_cache, "refresh_seconds", 60),
+            mock.patch.object(self.repository.roster_cache, "_clock", self.clock),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.repository.event_cache.clear()
+        self.repository.roster_cache.clear()
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+        self.Session = sessionmaker(bind=self.engine)
+        now = datetime.now()
+        with self.Session() as session:
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            session.add(EventRegistration.create("E1", hash_phone_number(self.PHONE.replace("-", "")), "홍길동"))
+            session.commit()
+        use_test_sessions(self, self.Session)
+
+    def _check(self, phone):
+        import json
+        return self.app.lambda_handler({
+            "httpMethod": "POST", "path": "/check", "body": json.dumps({"event_code": "E1", "phone": phone})
+        }, None)["statusCode"]
+
+    def test_registration_uploaded_after_warm_up_can_check_in(self):
+        from model import EventRegistration
+        from hash_tool import hash_phone_number
+
+        self.assertEqual(self._check(self.PHONE), 200)
+        self.assertEqual(self.repository.roster_cache.stats()["loads"], 1)
+
+        # csv_handler가 이벤트 도중 등록자를 올린다(refresh_seconds는 아직 지나지 않음).
+        with self.Session() as session:
+            session.add(EventRegistration.create("E1", hash_phone_number(self.LATE_PHONE.replace("-", "")), "김철수"))
+            session.commit()
+        self.clock.now += self.repository.roster_cache.miss_refresh_seconds
+
+        self.assertEqual(self._check(self.LATE_PHONE), 200)
+        self.assertEqual(self.repository.roster_cache.stats()["miss_refreshes"], 1)
+
+        # 방금 갱신한 로스터로는 DB 없이 거절한다.
+        with StatementCounter(self.engine) as counter:
+            self.assertEqual(self._check("010-9999-9999"), 404)
+        self.assertEqual(counter.count, 0)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class CheckinInfoUnknownSlugTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.repository = load_handler("api_handler", "app", "repository")
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import EventOrganization
+        import settings as settings_mod
+
+        self.repository.organization_index.clear()
+        Session = sessionmaker(bind=self.engine)
+        with Session() as session:
+            session.query(EventOrganization).delete()
+            organization = EventOrganization.create("AWSKRUG", "AWSKRUG", "logo", ["1"])
+            organization.slug = "awskrug"
+            session.add(organization)
+            session.commit()
+
+        use_test_sessions(self, Session)
+        patcher = mock.patch.object(settings_mod.settings, "salt", "test-salt")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _info(self, slug):
+        return self.app.lambda_handler({
+            "httpMethod": "GET",
+            "path": "/checkin/info",
+            "queryStringParameters": {"phone": "010-1234-5678", "slug": slug},
+        }, None)
+
+    def test_unknown_slug_returns_404_without_database(self):
+        self.assertEqual(self._info("awskrug")["statusCode"], 200)
+        with StatementCounter(self.engine) as counter:
+            response = self._info("unknown-bot-slug")
+            self.assertEqual(response["statusCode"], 404)
+            self.assertEqual(self._info("unknown-bot-slug")["statusCode"], 404)
+        # 인덱스는 이미 적재돼 있으므로 모르는 slug는 DB에 닿지 않는다.
+        self.assertEqual(counter.count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+POST /check 체크인 모드 동등성 테스트.
+
+CHECKIN_MODE=single_statement는 이벤트 검증(Event.validate_event)을 SQL에서도 한 번 더
+걸러서 한 문장으로 끝낸다. 두 경로의 규칙이 어긋나지 않도록 같은 경우(정상, 중복, 미등록,
+만료, 기본 이벤트, 없는 이벤트)를 두 모드에서 돌려 응답과 남은 행이 같은지 본다.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, create_test_engine, load_handler, use_test_sessions
+
+PHONE = "010-1234-5678"
+UNREGISTERED_PHONE = "010-0000-0000"
+
+# (이름, event_code, phone, 같은 요청을 보낼 횟수, 마지막 응답의 기대 상태 코드)
+CASES = (
+    ("normal", "E1", PHONE, 1, 200),
+    ("duplicate", "E1", PHONE, 2, 400),
+    ("unregistered", "E1", UNREGISTERED_PHONE, 1, 404),
+    ("expired", "EXPIRED", PHONE, 1, 400),
+    ("default_event", "test", PHONE, 1, 400),
+    ("missing_event", "NOPE", PHONE, 1, 400),
+)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class CheckinModeParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.repository = load_handler("api_handler", "app", "repository")
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+
+        patcher = mock.patch.multiple(self.settings, salt="test-salt", checkin_mode="orm")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.Session = sessionmaker(bind=self.engine)
+        use_test_sessions(self, self.Session)
+
+    def _reset(self):
+        from model import Base, Event, EventCheckIn, EventRegistration
+        from hash_tool import hash_phone_number
+
+        self.repository.event_cache.clear()
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        now = datetime.now()
+        hashed_phone = hash_phone_number(PHONE.replace("-", ""))
+        with self.Session() as session:
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            session.add(Event.create("EXPIRED", now - timedelta(days=1), "old", now - timedelta(minutes=1), "1", "AWSKRUG"))
+            session.add(Event.create("test", now, "default", now + timedelta(hours=2), "1", "AWSKRUG"))
+            for event_code in ("E1", "EXPIRED", "test"):
+                session.add(EventRegistration.create(event_code, hashed_phone, "홍길동"))
+            session.add(EventCheckIn(
+                phone=hashed_phone, event_code="E0", name="홍길동",
+                checked_at=now - timedelta(days=3), event_version="1", organization_code="AWSKRUG",
+            ))
+            session.commit()
+
+    def _rows(self) -> list[tuple]:
+        from sqlalchemy import text
+        with self.engine.connect() as conn:
+            return [
+                tuple(row) for row in conn.execute(text(
+                    "SELECT event_code, name, event_version, organization_code FROM event_check_in ORDER BY event_code"
+                ))
+            ]
+
+    def _run_case(self, mode: str, event_code: str, phone: str, times: int) -> tuple:
+        self._reset()
+        self.settings.checkin_mode = mode
+        event = {"httpMethod": "POST", "path": "/check", "body": json.dumps({"event_code": event_code, "phone": phone})}
+        for _ in range(times):
+            response = self.app.lambda_handler(event, None)
+        return response["statusCode"], json.loads(response["body"]), self._rows()
+
+    def test_modes_agree(self):
+        for name, event_code, phone, times, expected_status in CASES:
+            with self.subTest(case=name):
+                orm = self._run_case("orm", event_code, phone, times)
+                single = self._run_case("single_statement", event_code, phone, times)
+                self.assertEqual(orm[0], expected_status, orm[1])
+                self.assertEqual(single, orm)
+
+    def test_validate_event_uses_given_clock(self):
+        from model import DEFAULT_EVENT_CODE, Event
+        from exceptions.domain_exception import DefaltEventException, EventRegistrationException
+
+        expires = datetime(2026, 5, 1, 22, 0)
+        Event(event_code="E1", code_expired_at=expires).validate_event(now=expires)
+        with self.assertRaises(EventRegistrationException):
+            Event(event_code="E1", code_expired_at=expires).validate_event(now=expires + timedelta(microseconds=1))
+        with self.assertRaises(DefaltEventException):
+            Event(event_code=DEFAULT_EVENT_CODE, code_expired_at=expires).validate_event(now=expires)
+
+
+if __name__ == "__main__":
+    unittest.main()
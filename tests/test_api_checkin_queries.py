@@ -0,0 +1,126 @@
+"""
+api_handler 요청당 SQL 문장 수 회귀 테스트.
+
+/check와 /checkin/info는 같은 phone의 event_check_in 행에서 카운트 4종(+버전별 카운트)을
+뽑는다. 카운트마다 COUNT 쿼리를 따로 날리면 요청당 왕복이 늘어나므로, 집계는 한 번의
+조건부 집계(COUNT(*) FILTER) 쿼리로 끝나야 한다.
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, StatementCounter, create_test_engine, load_handler, use_test_sessions
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class ApiCheckinQueryCountTest(unittest.TestCase):
+    PHONE = "010-1234-5678"
+    BACKEND = "orm"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.container_mod, cls.schema, cls.exception, cls.repository = load_handler(
+            "api_handler", "container", "schema", "exception", "repository"
+        )
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event, EventCheckIn, EventOrganization, EventRegistration
+        from hash_tool import hash_phone_number
+
+        patcher = mock.patch.multiple(
+            self.settings, salt="test-salt", checkin_mode="orm", api_repository_backend=self.BACKEND
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository.event_cache.clear()
+        self.repository.organization_index.clear()
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        self.Session = sessionmaker(bind=self.engine)
+        use_test_sessions(self, self.Session)
+        now = datetime.now()
+        self.hashed_phone = hash_phone_number(self.PHONE.replace("-", ""))
+        with self.Session() as session:
+            organization = EventOrganization.create("AWSKRUG", "AWSKRUG", "logo", ["1"])
+            organization.slug = "awskrug"
+            session.add(organization)
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            session.add(EventRegistration.create("E1", self.hashed_phone, "홍길동"))
+            session.add(EventCheckIn(
+                phone=self.hashed_phone, event_code="E0", name="홍길동",
+                checked_at=now - timedelta(days=400), event_version="1", organization_code="AWSKRUG",
+            ))
+            session.add(EventCheckIn(
+                phone=self.hashed_phone, event_code="X1", name="홍길동",
+                checked_at=now, event_version="2", organization_code="OTHER",
+            ))
+            session.commit()
+
+    def _run(self, fn):
+        from db_connection import run_transaction
+
+        with StatementCounter(self.engine) as counter:
+            result = run_transaction(lambda session: fn(self.container_mod.ApiContainer(session).service))
+        return result, counter.count
+
+    def test_checkin_info_uses_single_count_query(self):
+        result, statements = self._run(
+            lambda service: service.get_checkin_count_info(self.hashed_phone, "awskrug")
+        )
+        # 조직 slug 조회 1 + 카운트 집계 1
+        self.assertEqual(statements, 2)
+        self.assertEqual(result, self.schema.CheckinCountResponse(
+            this_year_count=1,
+            this_year_by_organization_count=0,
+            all_count=2,
+            all_by_organization_count=1,
+        ))
+
+    def test_check_attendance_statement_count(self):
+        request = self.schema.CheckInRequest(event_code="E1", phone=self.PHONE)
+        result, statements = self._run(lambda service: service.check_attendance(request))
+        # 이벤트 1 + 등록 1 + INSERT ON CONFLICT 1 + 카운터 증가 1 + 카운트 집계 1
+        self.assertEqual(statements, 5)
+        self.assertEqual(result.count, 2)
+        self.assertEqual(result.checkin_count_info.all_count, 3)
+        self.assertEqual(result.checkin_count_info.this_year_by_organization_count, 1)
+
+    def test_single_statement_mode_uses_one_statement(self):
+        self.settings.checkin_mode = "single_statement"
+        request = self.schema.CheckInRequest(event_code="E1", phone=self.PHONE)
+        result, statements = self._run(lambda service: service.check_attendance(request))
+        self.assertEqual(statements, 1)
+        self.assertEqual(result.count, 2)
+        self.assertEqual(result.checkin_count_info.all_count, 3)
+
+    def test_already_checked_reports_version_count(self):
+        request = self.schema.CheckInRequest(event_code="E1", phone=self.PHONE)
+        self._run(lambda service: service.check_attendance(request))
+        with self.assertRaises(self.exception.AlreadyCheckedException) as ctx:
+            self._run(lambda service: service.check_attendance(request))
+        self.assertIn("2회", ctx.exception.message)
+
+
+class CoreApiCheckinQueryCountTest(ApiCheckinQueryCountTest):
+    """API_REPOSITORY_BACKEND=core도 같은 응답을 같은 문장 수로 만들어야 한다."""
+    BACKEND = "core"
+
+    def test_core_backend_is_used(self):
+        from sqlalchemy.orm import Session
+        container = self.container_mod.ApiContainer(Session())
+        self.assertEqual(type(container.repository).__name__, "CoreApiRepository")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+동시 체크인(연타) 테스트.
+
+같은 phone의 /check가 동시에 들어와도 정확히 하나만 성공하고 나머지는 모두
+AlreadyCheckedException(400)이어야 한다. (phone, event_code) PK 충돌이 500으로
+새어 나가면 안 된다.
+"""
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, create_test_engine, load_handler, use_test_sessions
+
+
+class _OccConflict(Exception):
+    sqlstate = "OC000"
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class ConcurrentCheckinTest(unittest.TestCase):
+    PHONE = "010-1234-5678"
+    WORKERS = 8
+
+    @classmethod
+    def setUpClass(cls):
+        cls.container_mod, cls.schema, cls.exception, cls.repository = load_handler(
+            "api_handler", "container", "schema", "exception", "repository"
+        )
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event, EventRegistration
+        from hash_tool import hash_phone_number
+
+        patcher = mock.patch.multiple(self.settings, salt="test-salt", checkin_mode="orm")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository.event_cache.clear()
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        self.Session = sessionmaker(bind=self.engine)
+        use_test_sessions(self, self.Session)
+        now = datetime.now()
+        self.hashed_phone = hash_phone_number(self.PHONE.replace("-", ""))
+        with self.Session() as session:
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            session.add(EventRegistration.create("E1", self.hashed_phone, "홍길동"))
+            session.commit()
+
+    def _check(self, barrier=None):
+        from db_connection import run_transaction
+
+        request = self.schema.CheckInRequest(event_code="E1", phone=self.PHONE)
+
+        def work(session):
+            service = self.container_mod.ApiContainer(session).service
+            if barrier:
+                barrier.wait()
+            return service.check_attendance(request)
+
+        try:
+            return run_transaction(work)
+        except self.exception.AlreadyCheckedException as e:
+            return e
+
+    def _run_concurrently(self):
+        barrier = threading.Barrier(self.WORKERS)
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            return list(pool.map(lambda _: self._check(barrier), range(self.WORKERS)))
+
+    def _assert_one_winner(self, results):
+        successes = [r for r in results if isinstance(r, self.schema.CheckinResponse)]
+        duplicates = [r for r in results if isinstance(r, self.exception.AlreadyCheckedException)]
+        self.assertEqual(len(successes), 1, results)
+        self.assertEqual(len(duplicates), self.WORKERS - 1, results)
+        for duplicate in duplicates:
+            self.assertIn("1회", duplicate.message)
+
+    def test_concurrent_double_tap_orm_mode(self):
+        self._assert_one_winner(self._run_concurrently())
+
+    def test_concurrent_double_tap_single_statement_mode(self):
+        self.settings.checkin_mode = "single_statement"
+        self._assert_one_winner(self._run_concurrently())
+
+    def test_occ_commit_failure_is_retried_as_already_checked(self):
+        """
+        DSQL: 두 트랜잭션이 모두 INSERT에 성공하고 늦게 commit한 쪽이 OCC로 실패하는 경우.
+        run_transaction이 전체를 다시 실행하면 ON CONFLICT가 중복을 판정해야 한다.
+        """
+        import db_connection
+        from sqlalchemy.exc import OperationalError
+        from sqlalchemy.orm import Session
+
+        self.assertIsInstance(self._check(), self.schema.CheckinResponse)
+
+        real_commit = Session.commit
+        calls = {"n": 0}
+
+        def commit_with_conflict(session):
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise OperationalError("COMMIT", {}, _OccConflict())
+            return real_commit(session)
+
+        # 첫 시도에서는 앞선 체크인이 아직 보이지 않았던 것처럼 INSERT가 성공한다.
+        real_insert = self.repository.ApiRepository.insert_event_checkin
+        inserts = {"n": 0}
+
+        def insert_unaware_of_winner(repo, checkin):
+            inserts["n"] += 1
+            return True if inserts["n"] == 1 else real_insert(repo, checkin)
+
+        with mock.patch.object(Session, "commit", commit_with_conflict), \
+                mock.patch.object(self.repository.ApiRepository, "insert_event_checkin", insert_unaware_of_winner), \
+                mock.patch.object(db_connection, "_backoff_seconds", return_value=0):
+            result = self._check()
+
+        self.assertIsInstance(result, self.exception.AlreadyCheckedException)
+        self.assertIn("1회", result.message)
+        self.assertEqual(inserts["n"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+POST /check Idempotency-Key 테스트.
+
+같은 키로 다시 온 요청은 체크인을 다시 하지 않고 처음 응답을 그대로 받아야 한다.
+같은 키에 다른 본문이면 422, 키가 없으면 기존처럼 두 번째 요청은 이미 체크인됨(400)이다.
+컨테이너 LRU는 커밋된 응답만 담는다.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, StatementCounter, create_test_engine, load_handler, use_test_sessions
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class CheckinIdempotencyTest(unittest.TestCase):
+    PHONE = "010-1234-5678"
+    OTHER_PHONE = "010-8765-4321"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.repository = load_handler("api_handler", "app", "repository")
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event, EventRegistration
+        from hash_tool import hash_phone_number
+
+        patcher = mock.patch.multiple(self.settings, salt="test-salt", checkin_mode="orm")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository.event_cache.clear()
+        self.repository.idempotency_cache.clear()
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        Session = sessionmaker(bind=self.engine)
+        now = datetime.now()
+        with Session() as session:
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            for phone in (self.PHONE, self.OTHER_PHONE):
+                session.add(EventRegistration.create("E1", hash_phone_number(phone.replace("-", "")), "홍길동"))
+            session.commit()
+        use_test_sessions(self, Session)
+
+    def _check(self, phone=PHONE, key=None):
+        event = {"httpMethod": "POST", "path": "/check", "body": json.dumps({"event_code": "E1", "phone": phone})}
+        if key is not None:
+            event["headers"] = {"idempotency-key": key}
+        response = self.app.lambda_handler(event, None)
+        return response["statusCode"], json.loads(response["body"])
+
+    def _count(self, table: str) -> int:
+        from sqlalchemy import text
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+    def test_replay_returns_original_response(self):
+        first = self._check(key="k1")
+        self.assertEqual(first[0], 200)
+
+        with StatementCounter(self.engine) as counter:
+            self.assertEqual(self._check(key="k1"), first)
+        self.assertEqual(counter.count, 0)
+        self.assertEqual(self._count("event_check_in"), 1)
+        self.assertEqual(self._count("idempotency_record"), 1)
+
+    def test_replay_from_db_after_cache_miss(self):
+        first = self._check(key="k1")
+        # 다른 컨테이너로 재시도가 간 경우
+        self.repository.idempotency_cache.clear()
+
+        self.assertEqual(self._check(key="k1"), first)
+        self.assertEqual(self._count("event_check_in"), 1)
+
+    def test_key_reuse_with_different_body_is_rejected(self):
+        self.assertEqual(self._check(key="k1")[0], 200)
+        status, _ = self._check(phone=self.OTHER_PHONE, key="k1")
+        self.assertEqual(status, 422)
+        self.assertEqual(self._count("event_check_in"), 1)
+
+    def test_without_key_second_check_is_already_checked(self):
+        self.assertEqual(self._check()[0], 200)
+        self.assertEqual(self._check()[0], 400)
+        self.assertEqual(self._check(key="k1")[0], 400)
+        self.assertEqual(self._count("idempotency_record"), 0)
+
+    def test_invalid_key_is_rejected(self):
+        self.assertEqual(self._check(key="")[0], 400)
+        self.assertEqual(self._check(key="x" * 256)[0], 400)
+        self.assertEqual(self._count("event_check_in"), 0)
+
+    def test_expired_record_is_ignored(self):
+        from sqlalchemy import text
+        self.assertEqual(self._check(key="k1")[0], 200)
+        self.repository.idempotency_cache.clear()
+        with self.engine.begin() as conn:
+            conn.execute(text("UPDATE idempotency_record SET expires_at = now() - interval '1 second'"))
+
+        # 기록이 만료되면 새 요청으로 처리되므로 이미 체크인됨이 된다.
+        self.assertEqual(self._check(key="k1")[0], 400)
+
+    def test_live_record_is_not_overwritten(self):
+        from sqlalchemy.orm import sessionmaker
+
+        first = self._check(key="k1")
+        self.assertEqual(first[0], 200)
+        with sessionmaker(bind=self.engine)() as session:
+            saved = self.repository.ApiRepository(session).save_idempotency_record("k1", "other-hash", "{}", datetime.now())
+            session.commit()
+        self.assertFalse(saved)
+
+        self.repository.idempotency_cache.clear()
+        self.assertEqual(self._check(key="k1"), first)
+
+    def test_concurrent_key_collision_rolls_back_the_loser(self):
+        # 두 요청이 같은 키로 동시에 재생 확인을 통과하고, 다른 쪽이 먼저 기록을 커밋한 경우
+        self.assertEqual(self._check(key="k1")[0], 200)
+        self.repository.idempotency_cache.clear()
+
+        original = self.repository.ApiRepository.get_idempotency_record
+        calls = []
+
+        def _first_misses(repo, key):
+            calls.append(key)
+            return None if len(calls) == 1 else original(repo, key)
+
+        with mock.patch.object(self.repository.ApiRepository, "get_idempotency_record", _first_misses):
+            status, _ = self._check(phone=self.OTHER_PHONE, key="k1")
+        self.assertEqual(status, 422)
+        self.assertEqual(self._count("event_check_in"), 1)
+        self.assertEqual(self._count("idempotency_record"), 1)
+
+    def test_cache_is_filled_only_after_commit(self):
+        from db_connection import run_transaction
+        from container import ApiContainer
+        from schema import CheckInRequest
+
+        request = CheckInRequest(event_code="E1", phone=self.PHONE)
+
+        def work(session):
+            ApiContainer(session).service.check_attendance_idempotent(request, "k1")
+            raise RuntimeError("commit 전 실패")
+
+        with self.assertRaises(RuntimeError):
+            run_transaction(work)
+        self.assertIsNone(self.repository.idempotency_cache.get_entry("k1"))
+        self.assertEqual(self._count("idempotency_record"), 0)
+
+        # 롤백된 시도 뒤 같은 키의 재시도는 처음부터 다시 처리된다.
+        self.assertEqual(self._check(key="k1")[0], 200)
+        self.assertIsNotNone(self.repository.idempotency_cache.get_entry("k1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+"""
+api_handler repository 쿼리 실행 계획 회귀 테스트.
+
+phone 단위 카운트 쿼리가 EXTRACT(YEAR FROM checked_at) 같은 인덱스를 못 타는 조건으로
+돌아가면 phone의 체크인 행을 전부 읽게 된다. 각 repository 메서드가 실제로 보내는 SQL을
+잡아서 enable_seqscan=off로 EXPLAIN했을 때
+
+- Seq Scan이 남아 있거나(맞는 인덱스가 없음)
+- Index Cond 없이 인덱스 전체를 훑는 스캔이 있으면
+
+실패한다. event_organization 전체를 읽는 slug 인덱스 적재(_load_organizations_by_slug)는
+의도된 전체 조회라 제외한다.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, create_test_engine, load_handler
+
+_INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+def _index_conds(plan: dict) -> list[str]:
+    conds = [plan["Index Cond"]] if "Index Cond" in plan else []
+    for child in plan.get("Plans", []):
+        conds.extend(_index_conds(child))
+    return conds
+
+
+def _bad_scans(plan: dict) -> list[str]:
+    problems = []
+    node_type = plan.get("Node Type")
+    relation = plan.get("Relation Name")
+    if node_type == "Seq Scan":
+        problems.append(f"Seq Scan on {relation}")
+    elif node_type in _INDEX_SCANS and "Index Cond" not in plan:
+        problems.append(f"{node_type} on {plan.get('Index Name')} without Index Cond")
+    for child in plan.get("Plans", []):
+        problems.extend(_bad_scans(child))
+    return problems
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class ApiRepositoryQueryPlanTest(unittest.TestCase):
+    PHONE = "hashed-phone"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.repository, cls.core_repository = load_handler("api_handler", "repository", "core_repository")
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from model import Base, Event, EventCheckIn, EventOrganization, EventRegistration
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        from sqlalchemy.orm import Session
+        now = datetime.now()
+        with Session(self.engine) as session:
+            organization = EventOrganization.create("AWSKRUG", "AWSKRUG", "logo", ["1"])
+            organization.slug = "awskrug"
+            session.add(organization)
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            session.add(EventRegistration.create("E1", self.PHONE, "홍길동"))
+            session.add(EventCheckIn(
+                phone=self.PHONE, event_code="E0", name="홍길동",
+                checked_at=now - timedelta(days=400), event_version="1", organization_code="AWSKRUG",
+            ))
+            session.commit()
+
+        # 캐시를 끄고 매번 DB에서 읽게 한다.
+        for patcher in (
+            mock.patch.object(self.repository.event_cache, "ttl_seconds", 0),
+            mock.patch.object(self.repository.organization_index, "refresh_seconds", 0),
+            mock.patch.object(self.repository.idempotency_cache, "ttl_seconds", 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _calls(self, repo):
+        from model import EventCheckIn
+        now = datetime.now()
+        checkin = EventCheckIn(
+            phone="other-phone", event_code="E1", name="임꺽정",
+            checked_at=now, event_version="1", organization_code="AWSKRUG",
+        )
+        return {
+            "get_event_registration": lambda: repo.get_event_registration("E1", self.PHONE),
+            "get_registration_phones": lambda: repo.get_registration_phones("E1"),
+            "get_registration_phones(since)": lambda: repo.get_registration_phones("E1", now - timedelta(minutes=2)),
+            "get_event": lambda: repo.get_event("E1"),
+            "_load_event_updated_at": lambda: repo._load_event_updated_at("E1"),
+            "get_event_checkin": lambda: repo.get_event_checkin(self.PHONE, "E0"),
+            "get_all_event_checkin": lambda: repo.get_all_event_checkin(self.PHONE, "AWSKRUG", "1"),
+            "get_this_year_checkin": lambda: repo.get_this_year_checkin(self.PHONE),
+            "get_this_year_checkin_by_organization": lambda: repo.get_this_year_checkin_by_organization(self.PHONE, "AWSKRUG"),
+            "get_all_checkin": lambda: repo.get_all_checkin(self.PHONE),
+            "get_all_checkin_by_organization": lambda: repo.get_all_checkin_by_organization(self.PHONE, "AWSKRUG"),
+            "get_checkin_counts": lambda: repo.get_checkin_counts(self.PHONE, "AWSKRUG", "1"),
+            "get_checkin_counts_from_counter": lambda: repo.get_checkin_counts_from_counter(self.PHONE, "AWSKRUG", "1"),
+            "get_organization_by_slug": lambda: repo.get_organization_by_slug("awskrug"),
+            "get_active_event_codes": lambda: repo.get_active_event_codes(now, 8),
+            "get_idempotency_record": lambda: repo.get_idempotency_record("k1"),
+            "check_in_with_counts": lambda: repo.check_in_with_counts("E1", self.PHONE, now),
+            "check_in_with_counts(counter)": lambda: repo.check_in_with_counts("E1", self.PHONE, now, use_counter=True),
+            "insert_event_checkin": lambda: repo.insert_event_checkin(checkin),
+            "increment_checkin_counter": lambda: repo.increment_checkin_counter(checkin),
+            "get_event_registrations": lambda: repo.get_event_registrations([("E1", self.PHONE), ("E1", "other-phone")]),
+            "insert_event_checkins": lambda: repo.insert_event_checkins([checkin]),
+            "increment_checkin_counters": lambda: repo.increment_checkin_counters([checkin]),
+            "get_checkin_count_groups": lambda: repo.get_checkin_count_groups([self.PHONE, "other-phone"]),
+            "get_checkin_count_groups(counter)": lambda: repo.get_checkin_count_groups([self.PHONE], use_counter=True),
+        }
+
+    def _capture(self, session, call) -> list[tuple]:
+        from sqlalchemy import event
+
+        statements = []
+
+        def _on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        session.connection()  # 커넥션 초기화 문장이 잡히지 않도록 먼저 연결해 둔다.
+        event.listen(self.engine, "before_cursor_execute", _on_execute)
+        try:
+            call()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", _on_execute)
+        return statements
+
+    def _plan(self, session, statement: str, parameters) -> dict:
+        plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        plan = plan if isinstance(plan, list) else json.loads(plan)
+        return plan[0]["Plan"]
+
+    def _explain(self, session, statement: str, parameters) -> list[str]:
+        return _bad_scans(self._plan(session, statement, parameters))
+
+    def test_seq_scan_is_detected(self):
+        from sqlalchemy.orm import Session
+
+        with Session(self.engine) as session:
+            session.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+            self.assertEqual(
+                self._explain(session, "SELECT * FROM event_check_in WHERE name = %(name)s", {"name": "x"}),
+                ["Seq Scan on event_check_in"]
+            )
+
+    def test_repository_queries_use_indexes(self):
+        from sqlalchemy.orm import Session
+
+        for repository_class in (self.repository.ApiRepository, self.core_repository.CoreApiRepository):
+            with Session(self.engine) as session:
+                session.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+                repo = repository_class(session)
+                for name, call in self._calls(repo).items():
+                    statements = self._capture(session, call)
+                    self.assertTrue(statements, f"{name}이 SQL을 보내지 않음")
+                    for statement, parameters in statements:
+                        with self.subTest(backend=repository_class.__name__, method=name):
+                            self.assertEqual(self._explain(session, statement, parameters), [], statement)
+                session.rollback()
+
+    def test_this_year_counts_use_checked_at_range(self):
+        """올해 조건이 인덱스 범위(Index Cond)로 들어가야 phone의 과거 체크인을 읽지 않는다."""
+        from sqlalchemy import insert
+        from sqlalchemy.orm import Session
+        from model import EventCheckIn
+
+        # 행이 거의 없으면 플래너가 어느 인덱스를 골라도 비용이 같으므로, 오래 활동한
+        # 참석자처럼 과거 연도 체크인을 쌓고 통계를 갱신한다.
+        past = datetime.now() - timedelta(days=800)
+        with self.engine.begin() as conn:
+            conn.execute(insert(EventCheckIn), [
+                {
+                    "phone": self.PHONE, "event_code": f"OLD{i}", "name": "홍길동",
+                    "checked_at": past + timedelta(days=i), "event_version": "1", "organization_code": "AWSKRUG",
+                }
+                for i in range(300)
+            ])
+            conn.exec_driver_sql("ANALYZE event_check_in")
+
+        with Session(self.engine) as session:
+            session.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+            repo = self.repository.ApiRepository(session)
+            for name in ("get_this_year_checkin", "get_this_year_checkin_by_organization"):
+                for statement, parameters in self._capture(session, self._calls(repo)[name]):
+                    with self.subTest(method=name):
+                        conds = " ".join(_index_conds(self._plan(session, statement, parameters)))
+                        self.assertIn("checked_at", conds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+api_handler 워밍업 테스트.
+
+{"warmup": ...} 이벤트는 체크인을 만들지 않고 DB 커넥션과 이벤트/조직(/로스터) 캐시를
+채운 뒤 바로 돌아와야 한다. 워밍업 뒤 첫 체크인은 이벤트/조직 조회로 DB에 가지 않는다.
+db_connection.warm_up은 init 단계에서 커넥션을 열어 검증하고, 실패해도 예외를 올리지 않는다.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, StatementCounter, create_test_engine, load_handler, use_test_sessions
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class ApiWarmupEventTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.repository = load_handler("api_handler", "app", "repository")
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event, EventOrganization, EventRegistration
+
+        self.repository.event_cache.clear()
+        self.repository.organization_index.clear()
+        self.repository.roster_cache.clear()
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        Session = sessionmaker(bind=self.engine)
+        now = datetime.now()
+        with Session() as session:
+            organization = EventOrganization.create("AWSKRUG", "AWSKRUG", "logo", ["1"])
+            organization.slug = "awskrug"
+            session.add(organization)
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            session.add(Event.create("OLD", now - timedelta(days=7), "meetup", now - timedelta(days=7), "1", "AWSKRUG"))
+            session.add(EventRegistration.create("E1", "ab" * 32, "홍길동"))
+            session.commit()
+        use_test_sessions(self, Session)
+
+    def _warmup(self, payload=True):
+        response = self.app.lambda_handler({"warmup": payload}, None)
+        return response["statusCode"], json.loads(response["body"])
+
+    def test_warmup_primes_active_events_and_organizations(self):
+        with StatementCounter(self.engine) as counter:
+            status, body = self._warmup()
+        self.assertEqual(status, 200)
+        self.assertEqual(body["events"], ["E1"])
+        self.assertEqual(body["organizations"], 1)
+        self.assertGreater(counter.count, 0)
+
+        with self.engine.connect() as conn:
+            from sqlalchemy import text
+            self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM event_check_in")).scalar(), 0)
+
+        # 워밍업 뒤 이벤트와 조직은 캐시에서 나온다.
+        with StatementCounter(self.engine) as counter:
+            from db_connection import run_transaction
+            from container import ApiContainer
+            run_transaction(lambda session: ApiContainer(session).repository.get_event("E1"))
+            run_transaction(lambda session: ApiContainer(session).repository.get_organization_by_slug("awskrug"))
+        self.assertEqual(counter.count, 0)
+
+    def test_warmup_with_explicit_event_codes(self):
+        status, body = self._warmup({"event_codes": ["OLD", "missing"]})
+        self.assertEqual(status, 200)
+        self.assertEqual(body["events"], ["OLD"])
+
+    def test_warmup_loads_roster_when_enabled(self):
+        with mock.patch.object(self.repository.roster_cache, "refresh_seconds", 60):
+            self._warmup()
+        self.assertEqual(self.repository.roster_cache.stats()["loads"], 1)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class DbWarmUpTest(unittest.TestCase):
+    def setUp(self):
+        import db_connection as dbc
+        from sqlalchemy import create_engine, event
+
+        self.dbc = dbc
+        self.engine = create_engine(TEST_DATABASE_URL)
+        self.addCleanup(self.engine.dispose)
+        self.connects = []
+        event.listen(self.engine, "connect", lambda *args: self.connects.append(1))
+        for patcher in (
+            mock.patch.object(dbc, "_engine", self.engine),
+            mock.patch.object(dbc, "_SessionLocal", mock.Mock()),
+            mock.patch.object(dbc, "_dsql_client", mock.Mock()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_warm_up_opens_and_pools_a_connection(self):
+        self.assertTrue(self.dbc.warm_up())
+        self.assertEqual(len(self.connects), 1)
+        self.assertEqual(self.engine.pool.checkedin(), 1)
+
+    def test_warm_up_failure_is_not_raised(self):
+        with mock.patch.object(self.dbc, "init_engine", side_effect=RuntimeError("no network")):
+            self.assertFalse(self.dbc.warm_up())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+checkin_counter 롤업 테스트.
+
+카운터는 체크인 INSERT와 같은 트랜잭션에서 증가해야 하고, 카운터에서 읽은 카운트는
+event_check_in을 스캔한 결과와 같아야 한다. tools/checkin_counter.py의 rebuild/check는
+어긋난 카운터를 찾아 event_check_in 기준으로 되돌린다.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import REPO_ROOT, TEST_DATABASE_URL, create_test_engine, load_handler, use_test_sessions
+
+sys.path.insert(0, os.path.join(REPO_ROOT, "tools"))
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class CheckinCounterTest(unittest.TestCase):
+    PHONE = "010-1234-5678"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.container_mod, cls.schema, cls.repository = load_handler(
+            "api_handler", "container", "schema", "repository"
+        )
+        import checkin_counter
+        import settings as settings_mod
+        cls.tool = checkin_counter
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event, EventCheckIn, EventOrganization, EventRegistration
+        from hash_tool import hash_phone_number
+
+        patcher = mock.patch.multiple(
+            self.settings, salt="test-salt", checkin_mode="orm", checkin_count_source="scan"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository.event_cache.clear()
+        self.repository.organization_index.clear()
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        self.Session = sessionmaker(bind=self.engine)
+        use_test_sessions(self, self.Session)
+        now = datetime.now()
+        self.hashed_phone = hash_phone_number(self.PHONE.replace("-", ""))
+        with self.Session() as session:
+            organization = EventOrganization.create("AWSKRUG", "AWSKRUG", "logo", ["1"])
+            organization.slug = "awskrug"
+            session.add(organization)
+            for code in ("E1", "E2"):
+                session.add(Event.create(code, now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+                session.add(EventRegistration.create(code, self.hashed_phone, "홍길동"))
+            session.add(EventCheckIn(
+                phone=self.hashed_phone, event_code="E0", name="홍길동",
+                checked_at=now - timedelta(days=400), event_version="1", organization_code="AWSKRUG",
+            ))
+            session.commit()
+        self.tool.rebuild_checkin_counter()
+
+    def _check(self, event_code: str):
+        from db_connection import run_transaction
+        request = self.schema.CheckInRequest(event_code=event_code, phone=self.PHONE)
+        return run_transaction(lambda session: self.container_mod.ApiContainer(session).service.check_attendance(request))
+
+    def _info(self):
+        from db_connection import run_transaction
+        return run_transaction(
+            lambda session: self.container_mod.ApiContainer(session).service.get_checkin_count_info(self.hashed_phone, "awskrug")
+        )
+
+    def _mismatches(self):
+        with self.Session() as session:
+            return self.tool.find_counter_mismatches(session)
+
+    def test_counter_matches_scan_for_both_modes(self):
+        self._check("E1")
+        self.settings.checkin_mode = "single_statement"
+        self._check("E2")
+
+        self.assertEqual(self._mismatches(), [])
+        scan_info = self._info()
+        self.settings.checkin_count_source = "counter"
+        self.assertEqual(self._info(), scan_info)
+        self.assertEqual(scan_info.all_count, 3)
+
+    def test_counter_source_response_matches_scan(self):
+        scan_response = self._check("E1")
+        with self.engine.begin() as conn:
+            from sqlalchemy import text
+            conn.execute(text("DELETE FROM event_check_in WHERE event_code = 'E1'"))
+        self.tool.rebuild_checkin_counter()
+
+        self.settings.checkin_count_source = "counter"
+        self.settings.checkin_mode = "single_statement"
+        self.assertEqual(self._check("E1"), scan_response)
+
+    def test_check_detects_drift_and_rebuild_repairs_it(self):
+        self._check("E1")
+        with self.engine.begin() as conn:
+            from sqlalchemy import text
+            conn.execute(text("DELETE FROM event_check_in WHERE event_code = 'E0'"))
+
+        mismatches = self._mismatches()
+        self.assertEqual(len(mismatches), 1)
+        self.assertEqual((mismatches[0].expected, mismatches[0].actual), (0, 1))
+
+        self.assertEqual(self.tool.rebuild_checkin_counter([self.hashed_phone]), 1)
+        self.assertEqual(self._mismatches(), [])
+
+    def test_batches_are_bounded_by_rows(self):
+        from sqlalchemy import text
+
+        # phone 하나가 조직 3개 × 2년 = 카운터 6행으로 펼쳐진다.
+        now = datetime.now()
+        with self.engine.begin() as conn:
+            for p in range(4):
+                for organization_code in ("A", "B", "C"):
+                    for days in (0, 400):
+                        conn.execute(text(
+                            "INSERT INTO event_check_in (phone, event_code, name, checked_at, event_version, organization_code) "
+                            "VALUES (:phone, :event_code, 'n', :checked_at, '1', :organization_code)"
+                        ), {"phone": f"P{p}", "event_code": f"{organization_code}{days}",
+                            "checked_at": now - timedelta(days=days), "organization_code": organization_code})
+
+        executed = []
+        rebuild_phones = self.tool.rebuild_phones
+        with mock.patch.object(self.tool, "rebuild_phones",
+                               side_effect=lambda session, phones: executed.append(phones) or rebuild_phones(session, phones)):
+            self.assertEqual(self.tool.rebuild_checkin_counter(max_rows=13), 5)
+        # 새로 쓴 phone은 INSERT 6행씩, 기존 phone은 DELETE 2행 + INSERT 2행
+        self.assertEqual(executed, [["P0", "P1"], ["P2", "P3"], [self.hashed_phone]])
+        self.assertEqual(self._mismatches(), [])
+
+    def test_plan_batches_keeps_oversized_phone_alone(self):
+        self.assertEqual(
+            self.tool.plan_batches([("a", 2), ("b", 9), ("c", 1), ("d", 1)], max_rows=3),
+            [["a"], ["b"], ["c", "d"]]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+api_handler 콜드 스타트 import 회귀 테스트.
+
+체크인 경로는 SQLAlchemy와 common_layer만 쓰면 된다. boto3(+s3transfer)나 core 백엔드처럼
+필요할 때만 쓰는 모듈이 핸들러 import 시점에 다시 끌려오면 실패한다. 시간 예산은 CI에서
+tools/cold_start_profile.py가 검사한다.
+"""
+import os
+import sys
+import unittest
+
+from helpers import REPO_ROOT
+
+sys.path.insert(0, os.path.join(REPO_ROOT, "tools"))
+
+
+class ApiColdStartImportTest(unittest.TestCase):
+    def test_check_path_does_not_import_optional_modules(self):
+        import cold_start_profile
+
+        profile = cold_start_profile.profile_imports("api_handler")
+        loaded = profile.top_level_packages() | profile.modules
+        for module in cold_start_profile.DEFAULT_FORBIDDEN["api_handler"]:
+            self.assertNotIn(module, loaded)
+        self.assertIn("sqlalchemy", loaded)
+
+    def test_common_layer_package_is_lazy(self):
+        import subprocess
+
+        code = (
+            "import sys, common_layer; "
+            "assert 'common_layer.model' not in sys.modules; "
+            "from common_layer import Event; "
+            "assert Event.__tablename__ == 'event'"
+        )
+        completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
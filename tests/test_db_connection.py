@@ -5,7 +5,8 @@ db_connection.py 회귀 테스트 (common_layer).
 생성하면, 토큰 캐시를 갱신해도 풀은 영원히 최초 토큰을 재사용한다. 900초가 지나면
 풀이 새로 여는 커넥션(overflow/recycle/pre-ping 재접속)이 'Signature expired'로 실패한다.
 
-수정: 매 물리 커넥션마다 do_connect 이벤트에서 새 토큰을 발급한다.
+수정: 매 물리 커넥션마다 do_connect 이벤트에서 토큰을 주입한다. 토큰은 DsqlTokenProvider가
+수명(900초)의 일부 동안만 캐시하고 만료 전에 새로 발급하므로, 만료된 토큰은 재사용되지 않는다.
 """
 import os
 import sys
@@ -38,6 +39,7 @@ class DbConnectionTokenTest(unittest.TestCase):
         dbc._engine = None
         dbc._SessionLocal = None
         dbc._dsql_client = None
+        dbc._token_provider = None
 
         self._settings_patch = mock.patch.multiple(
             dbc.settings,
@@ -45,6 +47,7 @@ class DbConnectionTokenTest(unittest.TestCase):
             cluster_endpoint="test-cluster.dsql.ap-northeast-2.on.aws",
             db_user="admin",
             db_name="postgres",
+            dsql_token_refresh_fraction=0.5,
         )
         self._settings_patch.start()
         self.addCleanup(self._settings_patch.stop)
@@ -57,11 +60,11 @@ class DbConnectionTokenTest(unittest.TestCase):
 
         self.fake_client = mock.Mock()
         self.fake_client.generate_db_connect_admin_auth_token.side_effect = _fake_token
-        self.boto3_patch = mock.patch.object(
-            dbc.boto3, "client", return_value=self.fake_client
+        self.client_patch = mock.patch.object(
+            dbc, "_create_dsql_client", return_value=self.fake_client
         )
-        self.boto3_patch.start()
-        self.addCleanup(self.boto3_patch.stop)
+        self.client_patch.start()
+        self.addCleanup(self.client_patch.stop)
 
     def tearDown(self):
         if dbc._engine is not None:
@@ -69,24 +72,67 @@ class DbConnectionTokenTest(unittest.TestCase):
         dbc._engine = None
         dbc._SessionLocal = None
         dbc._dsql_client = None
+        dbc._token_provider = None
+
+    def _use_clock(self, clock):
+        dbc._token_provider = dbc.DsqlTokenProvider(
+            dbc._generate_token, refresh_fraction=dbc.settings.dsql_token_refresh_fraction, clock=clock
+        )
 
     # --- 다이얼렉트 불필요: 핵심 토큰 로직 ---
-    def test_fresh_token_per_connection(self):
-        """do_connect가 호출될 때마다 '새' 토큰을 발급해 password로 주입해야 한다."""
+    def test_token_injected_per_connection(self):
+        """do_connect가 호출될 때마다 토큰을 password로 주입해야 한다."""
         cparams_a, cparams_b = {}, {}
         dbc._provide_token(None, None, [], cparams_a)
         dbc._provide_token(None, None, [], cparams_b)
 
         self.assertIn("password", cparams_a)
         self.assertIn("password", cparams_b)
-        self.assertNotEqual(
-            cparams_a["password"], cparams_b["password"],
-            "물리 커넥션마다 새 토큰이 발급되어야 한다",
-        )
+        # 풀 확장으로 커넥션이 연달아 열려도 서명은 한 번만 한다.
+        self.assertEqual(cparams_a["password"], cparams_b["password"])
         self.assertEqual(
-            self.fake_client.generate_db_connect_admin_auth_token.call_count, 2
+            self.fake_client.generate_db_connect_admin_auth_token.call_count, 1
         )
 
+    def test_token_refreshed_before_expiry(self):
+        """수명의 refresh_fraction이 지나면 만료 전에 새 토큰을 발급해야 한다."""
+        now = {"t": 1000.0}
+        self._use_clock(lambda: now["t"])
+
+        first = {}
+        dbc._provide_token(None, None, [], first)
+
+        now["t"] += 449
+        reused = {}
+        dbc._provide_token(None, None, [], reused)
+        self.assertEqual(reused["password"], first["password"])
+
+        now["t"] += 1
+        refreshed = {}
+        dbc._provide_token(None, None, [], refreshed)
+        self.assertNotEqual(refreshed["password"], first["password"])
+        self.assertEqual(dbc._token_provider.stats(), {"issued": 2, "reused": 1})
+
+    def test_expired_token_never_reused(self):
+        """refresh_fraction을 어떻게 설정해도 900초가 지난 토큰은 주입되지 않아야 한다."""
+        for fraction in (0.5, 1.0, 5.0):
+            now = {"t": 0.0}
+            provider = dbc.DsqlTokenProvider(dbc._generate_token, refresh_fraction=fraction, clock=lambda: now["t"])
+            issued_at = {}
+            for step in range(0, 3600, 7):
+                now["t"] = float(step)
+                token = provider.get()
+                issued_at.setdefault(token, now["t"])
+                self.assertLess(now["t"] - issued_at[token], dbc.DSQL_TOKEN_LIFETIME_SECONDS)
+
+    def test_zero_fraction_issues_token_per_connection(self):
+        """refresh_fraction=0이면 캐시 없이 커넥션마다 새 토큰을 발급한다."""
+        dbc.settings.dsql_token_refresh_fraction = 0
+        cparams_a, cparams_b = {}, {}
+        dbc._provide_token(None, None, [], cparams_a)
+        dbc._provide_token(None, None, [], cparams_b)
+        self.assertNotEqual(cparams_a["password"], cparams_b["password"])
+
     def test_token_generated_with_endpoint_and_region(self):
         """토큰 발급은 설정된 cluster_endpoint/region으로 호출되어야 한다."""
         dbc._provide_token(None, None, [], {})
@@ -101,6 +147,14 @@ class DbConnectionTokenTest(unittest.TestCase):
         engine, _ = dbc.get_dsql_engine_and_session()
         self.assertTrue(event.contains(engine, "do_connect", dbc._provide_token))
 
+    @unittest.skipUnless(DIALECT, "auroradsql+psycopg 다이얼렉트가 이 venv에 없음")
+    def test_init_engine_prepares_engine_and_client_without_token(self):
+        """init 단계에서는 엔진과 DSQL 클라이언트만 만들고 토큰 서명/커넥션은 하지 않는다."""
+        engine = dbc.init_engine()
+        self.assertIs(engine, dbc.get_dsql_engine_and_session()[0])
+        self.assertIs(dbc._dsql_client, self.fake_client)
+        self.fake_client.generate_db_connect_admin_auth_token.assert_not_called()
+
     @unittest.skipUnless(DIALECT, "auroradsql+psycopg 다이얼렉트가 이 venv에 없음")
     def test_no_static_password_in_engine_url(self):
         """엔진 URL에 정적 토큰(password)이 박혀 있으면 안 된다(버그 회귀 방지)."""
@@ -108,5 +162,157 @@ class DbConnectionTokenTest(unittest.TestCase):
         self.assertIsNone(engine.url.password)
 
 
+class _OccError(Exception):
+    sqlstate = "OC000"
+
+
+class RunTransactionTest(unittest.TestCase):
+    """run_transaction: OCC 충돌만 새 세션에서 재시도하고, 나머지는 rollback 후 전파한다."""
+
+    def setUp(self):
+        from contextlib import contextmanager
+
+        self.sessions = []
+
+        @contextmanager
+        def _fake_session():
+            session = mock.Mock()
+            self.sessions.append(session)
+            yield session
+
+        for patcher in (
+            mock.patch.object(dbc, "get_session", _fake_session),
+            mock.patch.object(dbc, "transaction_metrics", dbc.TransactionMetrics()),
+            mock.patch.object(dbc, "_retry_budget", dbc.RetryBudget()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.sleeps = []
+
+    def _run(self, work, max_attempts=3):
+        return dbc.run_transaction(work, max_attempts=max_attempts, sleep=self.sleeps.append)
+
+    @staticmethod
+    def _occ():
+        from sqlalchemy.exc import OperationalError
+        return OperationalError("COMMIT", {}, _OccError())
+
+    def test_commits_once_on_success(self):
+        self.assertEqual(self._run(lambda session: "ok"), "ok")
+        self.assertEqual(len(self.sessions), 1)
+        self.sessions[0].commit.assert_called_once()
+        self.assertEqual(self.sleeps, [])
+
+    def test_occ_conflict_is_retried_in_new_session(self):
+        calls = {"n": 0}
+
+        def work(session):
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise self._occ()
+            return calls["n"]
+
+        self.assertEqual(self._run(work), 2)
+        self.assertEqual(len(self.sessions), 2)
+        self.sessions[0].rollback.assert_called_once()
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertEqual(dbc.transaction_metrics.retries, 1)
+
+    def test_gives_up_after_max_attempts(self):
+        def work(session):
+            raise self._occ()
+
+        with self.assertRaises(Exception):
+            self._run(work, max_attempts=3)
+        self.assertEqual(len(self.sessions), 3)
+        self.assertEqual(dbc.transaction_metrics.exhausted, 1)
+
+    def test_non_occ_errors_are_not_retried(self):
+        from sqlalchemy.exc import IntegrityError
+
+        def work(session):
+            raise IntegrityError("INSERT", {}, Exception("duplicate"))
+
+        with self.assertRaises(IntegrityError):
+            self._run(work)
+        self.assertEqual(len(self.sessions), 1)
+        self.sessions[0].rollback.assert_called_once()
+
+        def domain(session):
+            raise ValueError("not found")
+
+        with self.assertRaises(ValueError):
+            self._run(domain)
+        self.assertEqual(len(self.sessions), 2)
+
+    def test_retry_budget_limits_retries(self):
+        dbc._retry_budget = dbc.RetryBudget(ratio=0, max_tokens=1)
+
+        def work(session):
+            raise self._occ()
+
+        with self.assertRaises(Exception):
+            self._run(work, max_attempts=10)
+        # 예산 1개 → 최초 시도 + 재시도 1회
+        self.assertEqual(len(self.sessions), 2)
+        self.assertEqual(dbc.transaction_metrics.budget_denied, 1)
+
+
+class _ConnectCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "connect", self._on_connect)
+
+    def _on_connect(self, *args):
+        self.count += 1
+
+
+@unittest.skipUnless(os.environ.get("TEST_DATABASE_URL"), "TEST_DATABASE_URL이 설정되지 않음")
+class PoolStrategyTest(unittest.TestCase):
+    """DB_POOL_STRATEGY별 커넥션 재사용과 single 전략의 유휴 커넥션 검증."""
+
+    def _engine(self, strategy, **kwargs):
+        engine = dbc.create_pooled_engine(os.environ["TEST_DATABASE_URL"], strategy, **kwargs)
+        self.addCleanup(engine.dispose)
+        return engine, _ConnectCounter(engine)
+
+    @staticmethod
+    def _select(engine):
+        from sqlalchemy import text
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT pg_backend_pid()")).scalar()
+
+    def test_unknown_strategy_rejected(self):
+        with self.assertRaises(ValueError):
+            dbc.create_pooled_engine(os.environ["TEST_DATABASE_URL"], "bogus")
+
+    def test_single_reuses_one_connection(self):
+        engine, connects = self._engine("single")
+        pids = {self._select(engine) for _ in range(5)}
+        self.assertEqual(len(pids), 1)
+        self.assertEqual(connects.count, 1)
+
+    def test_null_opens_connection_per_checkout(self):
+        engine, connects = self._engine("null")
+        for _ in range(3):
+            self._select(engine)
+        self.assertEqual(connects.count, 3)
+
+    def test_single_replaces_dead_idle_connection(self):
+        from sqlalchemy import create_engine, text
+
+        engine, connects = self._engine("single", validate_idle_seconds=0)
+        pid = self._select(engine)
+
+        admin = create_engine(os.environ["TEST_DATABASE_URL"])
+        with admin.begin() as conn:
+            conn.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+        admin.dispose()
+
+        # 죽은 커넥션은 체크아웃 검증에서 걸러지고 새 커넥션으로 요청이 성공해야 한다.
+        self.assertNotEqual(self._select(engine), pid)
+        self.assertEqual(connects.count, 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,190 @@
+"""
+POST /event/batch 테스트.
+
+이벤트 코드는 한 번의 중복 확인 쿼리로 배치 전체에 대해 겹치지 않게 정하고, QR은 스레드
+풀에서 동시에 그려 공유 S3 클라이언트로 올리며, Event 행은 INSERT 한 문장으로 넣는다.
+QR 업로드에 실패한 항목은 pending으로 만들어 재생성 작업에 맡긴다.
+"""
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, create_test_engine, load_handler, use_test_sessions
+
+from test_qr_worker import EVENT_BODY, FakeS3
+
+
+class SlowS3(FakeS3):
+    """업로드가 겹쳐서 도는지 보려고 put_object마다 조금 기다리고 동시 호출 수를 잰다."""
+
+    def __init__(self, fail_keys=()):
+        super().__init__()
+        self.fail_keys = set(fail_keys)
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.05)
+            if Key in self.fail_keys:
+                raise ConnectionError(Key)
+            return super().put_object(Bucket, Key, Body, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class EventBatchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.qr_code, cls.qr_worker, cls.service = load_handler(
+            "event_handler", "app", "qr_code", "qr_worker", "service"
+        )
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+        self.Session = sessionmaker(bind=self.engine)
+        use_test_sessions(self, self.Session)
+
+        self.s3 = SlowS3()
+        for patcher in (
+            mock.patch.object(self.settings, "qr_s3_bucket_name", "qr-bucket"),
+            mock.patch.object(self.settings, "client_url", "https://checkin.awskr.org"),
+            mock.patch.object(self.settings, "qr_output_format", "png-optimized"),
+            mock.patch.object(self.settings, "qr_render_mode", "sync"),
+            mock.patch.object(self.settings, "qr_batch_workers", 4),
+            mock.patch.object(self.settings, "event_batch_max_items", 20),
+            mock.patch.object(self.qr_code, "_s3_client", self.s3),
+            mock.patch.object(self.qr_worker, "_dispatcher", None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _post(self, body) -> tuple[int, dict]:
+        response = self.app.lambda_handler(
+            {"httpMethod": "POST", "resource": "/event/batch", "body": json.dumps(body)}, None
+        )
+        return response["statusCode"], json.loads(response["body"])
+
+    def _statements(self):
+        from sqlalchemy import event
+
+        statements = []
+
+        def _on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.engine, "before_cursor_execute", _on_execute)
+        self.addCleanup(event.remove, self.engine, "before_cursor_execute", _on_execute)
+        return statements
+
+    def test_creates_events_in_one_insert(self):
+        from model import Event
+
+        items = [{**EVENT_BODY, "event_name": f"session {i}"} for i in range(12)]
+        statements = self._statements()
+        status, body = self._post({"events": items})
+        self.assertEqual(status, 200)
+
+        results = body["results"]
+        self.assertEqual([result["status_code"] for result in results], [200] * 12)
+        codes = [result["result"]["event_code"] for result in results]
+        self.assertEqual(len(set(codes)), 12)
+        self.assertTrue(all(code.startswith("0501") for code in codes))
+        self.assertEqual([result["result"]["qr_status"] for result in results], [None] * 12)
+        self.assertEqual(set(self.s3.objects), {f"{code}.png" for code in codes})
+        self.assertGreater(self.s3.max_active, 1)
+
+        selects = [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+        inserts = [statement for statement in statements if statement.lstrip().upper().startswith("INSERT")]
+        self.assertEqual((len(selects), len(inserts)), (1, 1))
+
+        with self.Session() as session:
+            names = {event.event_code: event.event_name for event in session.query(Event)}
+        self.assertEqual(names, {code: f"session {i}" for i, code in enumerate(codes)})
+
+    def test_allocation_skips_taken_codes(self):
+        from model import Event
+
+        now = datetime.now()
+        with self.Session() as session:
+            session.add(Event.create("0501AAA", now, "meetup", now + timedelta(hours=1), "1", "AWSKRUG"))
+            session.commit()
+
+        candidates = ["0501AAA", "0501AAB", "0501AAC", "0501AAD", "0501AAA", "0501AAB", "0501AAE", "0501AAF"]
+        with mock.patch.object(self.service, "_random_event_code", side_effect=candidates):
+            status, body = self._post({"events": [EVENT_BODY, EVENT_BODY]})
+        self.assertEqual(status, 200)
+        # 첫 항목: AAA는 이미 있음 → AAB. 둘째 항목: AAA는 있고 AAB는 첫 항목이 씀 → AAE
+        self.assertEqual([result["result"]["event_code"] for result in body["results"]], ["0501AAB", "0501AAE"])
+
+    def test_failed_upload_leaves_item_pending(self):
+        with mock.patch.object(self.service, "_random_event_code", side_effect=[f"0501B{c}{d}" for c in "AB" for d in "ABCD"]):
+            self.s3.fail_keys = {"0501BBA.png"}
+            status, body = self._post({"events": [EVENT_BODY, EVENT_BODY]})
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [(result["status_code"], result["result"]["event_code"], result["result"]["qr_status"])
+             for result in body["results"]],
+            [(200, "0501BAA", None), (202, "0501BBA", "pending")]
+        )
+        self.assertIsNotNone(body["results"][1]["message"])
+
+    def test_allocation_failure_is_reported_per_item(self):
+        from model import Event
+
+        now = datetime.now()
+        with self.Session() as session:
+            session.add(Event.create("0501AAA", now, "meetup", now + timedelta(hours=1), "1", "AWSKRUG"))
+            session.commit()
+
+        # 첫 후보만 새 코드이고 나머지는 모두 이미 있는 코드다. 둘째 항목은 끝까지 코드를 못 받는다.
+        codes = iter(["0501ZZZ"])
+        with mock.patch.object(self.service, "_random_event_code", side_effect=lambda _: next(codes, "0501AAA")):
+            status, body = self._post({"events": [EVENT_BODY, EVENT_BODY]})
+        self.assertEqual(status, 200)
+        self.assertEqual([result["status_code"] for result in body["results"]], [200, 503])
+        self.assertEqual(body["results"][0]["result"]["event_code"], "0501ZZZ")
+        self.assertIsNone(body["results"][1]["result"])
+        with self.Session() as session:
+            self.assertEqual({event.event_code for event in session.query(Event)}, {"0501AAA", "0501ZZZ"})
+
+    def test_async_mode_dispatches_after_commit(self):
+        dispatcher = mock.Mock()
+        self.qr_worker._dispatcher = dispatcher
+        with mock.patch.object(self.settings, "qr_render_mode", "thread"):
+            status, body = self._post({"events": [EVENT_BODY] * 3})
+        self.assertEqual(status, 200)
+        codes = [result["result"]["event_code"] for result in body["results"]]
+        self.assertEqual([result["result"]["qr_status"] for result in body["results"]], ["pending"] * 3)
+        self.assertEqual([call.args[0] for call in dispatcher.submit.call_args_list], codes)
+        self.assertEqual(self.s3.objects, {})
+
+    def test_invalid_batches(self):
+        for body in ({}, {"events": []}, {"events": [{"event_name": "x"}]}, {"events": [EVENT_BODY] * 21}):
+            with self.subTest(body=str(body)[:40]):
+                self.assertEqual(self._post(body)[0], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
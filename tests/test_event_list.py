@@ -0,0 +1,265 @@
+"""
+event_handler 목록 조회(keyset 페이지) 테스트.
+
+GET /event/organization/{organization_code}와 쿼리 파라미터가 있는 GET /event는
+(event_date_time, event_code) 내림차순으로 limit개씩 돌려주고, next_cursor로 이어 읽으면
+빠지거나 겹치는 행이 없어야 한다. 목록 쿼리는 description을 읽지 않고, 조건은
+idx_event_* 인덱스 범위로 들어가야 한다.
+
+목록 응답에는 ETag가 붙고, 바뀐 게 없을 때 If-None-Match로 다시 부르면 index-only
+쿼리 하나만 보내고 본문 없이 304를 돌려준다.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta
+
+from helpers import TEST_DATABASE_URL, create_test_engine, load_handler, use_test_sessions
+
+import test_api_query_plans as query_plans
+
+
+def _scan_nodes(plan: dict) -> list[tuple]:
+    nodes = [(plan["Node Type"], plan.get("Index Name"))] if "Scan" in plan["Node Type"] else []
+    for child in plan.get("Plans", []):
+        nodes.extend(_scan_nodes(child))
+    return nodes
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class EventListTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.repository = load_handler("event_handler", "app", "repository")
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        self.Session = sessionmaker(bind=self.engine)
+        self.now = now = datetime.now().replace(microsecond=0)
+        with self.Session() as session:
+            # 같은 시각의 행사를 섞어 event_code가 순서를 정하는 경우도 만든다.
+            for i in range(30):
+                organization = "AWSKRUG" if i % 3 else "OTHER"
+                date_time = now + timedelta(days=i // 2 - 7)
+                session.add(Event.create(
+                    f"E{i:02d}", date_time, f"meetup {i}", date_time + timedelta(hours=3), "1", organization,
+                    description="긴 설명" * 100
+                ))
+            session.commit()
+        use_test_sessions(self, self.Session)
+
+    def _call(self, resource="/event", params=None, organization_code=None, if_none_match=None) -> dict:
+        event = {"httpMethod": "GET", "resource": resource, "queryStringParameters": params}
+        if organization_code:
+            event["pathParameters"] = {"organization_code": organization_code}
+        if if_none_match:
+            event["headers"] = {"if-none-match": if_none_match}
+        return self.app.lambda_handler(event, None)
+
+    def _get(self, resource="/event", params=None, organization_code=None):
+        response = self._call(resource, params, organization_code)
+        return response["statusCode"], json.loads(response["body"])
+
+    def _expected(self, keep=lambda row: True) -> list[str]:
+        from model import Event
+        with self.Session() as session:
+            rows = session.query(Event).order_by(Event.event_date_time.desc(), Event.event_code.desc()).all()
+            return [row.event_code for row in rows if keep(row)]
+
+    def _read_all(self, resource="/event", params=None, organization_code=None) -> list[str]:
+        codes, cursor = [], None
+        while True:
+            page_params = {**(params or {}), "limit": "7"}
+            if cursor:
+                page_params["cursor"] = cursor
+            status, body = self._get(resource, page_params, organization_code)
+            self.assertEqual(status, 200, body)
+            self.assertLessEqual(len(body["events"]), 7)
+            codes += [item["event_code"] for item in body["events"]]
+            cursor = body["next_cursor"]
+            if not cursor:
+                return codes
+
+    def test_pages_cover_every_event_once(self):
+        self.assertEqual(self._read_all(params={"limit": "7"}), self._expected())
+
+    def test_organization_route_and_filters(self):
+        now = self.now
+        self.assertEqual(
+            self._read_all("/event/organization/{organization_code}", organization_code="AWSKRUG"),
+            self._expected(lambda row: row.organization_code == "AWSKRUG")
+        )
+        date_from, date_to = now - timedelta(days=2), now + timedelta(days=3)
+        self.assertEqual(
+            self._read_all(params={"from": date_from.isoformat(), "to": date_to.isoformat()}),
+            self._expected(lambda row: date_from <= row.event_date_time < date_to)
+        )
+        self.assertEqual(
+            self._read_all(params={"status": "active", "organization_code": "OTHER"}),
+            self._expected(lambda row: row.code_expired_at >= now and row.organization_code == "OTHER")
+        )
+        self.assertEqual(
+            self._read_all(params={"status": "expired"}),
+            self._expected(lambda row: row.code_expired_at < now)
+        )
+
+    def test_page_omits_description(self):
+        status, body = self._get(params={"limit": "3"})
+        self.assertEqual(status, 200)
+        self.assertNotIn("description", body["events"][0])
+        self.assertEqual(set(body["events"][0]), {
+            "event_code", "event_date_time", "event_name", "code_expired_at", "event_version",
+            "organization_code", "qr_url", "qr_status", "created_at", "updated_at",
+        })
+
+    def test_legacy_list_without_query(self):
+        status, body = self._get()
+        self.assertEqual(status, 200)
+        self.assertIsInstance(body, list)
+        self.assertEqual(len(body), 30)
+
+    def test_invalid_query(self):
+        for params in (
+            {"cursor": "not-a-cursor"}, {"limit": "0"}, {"limit": "x"}, {"size": "500"}, {"status": "soon"},
+            {"from": "어제"}, {"page": "1", "size": "10"}, {"search": "x" * 101},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self._get(params=params)[0], 400)
+
+    def test_admin_query_parameters(self):
+        # 관리자 화면은 size/search를 보내고 첫 페이지에 page=0을 붙인다.
+        status, body = self._get(params={"page": "0", "size": "10"})
+        self.assertEqual(status, 200, body)
+        self.assertEqual([item["event_code"] for item in body["events"]], self._expected()[:10])
+        self.assertNotIn("total", body)
+
+        self.assertEqual(
+            self._read_all(params={"search": "MEETUP 1"}),
+            self._expected(lambda row: "meetup 1" in row.event_name)
+        )
+        self.assertEqual(
+            self._read_all("/event/organization/{organization_code}", {"search": "e2"}, "AWSKRUG"),
+            self._expected(lambda row: row.event_code.startswith("E2") and row.organization_code == "AWSKRUG")
+        )
+        # LIKE 와일드카드는 글자 그대로 찾는다.
+        self.assertEqual(self._read_all(params={"search": "%"}), [])
+        self.assertEqual(self._read_all(params={"search": "E_1"}), [])
+
+    def test_unchanged_listing_returns_304(self):
+        import metrics
+
+        resource = "/event/organization/{organization_code}"
+        response = self._call(resource, {"limit": "5"}, "AWSKRUG")
+        etag = response["headers"]["ETag"]
+        self.assertEqual(response["statusCode"], 200)
+
+        with metrics.capture() as records:
+            response = self._call(resource, {"limit": "5"}, "AWSKRUG", if_none_match=etag)
+        self.assertEqual((response["statusCode"], response["body"]), (304, None))
+        self.assertEqual(response["headers"]["ETag"], etag)
+        self.assertEqual([name for name in records[0] if name.startswith("Repository.")], ["Repository.get_event_list_version"])
+        self.assertEqual(self._call(resource, {"limit": "5"}, "AWSKRUG", if_none_match=f'"x", {etag}')["statusCode"], 304)
+
+        # 조건이나 페이지가 다르면 다른 ETag다.
+        self.assertNotEqual(self._call(resource, {"limit": "6"}, "AWSKRUG")["headers"]["ETag"], etag)
+        self.assertNotEqual(self._call(resource, {"limit": "5"}, "OTHER")["headers"]["ETag"], etag)
+
+    def test_etag_changes_with_data(self):
+        from model import Event
+
+        legacy_etag = self._call()["headers"]["ETag"]
+        etag = self._call(params={"organization_code": "AWSKRUG"})["headers"]["ETag"]
+        self.assertEqual(self._call(if_none_match=legacy_etag)["statusCode"], 304)
+
+        with self.Session() as session:
+            session.get(Event, "E01").event_name = "이름 변경"
+            session.commit()
+        response = self._call(params={"organization_code": "AWSKRUG"}, if_none_match=etag)
+        self.assertEqual(response["statusCode"], 200)
+        self.assertNotEqual(response["headers"]["ETag"], etag)
+        self.assertEqual(self._call(if_none_match=legacy_etag)["statusCode"], 200)
+
+        etag = response["headers"]["ETag"]
+        with self.Session() as session:
+            session.delete(session.get(Event, "E02"))
+            session.commit()
+        self.assertEqual(self._call(params={"organization_code": "AWSKRUG"}, if_none_match=etag)["statusCode"], 200)
+
+    def test_version_query_is_index_only(self):
+        from sqlalchemy.orm import Session
+
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM ANALYZE event")
+        with Session(self.engine) as session:
+            session.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+            repo = self.repository.EventRepository(session)
+            for name, kwargs in {
+                "all": {},
+                "organization": {"organization_code": "AWSKRUG"},
+                "organization, status": {"organization_code": "AWSKRUG", "active_at": self.now},
+            }.items():
+                statements = self._capture(session, lambda: repo.get_event_list_version(**kwargs))
+                self.assertEqual(len(statements), 1)
+                with self.subTest(filter=name):
+                    scans = _scan_nodes(self._plan(session, *statements[0]))
+                    self.assertEqual(scans, [("Index Only Scan", "idx_event_org_date_time_expired_updated")])
+
+    def _capture(self, session, call) -> list[tuple]:
+        from sqlalchemy import event
+
+        statements = []
+
+        def _on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(self.engine, "before_cursor_execute", _on_execute)
+        try:
+            call()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", _on_execute)
+        return statements
+
+    def _plan(self, session, statement: str, parameters) -> dict:
+        plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        plan = plan if isinstance(plan, list) else json.loads(plan)
+        return plan[0]["Plan"]
+
+    def test_page_queries_use_indexes(self):
+        now = self.now
+        from sqlalchemy.orm import Session
+
+        with Session(self.engine) as session:
+            session.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+            repo = self.repository.EventRepository(session)
+            after = (now, "E10")
+            calls = {
+                "organization": lambda: repo.get_event_page(8, organization_code="AWSKRUG", after=after),
+                "date range": lambda: repo.get_event_page(8, date_from=now - timedelta(days=2), date_to=now, after=after),
+                "active": lambda: repo.get_event_page(8, active_at=now),
+                "expired": lambda: repo.get_event_page(8, expired_before=now, after=after),
+                "cursor": lambda: repo.get_event_page(8, after=after),
+            }
+            for name, call in calls.items():
+                for statement, parameters in self._capture(session, call):
+                    with self.subTest(filter=name):
+                        self.assertNotIn("description", statement)
+                        # ORDER BY ... LIMIT을 idx_event_date_time 역방향으로 읽다가 멈추는 계획은 허용한다.
+                        problems = [
+                            problem for problem in query_plans._bad_scans(self._plan(session, statement, parameters))
+                            if not problem.startswith("Index Scan on idx_event_date_time")
+                        ]
+                        self.assertEqual(problems, [], statement)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+tools/load_test.py 집계/비교 테스트.
+
+부하 테스트 실행 자체는 로컬 DB 전체를 다시 만들므로 여기서는 돌리지 않고, 요청 합성,
+이벤트 파일 재생, EMF 레코드 집계와 baseline 비교만 확인한다.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+from helpers import REPO_ROOT
+
+sys.path.insert(0, os.path.join(REPO_ROOT, "tools"))
+
+import load_test  # noqa: E402
+
+
+def _record(route, duration, sql=3, status=200):
+    return {"Route": route, "Duration": duration, "SqlStatements": sql, "StatusCode": status}
+
+
+class LoadTestHarnessTest(unittest.TestCase):
+    SEED = load_test.Seed(event_codes=["LT000", "LT001"], phones=["010-7000-0001", "010-7000-0002"])
+
+    def test_generate_requests_follows_mix(self):
+        requests = load_test.generate_requests(
+            self.SEED, 200, load_test.parse_mix("check=3,event_list=1"), random.Random(1)
+        )
+        routes = {(handler, event["httpMethod"], event["path"]) for handler, event in requests}
+        self.assertEqual(routes, {("api_handler", "POST", "/check"), ("event_handler", "GET", "/event")})
+        checks = [event for handler, event in requests if event["path"] == "/check"]
+        self.assertGreater(len(checks), 120)
+        self.assertIn(json.loads(checks[0]["body"])["event_code"], self.SEED.event_codes)
+
+        with self.assertRaises(ValueError):
+            load_test.parse_mix("nope=1")
+
+    def test_load_events_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.write(json.dumps({"httpMethod": "GET", "resource": "/event"}) + "\n\n")
+            f.write(json.dumps({"httpMethod": "POST", "path": "/check", "body": "{}"}) + "\n")
+            f.write(json.dumps({"handler": "api_handler", "event": {"warmup": True}}) + "\n")
+        self.addCleanup(os.remove, f.name)
+
+        handlers = [handler for handler, _ in load_test.load_events_file(f.name)]
+        self.assertEqual(handlers, ["event_handler", "api_handler", "api_handler"])
+
+    def test_summarize(self):
+        records = [_record("POST /check", float(ms)) for ms in range(1, 101)]
+        records.append(_record("GET /event", 5.0, sql=1, status=500))
+        report = load_test.summarize(records, wall_seconds=2.0, concurrency=4, pool="thread")
+
+        check = report.routes["POST /check"]
+        self.assertEqual((check.requests, check.errors), (100, 0))
+        self.assertEqual((check.p50_ms, check.p95_ms, check.p99_ms), (51.0, 96.0, 100.0))
+        self.assertEqual(check.sql_per_request, 3)
+        self.assertEqual(report.routes["GET /event"].errors, 1)
+        self.assertEqual(report.throughput_rps, 50.5)
+
+        restored = load_test.LoadTestReport.from_dict(json.loads(json.dumps(load_test.asdict(report))))
+        self.assertEqual(restored, report)
+
+    def test_compare(self):
+        baseline = load_test.summarize([_record("POST /check", 10.0)] * 10, 1.0, 4, "thread")
+        same = load_test.summarize([_record("POST /check", 11.0)] * 10, 1.0, 4, "thread")
+        self.assertEqual(load_test.compare(same, baseline, 0.2), [])
+
+        slower = load_test.summarize([_record("POST /check", 20.0, sql=5)] * 10, 2.0, 4, "thread")
+        regressions = load_test.compare(slower, baseline, 0.2)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(any("sql/req" in regression for regression in regressions))
+
+    def test_fake_s3(self):
+        aws = load_test.FakeAws()
+        s3 = aws.client("s3")
+        s3.put_object(Bucket="b", Key="k.png", Body=b"png", ContentType="image/png")
+        self.assertEqual(s3.get_object(Bucket="b", Key="k.png")["Body"].read(), b"png")
+        table = aws.resource("dynamodb").Table("t")
+        table.put_item(Item={"pk": "1", "v": 2})
+        self.assertEqual(table.get_item(Key={"pk": "1"})["Item"]["v"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+"""
+요청 단위 계측(metrics) 테스트.
+
+핸들러 호출 하나마다 EMF 레코드가 정확히 하나 나와야 하고, 그 안의 SQL 문장 수와
+repository/해시/직렬화 시간이 실제 호출과 맞아야 한다. 요청 밖에서는 아무것도 쌓지 않는다.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, StatementCounter, create_test_engine, load_handler, use_test_sessions
+
+import metrics
+
+
+class RequestMetricsTest(unittest.TestCase):
+    def test_emf_record(self):
+        with metrics.capture() as records:
+            with metrics.request("api_handler", "POST /check"):
+                with metrics.timed("Hashing"):
+                    pass
+                metrics.increment("SqlStatements", 3)
+                metrics.increment("SqlStatements")
+                metrics.set_property("StatusCode", 200)
+
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        directive = record["_aws"]["CloudWatchMetrics"][0]
+        self.assertEqual(directive["Dimensions"], [["Handler", "Route"]])
+        self.assertEqual(
+            {metric["Name"]: metric["Unit"] for metric in directive["Metrics"]},
+            {"Hashing": "Milliseconds", "Duration": "Milliseconds", "SqlStatements": "Count"}
+        )
+        self.assertEqual((record["Handler"], record["Route"]), ("api_handler", "POST /check"))
+        self.assertEqual(record["SqlStatements"], 4)
+        self.assertEqual(record["StatusCode"], 200)
+        self.assertGreaterEqual(record["Duration"], record["Hashing"])
+        json.dumps(record)
+
+    def test_noop_outside_request(self):
+        with metrics.capture() as records:
+            with metrics.timed("Hashing"):
+                metrics.increment("SqlStatements")
+        self.assertEqual(records, [])
+        self.assertIsNone(metrics.current())
+
+    def test_timed_methods(self):
+        @metrics.timed_methods("Repository")
+        class Repository:
+            def get(self, value):
+                return value * 2
+
+            def _private(self):
+                return 1
+
+        with metrics.capture() as records:
+            with metrics.request("h"):
+                self.assertEqual(Repository().get(2), 4)
+                Repository()._private()
+        self.assertIn("Repository.get", records[0])
+        self.assertNotIn("Repository._private", records[0])
+
+    def test_instrument_handler(self):
+        @metrics.instrument_handler("event_handler")
+        def lambda_handler(event, context):
+            if event.get("boom"):
+                raise RuntimeError("boom")
+            return {"statusCode": event["status"]}
+
+        context = mock.Mock(aws_request_id="req-1")
+        with metrics.capture() as records:
+            lambda_handler({"httpMethod": "GET", "resource": "/event", "status": 200}, context)
+            lambda_handler({"httpMethod": "GET", "resource": "/event", "status": 500}, context)
+            with self.assertRaises(RuntimeError):
+                lambda_handler({"boom": True}, None)
+
+        self.assertEqual([record["Route"] for record in records], ["GET /event", "GET /event", "invoke"])
+        self.assertEqual(records[0]["RequestId"], "req-1")
+        self.assertNotIn("Errors", records[0])
+        self.assertEqual(records[1]["Errors"], 1)
+        self.assertEqual(records[2]["Errors"], 1)
+
+    def test_disabled(self):
+        with mock.patch.object(metrics.settings, "metrics_enabled", False), metrics.capture() as records:
+            with metrics.request("h"):
+                metrics.increment("SqlStatements")
+        self.assertEqual(records, [])
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class ApiHandlerMetricsTest(unittest.TestCase):
+    PHONE = "010-1234-5678"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.repository = load_handler("api_handler", "app", "repository")
+        import settings as settings_mod
+        import db_connection
+        cls.settings = settings_mod.settings
+        cls.engine = db_connection.instrument_engine(create_test_engine())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event, EventRegistration
+        from hash_tool import hash_phone_number
+
+        patcher = mock.patch.multiple(self.settings, salt="test-salt", checkin_mode="orm")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository.event_cache.clear()
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        Session = sessionmaker(bind=self.engine)
+        now = datetime.now()
+        with Session() as session:
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            session.add(EventRegistration.create("E1", hash_phone_number(self.PHONE.replace("-", "")), "홍길동"))
+            session.commit()
+        use_test_sessions(self, Session)
+
+    def test_check_emits_one_record_with_breakdown(self):
+        event = {"httpMethod": "POST", "path": "/check", "body": json.dumps({"event_code": "E1", "phone": self.PHONE})}
+        with metrics.capture() as records, StatementCounter(self.engine) as counter:
+            response = self.app.lambda_handler(event, None)
+
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual((record["Handler"], record["Route"], record["StatusCode"]), ("api_handler", "POST /check", 200))
+        self.assertEqual(record["SqlStatements"], counter.count)
+        self.assertEqual(record["Transactions"], 1)
+        for name in ("Repository.get_event", "Repository.insert_event_checkin", "PhoneHashing", "Serialization", "SessionCheckout"):
+            self.assertIn(name, record)
+            self.assertLessEqual(record[name], record["Duration"])
+
+    def test_session_checkout_is_timed_without_patching_the_engine(self):
+        import time
+        from sqlalchemy import event as sqlalchemy_event
+
+        self.assertNotIn("raw_connection", vars(self.engine))
+
+        def _slow_checkout(*args):
+            time.sleep(0.05)
+
+        sqlalchemy_event.listen(self.engine, "checkout", _slow_checkout)
+        self.addCleanup(sqlalchemy_event.remove, self.engine, "checkout", _slow_checkout)
+        self.repository.event_cache.clear()
+        event = {"httpMethod": "POST", "path": "/check", "body": json.dumps({"event_code": "E1", "phone": self.PHONE})}
+        with metrics.capture() as records:
+            self.app.lambda_handler(event, None)
+        self.assertGreaterEqual(records[0]["SessionCheckout"], 50)
+        self.assertLess(records[0]["SessionCheckout"], records[0]["Duration"])
+
+        # Core 백엔드처럼 ORM 실행 없이 커넥션을 직접 받는 경우
+        import db_connection
+        from sqlalchemy import text
+        from sqlalchemy.orm import Session
+        with metrics.capture(), metrics.request("api_handler") as request, Session(self.engine) as session:
+            db_connection.session_connection(session).execute(text("SELECT 1"))
+        self.assertGreaterEqual(request.timings["SessionCheckout"], 50)
+
+    def test_container_stats_are_logged_every_interval(self):
+        event = {"httpMethod": "POST", "path": "/check", "body": json.dumps({"event_code": "E1"})}
+        with mock.patch.object(self.settings, "container_stats_log_interval", 3), \
+                mock.patch.object(self.app, "_invocations", 0), \
+                metrics.capture(), \
+                self.assertLogs(level="INFO") as logs:
+            for _ in range(7):
+                self.app.lambda_handler(event, None)
+        self.assertEqual(sum("container stats" in line for line in logs.output), 2)
+
+    def test_error_type_is_recorded(self):
+        event = {"httpMethod": "POST", "path": "/check", "body": json.dumps({"event_code": "E1"})}
+        with metrics.capture() as records:
+            response = self.app.lambda_handler(event, None)
+        self.assertEqual(response["statusCode"], 500)
+        self.assertEqual(records[0]["ErrorType"], "TypeError")
+        self.assertEqual(records[0]["Errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
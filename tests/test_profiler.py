@@ -0,0 +1,128 @@
+"""
+샘플링 프로파일러 테스트.
+
+뽑힌 호출만 스택을 떠야 하고, 컨테이너별로 가장 느린 N개만 싱크에 남아야 한다.
+PROFILE_SAMPLE_RATE=0(기본)이면 핸들러를 그대로 부른다.
+"""
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import metrics
+import profiler
+
+
+def _slow_work(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class _MemorySink:
+    def __init__(self):
+        self.files = {}
+
+    def write(self, name, data):
+        self.files[name] = data
+
+    def delete(self, name):
+        del self.files[name]
+
+
+class ProfilerTest(unittest.TestCase):
+    def _profiler(self, sample_rate=1.0, keep=2, rand=lambda: 0.0):
+        sink = _MemorySink()
+        return profiler.HandlerProfiler(sample_rate, keep, 0.001, sink, rand=rand), sink
+
+    def test_collapsed_stacks(self):
+        handler_profiler, sink = self._profiler()
+        result = handler_profiler.run("api_handler", lambda event, context: _slow_work(0.05) or "ok", {}, None)
+
+        self.assertEqual(result, "ok")
+        (name, data), = sink.files.items()
+        self.assertTrue(name.startswith("api_handler-") and name.endswith(".collapsed"))
+        lines = data.splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+        self.assertTrue(any("_slow_work" in line for line in lines))
+
+    def test_keeps_only_slowest(self):
+        handler_profiler, sink = self._profiler(keep=2)
+        for seconds in (0.03, 0.06, 0.01, 0.09):
+            handler_profiler.run("h", lambda event, context: _slow_work(seconds), {}, None)
+
+        durations = sorted(int(name.split("-")[1][:-2]) for name in sink.files)
+        self.assertEqual(len(durations), 2)
+        self.assertGreaterEqual(durations[0], 55)
+        self.assertEqual(sorted(sink.files), sorted(handler_profiler.slowest.names()))
+
+    def test_exception_is_propagated_and_profiled(self):
+        handler_profiler, sink = self._profiler()
+
+        def failing(event, context):
+            _slow_work(0.02)
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            handler_profiler.run("h", failing, {}, None)
+        self.assertEqual(len(sink.files), 1)
+
+    def test_sink_failure_is_logged_not_raised(self):
+        handler_profiler, sink = self._profiler()
+        sink.write = mock.Mock(side_effect=OSError("disk full"))
+        with self.assertLogs(level="WARNING") as logs:
+            self.assertEqual(handler_profiler.run("h", lambda event, context: _slow_work(0.02) or "ok", {}, None), "ok")
+        self.assertIn("profile sink failed: disk full", logs.output[0])
+
+    def test_sampling_decision(self):
+        handler_profiler, _ = self._profiler(sample_rate=0.1, rand=iter([0.05, 0.5]).__next__)
+        self.assertTrue(handler_profiler.should_sample())
+        self.assertFalse(handler_profiler.should_sample())
+        self.assertFalse(self._profiler(sample_rate=0)[0].should_sample())
+
+    def test_decorator_disabled_by_default(self):
+        calls = []
+
+        @profiler.profile_handler("h")
+        def lambda_handler(event, context):
+            calls.append(event)
+            return {"statusCode": 200}
+
+        with mock.patch.object(profiler.settings, "profile_sample_rate", 0), \
+                mock.patch.object(profiler, "_get_profiler") as get_profiler:
+            self.assertEqual(lambda_handler({"a": 1}, None), {"statusCode": 200})
+        get_profiler.assert_not_called()
+        self.assertEqual(calls, [{"a": 1}])
+
+    def test_decorator_writes_to_local_directory(self):
+        directory = tempfile.mkdtemp()
+
+        @metrics.instrument_handler("h")
+        @profiler.profile_handler("h")
+        def lambda_handler(event, context):
+            _slow_work(0.02)
+            return {"statusCode": 200}
+
+        with mock.patch.multiple(
+            profiler.settings, profile_sample_rate=1.0, profile_keep_slowest=1,
+            profile_interval_ms=1, profile_sink=f"file://{directory}"
+        ), mock.patch.object(profiler, "_profiler", None), metrics.capture() as records:
+            lambda_handler({}, mock.Mock(aws_request_id="req-1"))
+
+        (name,) = os.listdir(directory)
+        self.assertTrue(name.endswith("-req-1.collapsed"))
+        self.assertTrue(records[0]["Profiled"])
+
+    def test_create_sink(self):
+        sink = profiler.create_sink("s3://bucket/profiles/api")
+        self.assertIsInstance(sink, profiler.S3Sink)
+        self.assertEqual((sink.bucket, sink._key("x")), ("bucket", "profiles/api/x"))
+        self.assertIsInstance(profiler.create_sink("/tmp/p"), profiler.LocalDirectorySink)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+event_handler QR 렌더링 테스트.
+
+형식마다 로고가 가리지 않는 모듈은 qrcode 행렬과 같아야 하고, 로고는 크기별로 한 번만
+열며, S3 클라이언트는 컨테이너(모듈)마다 하나만 만든다.
+"""
+import re
+import unittest
+import xml.etree.ElementTree as ElementTree
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+
+from helpers import load_handler
+
+DATA = "https://checkin.awskr.org/?c=0501ABC"
+
+
+class QrRendererTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.qr_code = load_handler("event_handler", "qr_code")
+
+    def _assert_modules(self, renderer, body: bytes, logo: bool):
+        matrix = renderer.matrix(DATA)
+        image = Image.open(BytesIO(body)).convert("L")
+        modules = len(matrix)
+        self.assertEqual(image.size, (modules * renderer.box_size,) * 2)
+        logo_box = range(modules * 3 // 8 - 1, modules * 5 // 8 + 1) if logo else range(0)
+        for y in range(modules):
+            for x in range(modules):
+                if x in logo_box and y in logo_box:
+                    continue
+                pixel = image.getpixel((x * renderer.box_size + renderer.box_size // 2, y * renderer.box_size + renderer.box_size // 2))
+                self.assertEqual(pixel < 128, matrix[y][x], (x, y))
+
+    def test_png_formats_match_matrix(self):
+        renderer = self.qr_code.QrRenderer()
+        for output_format, mode in (("png", "RGBA"), ("png-optimized", "P")):
+            with self.subTest(output_format=output_format):
+                rendered = renderer.render(DATA, output_format)
+                self.assertEqual(rendered.content_type, "image/png")
+                self.assertEqual(Image.open(BytesIO(rendered.body)).mode, mode)
+                self._assert_modules(renderer, rendered.body, logo=True)
+
+        plain = self.qr_code.QrRenderer(logo_path=None)
+        body = plain.render(DATA, "png-optimized").body
+        self.assertEqual(Image.open(BytesIO(body)).mode, "1")
+        self._assert_modules(plain, body, logo=False)
+        self.assertLess(len(body), len(renderer.render(DATA, "png").body))
+
+    def test_svg(self):
+        renderer = self.qr_code.QrRenderer()
+        rendered = renderer.render(DATA, "svg")
+        self.assertEqual(rendered.content_type, "image/svg+xml")
+        root = ElementTree.fromstring(rendered.body)
+        path = root.find("{http://www.w3.org/2000/svg}path").get("d")
+        # 가로 run의 폭 합이 검정 모듈 수와 같아야 한다.
+        runs = [int(width) for width in re.findall(r"h(\d+)v", path)]
+        self.assertEqual(sum(runs), sum(dark for row in renderer.matrix(DATA) for dark in row))
+        self.assertIsNotNone(root.find("{http://www.w3.org/2000/svg}image"))
+
+    def test_logo_is_prepared_once_per_size(self):
+        renderer = self.qr_code.QrRenderer()
+        with mock.patch.object(self.qr_code.Image, "open", wraps=Image.open) as image_open:
+            for output_format in ("png", "png", "png-optimized", "svg", "svg"):
+                renderer.render(DATA, output_format)
+        self.assertEqual(image_open.call_count, 1)
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.qr_code.QrRenderer().render(DATA, "gif")
+
+    def test_create_qr_code_reuses_s3_client(self):
+        import settings as settings_mod
+
+        s3 = mock.Mock()
+        with mock.patch.object(settings_mod.settings, "qr_s3_bucket_name", "qr-bucket"), \
+                mock.patch.object(settings_mod.settings, "client_url", "https://checkin.awskr.org"), \
+                mock.patch.object(self.qr_code, "_s3_client", None), \
+                mock.patch("boto3.client", return_value=s3) as boto3_client:
+            self.assertEqual(self.qr_code.create_qr_code("E1"), "https://qr-bucket.s3.amazonaws.com/E1.png")
+            self.assertEqual(self.qr_code.create_qr_code("E2", "svg"), "https://qr-bucket.s3.amazonaws.com/E2.svg")
+
+        self.assertEqual(boto3_client.call_count, 1)
+        self.assertEqual(
+            [(call.kwargs["Key"], call.kwargs["ContentType"]) for call in s3.put_object.call_args_list],
+            [("E1.png", "image/png"), ("E2.svg", "image/svg+xml")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+QR 비동기 생성 테스트.
+
+QR_RENDER_MODE=thread|queue면 POST /event는 결정된 qr_url과 qr_status='pending'으로 바로
+커밋하고, 워커(스레드 풀 또는 SQS 소비자)가 이미지를 올린 뒤 pending을 푼다. 커밋되지
+않은 이벤트는 워커에 넘기지 않는다. 재생성 작업은 오래된 pending 이벤트 중 S3 객체가
+없는 것만 다시 만든다.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, create_test_engine, load_handler, use_test_sessions
+
+
+class _NotFound(Exception):
+    response = {"Error": {"Code": "404"}}
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects: dict[str, bytes] = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+        return {}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        if Key not in self.objects:
+            raise _NotFound(Key)
+        return {}
+
+
+EVENT_BODY = {
+    "event_date_time": "2026-05-01T19:00:00",
+    "code_expired_at": "2026-05-01T22:00:00",
+    "description": "",
+    "event_name": "meetup",
+    "event_version": "1",
+    "organization_code": "AWSKRUG",
+}
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class QrWorkerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app, cls.qr_worker, cls.qr_code = load_handler("event_handler", "app", "qr_worker", "qr_code")
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+        self.Session = sessionmaker(bind=self.engine)
+        use_test_sessions(self, self.Session)
+
+        self.s3 = FakeS3()
+        for patcher in (
+            mock.patch.object(self.settings, "qr_s3_bucket_name", "qr-bucket"),
+            mock.patch.object(self.settings, "client_url", "https://checkin.awskr.org"),
+            mock.patch.object(self.settings, "qr_output_format", "png-optimized"),
+            mock.patch.object(self.qr_code, "_s3_client", self.s3),
+            mock.patch.object(self.qr_worker, "_dispatcher", None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _use_mode(self, mode: str, **settings):
+        for name, value in {"qr_render_mode": mode, **settings}.items():
+            patcher = mock.patch.object(self.settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _create_event(self) -> dict:
+        response = self.app.lambda_handler({"httpMethod": "POST", "resource": "/event", "body": json.dumps(EVENT_BODY)}, None)
+        self.assertEqual(response["statusCode"], 200, response["body"])
+        return json.loads(response["body"])
+
+    def _qr_status(self, event_code: str):
+        from model import Event
+        with self.Session() as session:
+            return session.get(Event, event_code).qr_status
+
+    def test_thread_mode_commits_pending_then_renders(self):
+        self._use_mode("thread", qr_render_workers=2)
+        body = self._create_event()
+        event_code = body["event_code"]
+        self.assertEqual(body["qr_status"], "pending")
+        self.assertEqual(body["qr_url"], f"https://qr-bucket.s3.amazonaws.com/{event_code}.png")
+
+        self.qr_worker.get_dispatcher().drain(timeout=30)
+        self.assertIsNone(self._qr_status(event_code))
+        self.assertIn(f"{event_code}.png", self.s3.objects)
+
+    def test_queue_mode_with_local_queue(self):
+        self._use_mode("queue", qr_render_queue_url="local")
+        queue = self.qr_worker.InMemoryQueue()
+        self.qr_worker._dispatcher = self.qr_worker.QueueQrDispatcher("local", client=queue)
+
+        event_code = self._create_event()["event_code"]
+        self.assertEqual(self._qr_status(event_code), "pending")
+        self.assertEqual(len(queue.messages), 1)
+        self.assertEqual(self.s3.objects, {})
+
+        # SQS 트리거처럼 event_handler에 레코드를 넘긴다.
+        bad = {"messageId": "bad", "body": "{}", "eventSource": "aws:sqs"}
+        response = self.app.lambda_handler({"Records": queue.messages + [bad]}, None)
+        self.assertEqual(response, {"batchItemFailures": [{"itemIdentifier": "bad"}]})
+        self.assertIsNone(self._qr_status(event_code))
+        self.assertIn(f"{event_code}.png", self.s3.objects)
+
+    def test_thread_mode_is_local_only(self):
+        import settings as settings_mod
+
+        self._use_mode("thread")
+        with mock.patch.dict("os.environ", {"AWS_LAMBDA_FUNCTION_NAME": "dev-event-handler"}):
+            with self.assertRaises(ValueError):
+                self.qr_worker.get_dispatcher()
+        # 렌더링 스레드와 요청이 커넥션 하나를 두고 다투는 조합은 설정에서 막는다.
+        with mock.patch.dict("os.environ", {"QR_RENDER_MODE": "thread", "DB_POOL_STRATEGY": "single"}):
+            with self.assertRaises(ValueError):
+                settings_mod.Settings()
+
+    def test_rolled_back_event_is_not_dispatched(self):
+        dispatcher = mock.Mock()
+        self._use_mode("thread")
+        self.qr_worker._dispatcher = dispatcher
+
+        with self.Session() as session:
+            self.app.EventContainer(session).service.create_event(self.app.EventRequest(**EVENT_BODY))
+            session.rollback()
+        dispatcher.submit.assert_not_called()
+
+        with self.Session() as session:
+            response = self.app.EventContainer(session).service.create_event(self.app.EventRequest(**EVENT_BODY))
+            session.commit()
+        dispatcher.submit.assert_called_once_with(response.event_code, "png-optimized")
+
+    def test_reconcile_regenerates_missing_images(self):
+        from sqlalchemy import func
+        from model import Event
+
+        now = datetime.now()
+        with self.Session() as session:
+            for code, age in (("MISSING", 3600), ("LANDED", 3600), ("RECENT", 10), ("READY", 3600)):
+                event = Event.create(
+                    code, now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG",
+                    qr_url=self.qr_code.qr_code_url(code), qr_status=None if code == "READY" else "pending"
+                )
+                # created_at은 DB 시계로 찍힌다(DSQL은 UTC, 앱은 KST일 수 있다). 나이도 DB 시계 기준으로 만든다.
+                event.created_at = func.current_timestamp() - timedelta(seconds=age)
+                session.add(event)
+            session.commit()
+        self.s3.objects["LANDED.png"] = b"png"
+
+        response = self.app.lambda_handler({"reconcile_qr": True}, None)
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(json.loads(response["body"]), {"checked": 2, "regenerated": 1, "present": 1, "failed": 0})
+        self.assertIn("MISSING.png", self.s3.objects)
+        self.assertEqual(
+            {code: self._qr_status(code) for code in ("MISSING", "LANDED", "RECENT", "READY")},
+            {"MISSING": None, "LANDED": None, "RECENT": "pending", "READY": None}
+        )
+
+        # event_codes를 주면 상태와 상관없이 그 이벤트의 객체를 확인한다.
+        response = self.app.lambda_handler({"reconcile_qr": {"event_codes": ["READY"]}}, None)
+        self.assertEqual(json.loads(response["body"])["regenerated"], 1)
+        self.assertIn("READY.png", self.s3.objects)
+
+
+if __name__ == "__main__":
+    unittest.main()
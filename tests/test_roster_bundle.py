@@ -0,0 +1,193 @@
+"""
+오프라인 로스터 번들 테스트.
+
+번들은 서명이 맞을 때만 읽혀야 하고, 검증기는 등록된 번호만 찾아야 한다.
+delta 번들은 첫 번들의 watermark 이후 등록을 더하고, 중간이 빠진 delta는 거절한다.
+event_handler의 GET /event/roster는 DB의 등록으로 이 번들을 만든다.
+"""
+import base64
+import json
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from helpers import TEST_DATABASE_URL, create_test_engine, load_handler, use_test_sessions
+
+import roster_bundle
+from roster_bundle import RosterBundleError, RosterBundleValidator, build_roster_bundle
+
+SECRET = b"k" * 32
+EVENT = SimpleNamespace(
+    event_code="E1", event_version="1", organization_code="AWSKRUG",
+    event_date_time=datetime(2026, 5, 1, 19), code_expired_at=datetime(2026, 5, 1, 22),
+)
+
+
+def _hash(phone: str) -> str:
+    import hashlib
+    return hashlib.sha256(("".join(filter(str.isdigit, phone)) + "salt").encode()).hexdigest()
+
+
+def _registration(phone: str, name, created_at: datetime):
+    return SimpleNamespace(phone=_hash(phone), name=name, created_at=created_at)
+
+
+class RosterBundleTest(unittest.TestCase):
+    T0 = datetime(2026, 4, 1, 10)
+
+    def _full(self):
+        registrations = [_registration(f"010-0000-{i:04d}", f"참가자{i}", self.T0 + timedelta(minutes=i)) for i in range(100)]
+        registrations.append(_registration("010-1111-1111", None, self.T0))
+        return build_roster_bundle(EVENT, registrations, SECRET)
+
+    def test_lookup(self):
+        validator = RosterBundleValidator(self._full(), SECRET, hash_phone=_hash)
+        self.assertEqual(len(validator), 101)
+        self.assertEqual(validator.lookup("010-0000-0042").name, "참가자42")
+        self.assertEqual(validator.lookup("01000000042").name, "참가자42")
+        self.assertIsNone(validator.lookup("010-1111-1111").name)
+        self.assertIsNone(validator.lookup("010-9999-9999"))
+        self.assertEqual(validator.watermark, (self.T0 + timedelta(minutes=99)).isoformat())
+        self.assertTrue(validator.is_open(datetime(2026, 5, 1, 21)))
+        self.assertFalse(validator.is_open(datetime(2026, 5, 1, 23)))
+
+    def test_rejects_tampered_or_foreign_bundles(self):
+        bundle = bytearray(self._full())
+        with self.assertRaises(RosterBundleError):
+            RosterBundleValidator(bytes(bundle), b"x" * 32, hash_phone=_hash)
+        bundle[40] ^= 1
+        with self.assertRaises(RosterBundleError):
+            RosterBundleValidator(bytes(bundle), SECRET, hash_phone=_hash)
+        with self.assertRaises(RosterBundleError):
+            RosterBundleValidator(b"RSTB", SECRET, hash_phone=_hash)
+
+    def test_delta(self):
+        validator = RosterBundleValidator(self._full(), SECRET, hash_phone=_hash)
+        since = datetime.fromisoformat(validator.watermark)
+        late = since + timedelta(minutes=5)
+        delta = build_roster_bundle(EVENT, [
+            _registration("010-0000-0099", "참가자99", since),  # overlap으로 다시 읽힌 등록
+            _registration("010-2222-2222", "현장등록", late),
+        ], SECRET, since=since, watermark=since)
+
+        with self.assertRaises(RosterBundleError):
+            RosterBundleValidator(delta, SECRET, hash_phone=_hash)
+        self.assertEqual(validator.apply_delta(delta), 1)
+        self.assertEqual(validator.lookup("010-2222-2222").name, "현장등록")
+        self.assertEqual(validator.watermark, late.isoformat())
+
+        # 빈 delta도 watermark를 되돌리지 않는다.
+        empty = build_roster_bundle(EVENT, [], SECRET, since=late, watermark=late)
+        self.assertEqual(validator.apply_delta(empty), 0)
+        self.assertEqual(validator.watermark, late.isoformat())
+
+        gap = build_roster_bundle(EVENT, [], SECRET, since=late + timedelta(hours=1))
+        with self.assertRaises(RosterBundleError):
+            validator.apply_delta(gap)
+        other = build_roster_bundle(SimpleNamespace(**{**vars(EVENT), "event_code": "E2"}), [], SECRET, since=late)
+        with self.assertRaises(RosterBundleError):
+            validator.apply_delta(other)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class RosterBundleExportTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = load_handler("event_handler", "app")
+        import settings as settings_mod
+        cls.settings = settings_mod.settings
+        cls.engine = create_test_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        from sqlalchemy.orm import sessionmaker
+        from model import Base, Event, EventRegistration
+        from hash_tool import hash_phone_number
+
+        patcher = mock.patch.object(self.settings, "salt", "test-salt")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+        self.Session = sessionmaker(bind=self.engine)
+        now = datetime.now()
+        with self.Session() as session:
+            session.add(Event.create("E1", now, "meetup", now + timedelta(hours=2), "1", "AWSKRUG"))
+            for i in range(3):
+                registration = EventRegistration.create("E1", hash_phone_number(f"0101234000{i}"), f"참가자{i}")
+                registration.created_at = now - timedelta(hours=1) + timedelta(minutes=i)
+                session.add(registration)
+            session.commit()
+        use_test_sessions(self, self.Session)
+
+    def _export(self, **params):
+        response = self.app.lambda_handler(
+            {"httpMethod": "GET", "resource": "/event/roster", "queryStringParameters": params}, None
+        )
+        return response["statusCode"], json.loads(response["body"])
+
+    def test_full_and_delta_export(self):
+        from hash_tool import derive_secret, hash_phone_number
+        from model import EventRegistration
+
+        status, body = self._export(event_code="E1")
+        self.assertEqual((status, body["kind"], body["count"]), (200, "full", 3))
+        validator = RosterBundleValidator(
+            base64.b64decode(body["bundle"]), derive_secret(roster_bundle.BUNDLE_SECRET_PURPOSE)
+        )
+        self.assertEqual(validator.lookup("010-1234-0001").name, "참가자1")
+        self.assertIsNone(validator.lookup("010-1234-0009"))
+        self.assertEqual(validator.watermark, body["watermark"])
+
+        with self.Session() as session:
+            session.add(EventRegistration.create("E1", hash_phone_number("01012340009"), "현장등록"))
+            session.commit()
+
+        status, body = self._export(event_code="E1", since=validator.watermark)
+        self.assertEqual((status, body["kind"]), (200, "delta"))
+        self.assertEqual(validator.apply_delta(base64.b64decode(body["bundle"])), 1)
+        self.assertEqual(validator.lookup("010-1234-0009").name, "현장등록")
+
+    def test_delta_includes_late_commit_within_transaction_length(self):
+        from hash_tool import derive_secret, hash_phone_number
+        from model import EventRegistration
+
+        body = self._export(event_code="E1")[1]
+        validator = RosterBundleValidator(
+            base64.b64decode(body["bundle"]), derive_secret(roster_bundle.BUNDLE_SECRET_PURPOSE)
+        )
+        # 워터마크보다 4분 먼저 시작한 업로드 트랜잭션이 full 번들 이후에 커밋됐다.
+        with self.Session() as session:
+            registration = EventRegistration.create("E1", hash_phone_number("01012340008"), "늦은커밋")
+            registration.created_at = datetime.fromisoformat(validator.watermark) - timedelta(minutes=4)
+            session.add(registration)
+            session.commit()
+
+        status, body = self._export(event_code="E1", since=validator.watermark)
+        self.assertEqual(status, 200)
+        # overlap 구간에는 full 번들의 3명도 다시 들어간다. count는 번들 헤더와 같아야 한다.
+        _, header, _ = roster_bundle.read_roster_bundle(
+            base64.b64decode(body["bundle"]), derive_secret(roster_bundle.BUNDLE_SECRET_PURPOSE)
+        )
+        self.assertEqual(body["count"], header.count)
+        validator.apply_delta(base64.b64decode(body["bundle"]))
+        self.assertEqual(validator.lookup("010-1234-0008").name, "늦은커밋")
+
+    def test_unknown_event(self):
+        self.assertEqual(self._export(event_code="NOPE")[0], 404)
+
+    def test_invalid_query(self):
+        for params in ({}, {"event_code": ""}, {"event_code": "E1", "since": "어제"}):
+            with self.subTest(params=params):
+                self.assertEqual(self._export(**params)[0], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
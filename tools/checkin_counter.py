@@ -0,0 +1,196 @@
+"""
+checkin_counter rollup maintenance
+
+checkin_counter는 체크인 INSERT와 같은 트랜잭션에서 증가하지만, 이 코드 경로 밖에서
+event_check_in이 바뀌면(마이그레이션, 관리자 삭제 등) 어긋날 수 있다.
+
+    python tools/checkin_counter.py rebuild [--max-rows 2500]
+    python tools/checkin_counter.py check [--fix]
+
+DATABASE_URL(SQLAlchemy URL)이 있으면 그 DB에, 없으면 common_layer의
+db_connection(DSQL IAM 인증, settings 환경 변수)으로 접속한다. 배치마다
+db_connection.run_transaction으로 커밋하므로 OCC 충돌은 그 배치만 다시 실행한다.
+"""
+import argparse
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common_layer"))
+
+from sqlalchemy import text, bindparam  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from db_connection import run_transaction  # noqa: E402
+
+# DSQL은 트랜잭션당 변경 행 수에 상한(3,000)이 있다. phone 하나가 카운터 여러 행
+# (organization_code, event_version, year)으로 펼쳐지므로, 배치는 phone 수가 아니라
+# 지울 행 + 넣을 행 수로 자른다.
+DEFAULT_MAX_ROWS = 2500
+
+_EXPECTED_COUNTS_SQL = """
+    SELECT
+        phone,
+        organization_code,
+        event_version,
+        CAST(EXTRACT(YEAR FROM checked_at) AS INTEGER) AS year,
+        COUNT(*) AS checkin_count
+    FROM event_check_in
+    {where}
+    GROUP BY phone, organization_code, event_version, CAST(EXTRACT(YEAR FROM checked_at) AS INTEGER)
+"""
+
+# phone별로 재계산이 바꾸는 행 수(기존 카운터 행 DELETE + 새 카운터 행 INSERT)
+_PHONE_ROWS_SQL = """
+    SELECT phone, SUM(row_count) AS row_count
+    FROM (
+        SELECT phone, COUNT(*) AS row_count FROM checkin_counter {where} GROUP BY phone
+        UNION ALL
+        SELECT phone, COUNT(*) AS row_count FROM ({expected}) AS expected GROUP BY phone
+    ) AS changed
+    GROUP BY phone
+    ORDER BY phone
+"""
+
+_ALL_PHONE_ROWS_SQL = text(_PHONE_ROWS_SQL.format(where="", expected=_EXPECTED_COUNTS_SQL.format(where="")))
+
+_SELECTED_PHONE_ROWS_SQL = text(_PHONE_ROWS_SQL.format(
+    where="WHERE phone IN :phones",
+    expected=_EXPECTED_COUNTS_SQL.format(where="WHERE phone IN :phones")
+)).bindparams(bindparam("phones", expanding=True))
+
+_DELETE_COUNTERS_SQL = text(
+    "DELETE FROM checkin_counter WHERE phone IN :phones"
+).bindparams(bindparam("phones", expanding=True))
+
+_INSERT_COUNTERS_SQL = text(f"""
+    INSERT INTO checkin_counter (phone, organization_code, event_version, year, checkin_count)
+    {_EXPECTED_COUNTS_SQL.format(where="WHERE phone IN :phones")}
+""").bindparams(bindparam("phones", expanding=True))
+
+_MISMATCH_SQL = text(f"""
+    WITH expected AS ({_EXPECTED_COUNTS_SQL.format(where="")})
+    SELECT
+        COALESCE(e.phone, c.phone) AS phone,
+        COALESCE(e.organization_code, c.organization_code) AS organization_code,
+        COALESCE(e.event_version, c.event_version) AS event_version,
+        COALESCE(e.year, c.year) AS year,
+        COALESCE(e.checkin_count, 0) AS expected,
+        COALESCE(c.checkin_count, 0) AS actual
+    FROM expected e
+    FULL OUTER JOIN checkin_counter c
+        ON c.phone = e.phone
+       AND c.organization_code = e.organization_code
+       AND c.event_version = e.event_version
+       AND c.year = e.year
+    WHERE COALESCE(e.checkin_count, 0) <> COALESCE(c.checkin_count, 0)
+    ORDER BY 1, 2, 3, 4
+""")
+
+
+@dataclass
+class CounterMismatch:
+    phone: str
+    organization_code: str
+    event_version: str
+    year: int
+    expected: int
+    actual: int
+
+
+def rebuild_phones(session: Session, phones: list[str]) -> None:
+    """
+    주어진 phone들의 카운터를 event_check_in 기준으로 다시 만든다. commit은 하지 않으므로
+    run_transaction의 work로 쓴다.
+    """
+    if not phones:
+        return
+    session.execute(_DELETE_COUNTERS_SQL, {"phones": phones})
+    session.execute(_INSERT_COUNTERS_SQL, {"phones": phones})
+
+
+def plan_batches(phone_rows: list[tuple[str, int]], max_rows: int = DEFAULT_MAX_ROWS) -> list[list[str]]:
+    """
+    (phone, 바뀌는 행 수)를 순서대로 묶어 배치마다 행 수 합이 max_rows를 넘지 않게 한다.
+    phone 하나가 max_rows보다 크면 나눌 수 없으므로 혼자 한 배치가 된다.
+    """
+    batches: list[list[str]] = []
+    batch: list[str] = []
+    batch_rows = 0
+    for phone, row_count in phone_rows:
+        if batch and batch_rows + row_count > max_rows:
+            batches.append(batch)
+            batch, batch_rows = [], 0
+        batch.append(phone)
+        batch_rows += row_count
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def rebuild_checkin_counter(phones: Optional[list[str]] = None, max_rows: int = DEFAULT_MAX_ROWS) -> int:
+    """
+    checkin_counter를(phones가 있으면 그 phone들만) 재계산하고 처리한 phone 수를 돌려준다.
+    배치마다 따로 커밋한다.
+    """
+    def _phone_rows(session: Session) -> list[tuple[str, int]]:
+        if phones is None:
+            rows = session.execute(_ALL_PHONE_ROWS_SQL)
+        else:
+            rows = session.execute(_SELECTED_PHONE_ROWS_SQL, {"phones": phones})
+        return [(row.phone, row.row_count) for row in rows]
+
+    phone_rows = run_transaction(_phone_rows)
+    for batch in plan_batches(phone_rows, max_rows):
+        run_transaction(lambda session: rebuild_phones(session, batch))
+    return len(phone_rows)
+
+
+def find_counter_mismatches(session: Session) -> list[CounterMismatch]:
+    """event_check_in 집계와 checkin_counter가 다른 (phone, organization_code, event_version, year)를 찾는다."""
+    return [CounterMismatch(**row._asdict()) for row in session.execute(_MISMATCH_SQL)]
+
+
+def _use_database_url() -> None:
+    database_url = os.environ.get("DATABASE_URL")
+    if database_url:
+        import db_connection
+        from sqlalchemy import create_engine
+        db_connection.use_engine(create_engine(database_url))
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="checkin_counter rebuild / consistency check")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_parser = subparsers.add_parser("rebuild", help="event_check_in에서 카운터 전체 재계산")
+    rebuild_parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS, help="배치(트랜잭션)당 바꾸는 최대 행 수")
+
+    check_parser = subparsers.add_parser("check", help="카운터와 event_check_in 집계 비교")
+    check_parser.add_argument("--fix", action="store_true", help="어긋난 phone만 재계산")
+
+    args = parser.parse_args(argv)
+
+    _use_database_url()
+    if args.command == "rebuild":
+        count = rebuild_checkin_counter(max_rows=args.max_rows)
+        print(f"Rebuilt checkin_counter for {count} phones")
+        return 0
+
+    mismatches = run_transaction(find_counter_mismatches)
+    for m in mismatches:
+        print(f"{m.phone} {m.organization_code} {m.event_version} {m.year}: expected={m.expected} actual={m.actual}")
+    if not mismatches:
+        print("checkin_counter is consistent")
+        return 0
+
+    if args.fix:
+        count = rebuild_checkin_counter(sorted({m.phone for m in mismatches}))
+        print(f"Rebuilt checkin_counter for {count} phones")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
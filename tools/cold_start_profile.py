@@ -0,0 +1,138 @@
+"""
+Lambda cold start import profile
+
+새 인터프리터에서 핸들러 모듈(app)을 `python -X importtime`으로 import해서 모듈별
+import 시간을 보여주고, 예산을 넘거나 체크인 경로에서 빠져야 할 모듈(boto3 등)이
+다시 들어오면 exit 1로 실패한다. CI에서 콜드 스타트 회귀를 막는 용도다.
+
+    python tools/cold_start_profile.py [--handler api_handler] [--runs 3] [--top 15]
+                                       [--budget-ms 1000] [--forbid boto3 s3transfer]
+                                       [--with-init]
+
+--with-init이면 Lambda 환경 변수(AWS_LAMBDA_FUNCTION_NAME 등)를 흉내 내 init 단계
+(엔진/다이얼렉트, DSQL 클라이언트 생성)까지 포함해서 잰다. 커넥션은 열지 않는다.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 체크인 경로가 쓰지 않는 무거운 모듈. 다시 import되면 예산과 무관하게 실패한다.
+DEFAULT_FORBIDDEN = {
+    "api_handler": ("boto3", "s3transfer", "core_repository"),
+}
+DEFAULT_BUDGET_MS = 1000
+
+_LAMBDA_ENV = {
+    "AWS_LAMBDA_FUNCTION_NAME": "cold-start-profile",
+    "REGION": "ap-northeast-2",
+    "CLUSTER_ENDPOINT": "profile.dsql.ap-northeast-2.on.aws",
+    "DB_USER": "admin",
+    "DB_NAME": "postgres",
+    "AWS_ACCESS_KEY_ID": "profile",
+    "AWS_SECRET_ACCESS_KEY": "profile",
+}
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    records: list[ImportRecord]
+
+    @property
+    def total_ms(self) -> float:
+        return sum(record.self_us for record in self.records) / 1000
+
+    @property
+    def modules(self) -> set[str]:
+        return {record.module for record in self.records}
+
+    def top_level_packages(self) -> set[str]:
+        return {module.split(".")[0] for module in self.modules}
+
+    def slowest(self, count: int) -> list[ImportRecord]:
+        return sorted(self.records, key=lambda record: record.cumulative_us, reverse=True)[:count]
+
+
+def parse_importtime(stderr: str) -> ImportProfile:
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        records.append(ImportRecord(
+            module=name.strip(),
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=(len(name) - len(name.lstrip())) // 2,
+        ))
+    return ImportProfile(records)
+
+
+def profile_imports(handler: str = "api_handler", module: str = "app", with_init: bool = False) -> ImportProfile:
+    """handler 디렉터리와 common_layer만 경로에 둔 새 인터프리터에서 module을 import한다."""
+    env = {key: value for key, value in os.environ.items() if key != "AWS_LAMBDA_FUNCTION_NAME"}
+    env["PYTHONPATH"] = os.pathsep.join([os.path.join(REPO_ROOT, handler), os.path.join(REPO_ROOT, "common_layer")])
+    if with_init:
+        env.update(_LAMBDA_ENV)
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.join(REPO_ROOT, handler),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{handler}/{module} import 실패:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Lambda 핸들러 콜드 스타트 import 시간 프로파일")
+    parser.add_argument("--handler", default="api_handler")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=3, help="측정 횟수(중앙값을 예산과 비교)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--forbid", nargs="*", default=None, help="import되면 실패할 최상위 모듈")
+    parser.add_argument("--with-init", action="store_true", help="Lambda init 단계까지 포함")
+    args = parser.parse_args(argv)
+
+    forbidden = args.forbid if args.forbid is not None else DEFAULT_FORBIDDEN.get(args.handler, ())
+    profiles = [profile_imports(args.handler, args.module, args.with_init) for _ in range(args.runs)]
+    totals = [profile.total_ms for profile in profiles]
+    median_ms = statistics.median(totals)
+    profile = min(profiles, key=lambda p: abs(p.total_ms - median_ms))
+
+    print(f"{args.handler}/{args.module}: {len(profile.records)} modules, "
+          f"import {median_ms:.1f}ms (median of {args.runs}: {', '.join(f'{t:.1f}' for t in totals)})")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for record in profile.slowest(args.top):
+        print(f"{record.cumulative_us / 1000:>14.1f} {record.self_us / 1000:>9.1f}  {'  ' * record.depth}{record.module}")
+
+    failures = []
+    present = sorted(set(forbidden) & (profile.top_level_packages() | profile.modules))
+    if present:
+        failures.append(f"체크인 경로에서 빠져야 할 모듈이 import됨: {', '.join(present)}")
+    if median_ms > args.budget_ms:
+        failures.append(f"import 시간 {median_ms:.1f}ms가 예산 {args.budget_ms:.0f}ms를 넘음")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+"""
+Offline load test harness
+
+api_handler/event_handler의 lambda_handler를 API Gateway 형식의 이벤트로 직접 불러서
+라우트별 p50/p95/p99 지연, 처리량, 요청당 SQL 문장 수를 잰다. DSQL 대신 로컬
+PostgreSQL을 쓰고, S3/DynamoDB는 프로세스 안의 가짜 클라이언트로 바꾼다.
+
+    DATABASE_URL=postgresql+psycopg://postgres@localhost/loadtest \\
+        python tools/load_test.py [--requests 2000] [--concurrency 8] [--pool thread|process]
+                                  [--mix check=80,checkin_info=10,check_batch=2,event_list=5,event_create=3]
+                                  [--events events.jsonl] [--baseline base.json] [--save-baseline base.json]
+
+--events를 주면 JSONL 한 줄마다 {"handler": "api_handler", "event": {...}} 또는 API Gateway
+이벤트 하나를 그대로 재생한다(/event로 시작하는 경로는 event_handler). 없으면 --mix 비율로
+합성한다. 지연은 각 호출의 EMF 레코드(metrics)의 Duration, SQL 수는 SqlStatements다.
+
+--pool thread는 한 프로세스의 스레드들이 캐시와 커넥션 풀을 공유하고, --pool process는
+워커 프로세스마다 핸들러를 따로 올려 Lambda 컨테이너 여러 개에 가깝게 돈다.
+--baseline과 비교해 p95나 요청당 SQL 수가 --max-regression 넘게 늘면 exit 1이다.
+
+시작할 때 모든 테이블을 지우고 다시 만든다. 부하 테스트 전용 로컬 DB에만 돌린다.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "common_layer"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import db_connection  # noqa: E402
+import metrics  # noqa: E402
+from settings import settings  # noqa: E402
+
+HANDLERS = ("api_handler", "event_handler")
+DEFAULT_MIX = "check=80,checkin_info=10,check_batch=2,event_list=5,event_create=3"
+ORGANIZATION_CODE = "LOADTEST"
+ORGANIZATION_SLUG = "loadtest"
+BATCH_SIZE = 20
+
+
+class FakeS3Client:
+    def __init__(self):
+        self.objects: dict[tuple[str, str], bytes] = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+        return {}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        return {"Body": _Body(self.objects[(Bucket, Key)])}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self.objects.pop((Bucket, Key), None)
+        return {}
+
+
+class _Body:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+
+class FakeDynamoDBTable:
+    def __init__(self):
+        self.items: dict[str, dict] = {}
+
+    def put_item(self, Item, **kwargs):
+        self.items[json.dumps(Item, sort_keys=True, default=str)] = Item
+        return {}
+
+    def get_item(self, Key, **kwargs):
+        for item in self.items.values():
+            if all(item.get(k) == v for k, v in Key.items()):
+                return {"Item": item}
+        return {}
+
+
+class FakeDynamoDB:
+    def __init__(self):
+        self.tables: dict[str, FakeDynamoDBTable] = {}
+
+    def Table(self, name):
+        return self.tables.setdefault(name, FakeDynamoDBTable())
+
+
+class FakeAws:
+    """boto3.client/boto3.resource 자리에 들어가는 프로세스 내부 가짜 AWS."""
+
+    def __init__(self):
+        self.s3 = FakeS3Client()
+        self.dynamodb = FakeDynamoDB()
+
+    def client(self, service_name, *args, **kwargs):
+        if service_name == "s3":
+            return self.s3
+        raise NotImplementedError(f"fake boto3 client '{service_name}'")
+
+    def resource(self, service_name, *args, **kwargs):
+        if service_name == "dynamodb":
+            return self.dynamodb
+        raise NotImplementedError(f"fake boto3 resource '{service_name}'")
+
+    def install(self) -> None:
+        mock.patch("boto3.client", self.client).start()
+        mock.patch("boto3.resource", self.resource).start()
+
+
+def load_handler_app(handler: str):
+    """
+    handler 디렉터리의 모듈을 모두 import하고 app 모듈을 돌려준다. 핸들러끼리 모듈 이름
+    (app, service, repository ...)이 겹치므로, 지연 import까지 미리 끝내 두고 경로를 치운다.
+    """
+    directory = os.path.join(REPO_ROOT, handler)
+    names = sorted(name[:-3] for name in os.listdir(directory) if name.endswith(".py") and name != "__init__.py")
+    for name in names:
+        sys.modules.pop(name, None)
+    sys.path.insert(0, directory)
+    try:
+        for name in names:
+            if name != "app":
+                importlib.import_module(name)
+        return importlib.import_module("app")
+    finally:
+        sys.path.remove(directory)
+
+
+@dataclass
+class Seed:
+    event_codes: list[str]
+    phones: list[str]
+
+
+def seed_database(url: str, events: int, registrants: int) -> Seed:
+    from hash_tool import hash_phone_number
+    from model import Base, Event, EventOrganization, EventRegistration
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    now = datetime.now()
+    event_codes = [f"LT{i:03d}" for i in range(events)]
+    phones = [f"010-7{i // 10000:03d}-{i % 10000:04d}" for i in range(registrants)]
+    with Session() as session:
+        organization = EventOrganization.create(ORGANIZATION_CODE, ORGANIZATION_CODE, "logo", ["1"])
+        organization.slug = ORGANIZATION_SLUG
+        session.add(organization)
+        for code in event_codes:
+            session.add(Event.create(code, now, "load test", now + timedelta(hours=6), "1", ORGANIZATION_CODE))
+            session.add_all(
+                EventRegistration.create(code, hash_phone_number(phone.replace("-", "")), "부하테스트")
+                for phone in phones
+            )
+        session.commit()
+    engine.dispose()
+    return Seed(event_codes=event_codes, phones=phones)
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in _GENERATORS:
+            raise ValueError(f"알 수 없는 요청 종류입니다: {name} (가능: {', '.join(_GENERATORS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _api(method: str, path: str, body: Optional[dict] = None, query: Optional[dict] = None) -> dict:
+    return {
+        "httpMethod": method,
+        "path": path,
+        "resource": path,
+        "headers": {"Content-Type": "application/json"},
+        "queryStringParameters": query,
+        "body": json.dumps(body) if body is not None else None,
+    }
+
+
+def _phone(seed: Seed, rng: random.Random) -> str:
+    # 5%는 로스터에 없는 번호(오타)다.
+    if rng.random() < 0.05:
+        return f"010-6{rng.randrange(1000):03d}-{rng.randrange(10000):04d}"
+    return rng.choice(seed.phones)
+
+
+_GENERATORS = {
+    "check": lambda seed, rng: ("api_handler", _api(
+        "POST", "/check", {"event_code": rng.choice(seed.event_codes), "phone": _phone(seed, rng)}
+    )),
+    "checkin_info": lambda seed, rng: ("api_handler", _api(
+        "GET", "/checkin/info", query={"phone": rng.choice(seed.phones), "slug": ORGANIZATION_SLUG}
+    )),
+    "check_batch": lambda seed, rng: ("api_handler", _api("POST", "/check/batch", {"items": [
+        {"event_code": rng.choice(seed.event_codes), "phone": _phone(seed, rng)} for _ in range(BATCH_SIZE)
+    ]})),
+    "event_list": lambda seed, rng: ("event_handler", _api("GET", "/event")),
+    "event_create": lambda seed, rng: ("event_handler", _api("POST", "/event", {
+        "event_date_time": (datetime.now() + timedelta(days=7)).isoformat(),
+        "code_expired_at": (datetime.now() + timedelta(days=7, hours=3)).isoformat(),
+        "description": "load test",
+        "event_name": "load test",
+        "event_version": "1",
+        "organization_code": ORGANIZATION_CODE,
+    })),
+}
+
+
+def generate_requests(seed: Seed, count: int, mix: dict[str, float], rng: random.Random) -> list[tuple[str, dict]]:
+    kinds, weights = zip(*mix.items())
+    return [_GENERATORS[kind](seed, rng) for kind in rng.choices(kinds, weights=weights, k=count)]
+
+
+def load_events_file(path: str) -> list[tuple[str, dict]]:
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "event" in record and "handler" in record:
+                requests.append((record["handler"], record["event"]))
+            else:
+                route = record.get("resource") or record.get("path") or ""
+                requests.append(("event_handler" if route.startswith("/event") else "api_handler", record))
+    return requests
+
+
+_apps: dict = {}
+
+
+def _prepare_process(engine) -> None:
+    """현재 프로세스에서 핸들러를 올리고 로컬 DB와 가짜 AWS를 쓰게 한다."""
+    settings.salt = settings.salt or "load-test-salt"
+    settings.metrics_enabled = True
+    settings.qr_s3_bucket_name = settings.qr_s3_bucket_name or "load-test-qr"
+    FakeAws().install()
+    db_connection.use_engine(engine)
+    for handler in HANDLERS:
+        _apps[handler] = load_handler_app(handler)
+
+
+def _init_worker(url: str) -> None:
+    _prepare_process(db_connection.create_pooled_engine(url, "single"))
+
+
+def _invoke(request: tuple[str, dict]) -> None:
+    handler, event = request
+    _apps[handler].lambda_handler(event, None)
+
+
+def _run_chunk(chunk: list[tuple[str, dict]]) -> list[dict]:
+    with metrics.capture() as records:
+        for request in chunk:
+            _invoke(request)
+    return records
+
+
+def run_load(url: str, requests: list[tuple[str, dict]], concurrency: int, pool: str) -> tuple[list[dict], float]:
+    """요청을 concurrency개 워커로 돌리고 (EMF 레코드, 벽시계 초)를 돌려준다."""
+    if pool == "process":
+        # 워커당 여러 청크로 나눠 느린 워커 하나가 끝을 붙잡지 않게 한다.
+        chunks = [requests[i::concurrency * 4] for i in range(concurrency * 4)]
+        with ProcessPoolExecutor(max_workers=concurrency, initializer=_init_worker, initargs=(url,)) as executor:
+            started = time.perf_counter()
+            records = [record for chunk in executor.map(_run_chunk, chunks) for record in chunk]
+            return records, time.perf_counter() - started
+
+    engine = db_connection.instrument_engine(create_engine(url, pool_size=concurrency, max_overflow=0))
+    _prepare_process(engine)
+    try:
+        with metrics.capture() as records, ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started = time.perf_counter()
+            list(executor.map(_invoke, requests))
+            wall = time.perf_counter() - started
+        return records, wall
+    finally:
+        engine.dispose()
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+@dataclass
+class RouteStats:
+    requests: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    sql_per_request: float
+
+
+@dataclass
+class LoadTestReport:
+    requests: int
+    concurrency: int
+    pool: str
+    wall_seconds: float
+    throughput_rps: float
+    routes: dict[str, RouteStats] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.requests} requests, concurrency={self.concurrency} ({self.pool}), "
+            f"{self.wall_seconds:.2f}s, {self.throughput_rps:.1f} req/s",
+            f"{'route':<20} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql/req':>8}",
+        ]
+        for route, stats in sorted(self.routes.items()):
+            lines.append(
+                f"{route:<20} {stats.requests:>8} {stats.errors:>6} {stats.p50_ms:>8.2f} "
+                f"{stats.p95_ms:>8.2f} {stats.p99_ms:>8.2f} {stats.sql_per_request:>8.2f}"
+            )
+        return "\n".join(lines)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LoadTestReport":
+        routes = {route: RouteStats(**stats) for route, stats in data.pop("routes").items()}
+        return cls(**data, routes=routes)
+
+
+def summarize(records: list[dict], wall_seconds: float, concurrency: int, pool: str) -> LoadTestReport:
+    by_route: dict[str, list[dict]] = {}
+    for record in records:
+        by_route.setdefault(record["Route"], []).append(record)
+
+    routes = {}
+    for route, route_records in by_route.items():
+        durations = [record["Duration"] for record in route_records]
+        routes[route] = RouteStats(
+            requests=len(route_records),
+            errors=sum(1 for record in route_records if record.get("StatusCode", 500) >= 500),
+            p50_ms=round(_percentile(durations, 0.50), 3),
+            p95_ms=round(_percentile(durations, 0.95), 3),
+            p99_ms=round(_percentile(durations, 0.99), 3),
+            sql_per_request=round(statistics.mean(record.get("SqlStatements", 0) for record in route_records), 3),
+        )
+    return LoadTestReport(
+        requests=len(records),
+        concurrency=concurrency,
+        pool=pool,
+        wall_seconds=round(wall_seconds, 3),
+        throughput_rps=round(len(records) / wall_seconds, 1) if wall_seconds else 0.0,
+        routes=routes,
+    )
+
+
+def compare(report: LoadTestReport, baseline: LoadTestReport, max_regression: float) -> list[str]:
+    """baseline보다 max_regression(비율) 넘게 나빠진 항목을 돌려준다."""
+    regressions = []
+    for route, stats in report.routes.items():
+        base = baseline.routes.get(route)
+        if base is None:
+            continue
+        if base.p95_ms and stats.p95_ms > base.p95_ms * (1 + max_regression):
+            regressions.append(f"{route} p95 {base.p95_ms:.2f}ms -> {stats.p95_ms:.2f}ms")
+        if stats.sql_per_request > base.sql_per_request * (1 + max_regression):
+            regressions.append(f"{route} sql/req {base.sql_per_request:.2f} -> {stats.sql_per_request:.2f}")
+        if stats.errors > base.errors:
+            regressions.append(f"{route} errors {base.errors} -> {stats.errors}")
+    if baseline.throughput_rps and report.throughput_rps < baseline.throughput_rps / (1 + max_regression):
+        regressions.append(f"throughput {baseline.throughput_rps:.1f} -> {report.throughput_rps:.1f} req/s")
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="api_handler/event_handler 로컬 부하 테스트")
+    parser.add_argument("--url", default=os.environ.get("DATABASE_URL"), help="SQLAlchemy URL (기본: DATABASE_URL)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pool", choices=("thread", "process"), default="thread")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--events", help="재생할 API Gateway 이벤트 JSONL")
+    parser.add_argument("--seed-events", type=int, default=3)
+    parser.add_argument("--seed-registrants", type=int, default=2000)
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--save-baseline", help="이번 결과를 JSON으로 저장")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        parser.error("--url 또는 DATABASE_URL이 필요합니다")
+
+    settings.salt = settings.salt or "load-test-salt"
+    seed = seed_database(args.url, args.seed_events, args.seed_registrants)
+    if args.events:
+        requests = load_events_file(args.events)
+    else:
+        requests = generate_requests(seed, args.requests, parse_mix(args.mix), random.Random(args.random_seed))
+
+    records, wall_seconds = run_load(args.url, requests, args.concurrency, args.pool)
+    report = summarize(records, wall_seconds, args.concurrency, args.pool)
+    print(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(asdict(report), f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = LoadTestReport.from_dict(json.load(f))
+        regressions = compare(report, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@
 -- Migration from DynamoDB to AWS DSQL
 
 -- Drop tables if they exist
+DROP TABLE IF EXISTS idempotency_record;
+DROP TABLE IF EXISTS checkin_counter;
 DROP TABLE IF EXISTS event_check_in;
 DROP TABLE IF EXISTS event_registration;
 DROP TABLE IF EXISTS event;
@@ -27,6 +29,7 @@ CREATE TABLE event (
     description TEXT NULL,
     event_name VARCHAR(255) NOT NULL,
     qr_url TEXT NULL,
+    qr_status VARCHAR(20) NULL,
     code_expired_at TIMESTAMP NOT NULL,
     event_version VARCHAR(50) NOT NULL,
     organization_code VARCHAR(100) NOT NULL,
@@ -38,6 +41,10 @@ CREATE TABLE event (
 CREATE INDEX idx_event_date_time ON event(event_date_time);
 CREATE INDEX idx_event_organization_code ON event(organization_code);
 CREATE INDEX idx_event_code_expired_at ON event(code_expired_at);
+-- Event listing version (count, max(updated_at)) as an index-only scan
+CREATE INDEX idx_event_org_date_time_expired_updated ON event(organization_code, event_date_time, code_expired_at, updated_at);
+-- Events whose QR image is still being rendered (QR_RENDER_MODE=thread|queue)
+CREATE INDEX idx_event_qr_status_created_at ON event(qr_status, created_at);
 
 -- Event Registration Table
 CREATE TABLE event_registration (
@@ -51,6 +58,7 @@ CREATE TABLE event_registration (
 
 -- Indexes for Event Registration table
 CREATE INDEX idx_registration_phone ON event_registration(phone);
+CREATE INDEX idx_registration_event_created_at ON event_registration(event_code, created_at);
 
 -- Event Check-In Table
 -- Denormalized organization_code for statistics (event_name via JOIN)
@@ -70,12 +78,42 @@ CREATE INDEX idx_checkin_event_code ON event_check_in(event_code);
 CREATE INDEX idx_checkin_checked_at ON event_check_in(checked_at);
 CREATE INDEX idx_checkin_organization_code ON event_check_in(organization_code);
 CREATE INDEX idx_checkin_org_version ON event_check_in(organization_code, event_version);
+-- Per-phone count queries (this-year range, organization/version range)
+CREATE INDEX idx_checkin_phone_checked_at ON event_check_in(phone, checked_at);
+CREATE INDEX idx_checkin_phone_org_version_checked_at ON event_check_in(phone, organization_code, event_version, checked_at);
+
+-- Check-In Counter Table
+-- Rollup of event_check_in per (phone, organization_code, event_version, year).
+-- Incremented with every check-in insert; rebuild with tools/checkin_counter.py
+CREATE TABLE checkin_counter (
+    phone VARCHAR(255) NOT NULL,
+    organization_code VARCHAR(100) NOT NULL,
+    event_version VARCHAR(50) NOT NULL,
+    year INTEGER NOT NULL,
+    checkin_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (phone, organization_code, event_version, year)
+);
+
+-- Idempotency Record Table
+-- Completed POST /check responses keyed by the Idempotency-Key header.
+-- Rows past expires_at are ignored; delete them periodically in batches.
+CREATE TABLE idempotency_record (
+    idempotency_key VARCHAR(255) PRIMARY KEY,
+    request_hash VARCHAR(64) NOT NULL,
+    response_body TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX idx_idempotency_expires_at ON idempotency_record(expires_at);
 
 -- Comments for documentation
 COMMENT ON TABLE event_organization IS 'Stores organization information';
 COMMENT ON TABLE event IS 'Stores event information';
 COMMENT ON TABLE event_registration IS 'Stores event registration records';
 COMMENT ON TABLE event_check_in IS 'Stores event check-in records';
+COMMENT ON TABLE checkin_counter IS 'Per-attendee check-in count rollup of event_check_in';
+COMMENT ON TABLE idempotency_record IS 'Replayable POST /check responses keyed by Idempotency-Key';
 
 COMMENT ON COLUMN event.qr_url IS 'CloudFront URL for QR code';
 COMMENT ON COLUMN event.code_expired_at IS 'Expiration time for event code';
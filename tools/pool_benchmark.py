@@ -0,0 +1,123 @@
+"""
+DB_POOL_STRATEGY benchmark
+
+Lambda 요청 하나를 "커넥션 체크아웃 → 짧은 트랜잭션 → 반납"으로 흉내 내서, 전략별
+체크아웃 지연과 실제로 맺은 물리 커넥션 수, 검증(ping)으로 나간 왕복 수를 잰다.
+
+    DATABASE_URL=postgresql+psycopg://postgres@localhost/postgres \\
+        python tools/pool_benchmark.py [--requests 500] [--idle-every 50 --idle-seconds 1.5]
+
+--idle-every N이면 N번째 요청마다 idle-seconds만큼 쉬어서, single 전략의 유휴 검증
+(--validate-idle-seconds)이 실제로 동작하는 경우도 함께 측정한다.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common_layer"))
+
+from sqlalchemy import event, text  # noqa: E402
+
+from db_connection import POOL_STRATEGIES, create_pooled_engine  # noqa: E402
+
+
+@dataclass
+class PoolBenchmarkResult:
+    strategy: str
+    requests: int
+    connects: int
+    pings: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.strategy:<7} requests={self.requests} connects={self.connects} pings={self.pings} "
+            f"checkout p50={self.p50_ms:.3f}ms p95={self.p95_ms:.3f}ms max={self.max_ms:.3f}ms"
+        )
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_benchmark(
+    url: str,
+    strategy: str,
+    requests: int,
+    idle_every: int = 0,
+    idle_seconds: float = 0,
+    validate_idle_seconds: float = 1
+) -> PoolBenchmarkResult:
+    engine = create_pooled_engine(url, strategy, validate_idle_seconds=validate_idle_seconds)
+    counts = {"connects": 0, "pings": 0}
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(*args):
+        counts["connects"] += 1
+
+    # pre-ping(queue)과 유휴 검증(single)은 모두 dialect.do_ping으로 나간다.
+    do_ping = engine.dialect.do_ping
+
+    def _counting_ping(dbapi_connection):
+        counts["pings"] += 1
+        return do_ping(dbapi_connection)
+
+    engine.dialect.do_ping = _counting_ping
+
+    latencies = []
+    try:
+        for i in range(requests):
+            if idle_every and i and i % idle_every == 0:
+                time.sleep(idle_seconds)
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                latencies.append((time.perf_counter() - started) * 1000)
+                conn.execute(text("SELECT 1"))
+                conn.commit()
+    finally:
+        engine.dispose()
+
+    return PoolBenchmarkResult(
+        strategy=strategy,
+        requests=requests,
+        connects=counts["connects"],
+        pings=counts["pings"],
+        p50_ms=statistics.median(latencies),
+        p95_ms=_percentile(latencies, 0.95),
+        max_ms=max(latencies),
+    )
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="DB 커넥션 풀 전략별 체크아웃 지연 비교")
+    parser.add_argument("--url", default=os.environ.get("DATABASE_URL"), help="SQLAlchemy URL (기본: DATABASE_URL)")
+    parser.add_argument("--strategies", nargs="+", choices=POOL_STRATEGIES, default=list(POOL_STRATEGIES))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--idle-every", type=int, default=0)
+    parser.add_argument("--idle-seconds", type=float, default=1.5)
+    parser.add_argument("--validate-idle-seconds", type=float, default=1)
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        parser.error("--url 또는 DATABASE_URL이 필요합니다")
+
+    for strategy in args.strategies:
+        print(run_benchmark(
+            args.url,
+            strategy,
+            args.requests,
+            idle_every=args.idle_every,
+            idle_seconds=args.idle_seconds,
+            validate_idle_seconds=args.validate_idle_seconds
+        ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
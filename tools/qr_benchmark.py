@@ -0,0 +1,113 @@
+"""
+이벤트 QR 렌더링 benchmark
+
+event_handler/qr_code.py의 출력 형식별 렌더링 시간과 파일 크기를, 예전 방식(legacy:
+호출마다 logo.png를 열어 RGBA 변환 + LANCZOS 리사이즈, ERROR_CORRECT_H, qrcode의
+make_image)과 비교한다. S3 업로드는 포함하지 않는다.
+
+    python tools/qr_benchmark.py [--renders 200] [--error-correction Q] [--formats legacy png svg]
+
+첫 렌더(로고 준비)는 따로 first_ms로 보이고, 나머지는 p50/p95로 낸다.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from io import BytesIO
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "common_layer"))
+sys.path.insert(0, os.path.join(REPO_ROOT, "event_handler"))
+
+import qrcode  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from qr_code import LOGO_PATH, QR_FORMATS, QrRenderer  # noqa: E402
+
+LEGACY = "legacy"
+
+
+@dataclass
+class QrBenchmarkResult:
+    variant: str
+    renders: int
+    first_ms: float
+    p50_ms: float
+    p95_ms: float
+    bytes: int
+
+    def __str__(self) -> str:
+        return (
+            f"{self.variant:<13} renders={self.renders} first={self.first_ms:.1f}ms "
+            f"p50={self.p50_ms:.2f}ms p95={self.p95_ms:.2f}ms size={self.bytes}B"
+        )
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def render_legacy(data: str) -> bytes:
+    """qr_code 모듈 이전 EventService._create_qr_code_png의 렌더링 부분."""
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=4)
+    qr.add_data(data)
+    qr.make(fit=True)
+    qr_image = qr.make_image(fill_color="black", back_color="white").convert('RGBA')
+    logo = Image.open(LOGO_PATH)
+    if logo.mode != 'RGBA':
+        logo = logo.convert('RGBA')
+    logo_size = qr_image.size[0] // 4
+    logo = logo.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
+    pos = ((qr_image.size[0] - logo.size[0]) // 2, (qr_image.size[1] - logo.size[1]) // 2)
+    new_qr = Image.new('RGBA', qr_image.size, (255, 255, 255, 0))
+    new_qr.paste(qr_image, (0, 0))
+    new_qr.paste(logo, pos, logo)
+    buffer = BytesIO()
+    new_qr.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def run_benchmark(variant: str, renders: int, error_correction: str = "Q", client_url: str = "https://checkin.awskr.org") -> QrBenchmarkResult:
+    renderer = QrRenderer(error_correction=error_correction)
+    if variant == LEGACY:
+        render = render_legacy
+    else:
+        def render(data: str) -> bytes:
+            return renderer.render(data, variant).body
+
+    latencies, sizes = [], []
+    for i in range(renders):
+        data = f"{client_url}/?c={i % 1231:04d}{chr(65 + i % 26)}{chr(65 + i // 26 % 26)}Q"
+        started = time.perf_counter()
+        body = render(data)
+        latencies.append((time.perf_counter() - started) * 1000)
+        sizes.append(len(body))
+
+    steady = latencies[1:] or latencies
+    return QrBenchmarkResult(
+        variant=variant,
+        renders=renders,
+        first_ms=latencies[0],
+        p50_ms=statistics.median(steady),
+        p95_ms=_percentile(steady, 0.95),
+        bytes=int(statistics.median(sizes)),
+    )
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="이벤트 QR 출력 형식별 렌더링 시간과 크기 비교")
+    parser.add_argument("--formats", nargs="+", choices=(LEGACY,) + QR_FORMATS, default=[LEGACY, *QR_FORMATS])
+    parser.add_argument("--renders", type=int, default=200)
+    parser.add_argument("--error-correction", choices=("L", "M", "Q", "H"), default="Q")
+    args = parser.parse_args(argv)
+
+    for variant in args.formats:
+        print(run_benchmark(variant, args.renders, args.error_correction))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+api_handler repository backend micro-benchmark
+
+같은 /check 요청(ApiService.check_attendance)을 ApiRepository(ORM)와
+CoreApiRepository(core)로 각각 실행해, 요청당 파이썬 CPU 시간(time.process_time)과
+벽시계 시간을 비교한다. DB 왕복 수는 두 백엔드가 같으므로 차이는 쿼리 생성/컴파일과
+결과 객체 생성 비용이다.
+
+    DATABASE_URL=postgresql+psycopg://postgres@localhost/postgres \\
+        python tools/repository_benchmark.py [--requests 500] [--rounds 3]
+
+벤치마크 전용 이벤트(bench-*)와 등록자를 만들고 끝나면 지운다. 운영 DB에는 돌리지 않는다.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "common_layer"))
+sys.path.insert(0, os.path.join(REPO_ROOT, "api_handler"))
+
+from sqlalchemy import create_engine, delete  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from settings import settings  # noqa: E402
+from model import Base, Event, EventCheckIn, EventRegistration, CheckinCounter  # noqa: E402
+from hash_tool import hash_phone_number  # noqa: E402
+from schema import CheckInRequest  # noqa: E402
+from container import ApiContainer  # noqa: E402
+
+BACKENDS = ("orm", "core")
+
+
+@dataclass
+class RepositoryBenchmarkResult:
+    backend: str
+    requests: int
+    cpu_us_per_request: float
+    wall_us_per_request: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.backend:<5} requests={self.requests} "
+            f"cpu={self.cpu_us_per_request:.1f}us/req wall={self.wall_us_per_request:.1f}us/req"
+        )
+
+
+def _phone(i: int) -> str:
+    return f"010-9{i // 10000:03d}-{i % 10000:04d}"
+
+
+def _seed(Session, event_code: str, requests: int) -> list[str]:
+    now = datetime.now()
+    hashed = [hash_phone_number(_phone(i).replace("-", "")) for i in range(requests)]
+    with Session() as session:
+        session.add(Event.create(event_code, now, "benchmark", now + timedelta(hours=2), "1", "BENCH"))
+        session.add_all(EventRegistration.create(event_code, phone, "bench") for phone in hashed)
+        session.commit()
+    return hashed
+
+
+def _cleanup(Session, event_codes: list[str], phones: list[str]) -> None:
+    with Session() as session:
+        session.execute(delete(EventCheckIn).where(EventCheckIn.event_code.in_(event_codes)))
+        session.execute(delete(CheckinCounter).where(CheckinCounter.phone.in_(phones)))
+        session.execute(delete(EventRegistration).where(EventRegistration.event_code.in_(event_codes)))
+        session.execute(delete(Event).where(Event.event_code.in_(event_codes)))
+        session.commit()
+
+
+def run_benchmark(Session, backend: str, event_code: str, requests: int) -> RepositoryBenchmarkResult:
+    settings.api_repository_backend = backend
+    cpu, wall = 0.0, 0.0
+    for i in range(requests):
+        request = CheckInRequest(event_code=event_code, phone=_phone(i))
+        with Session() as session:
+            cpu_started, wall_started = time.process_time(), time.perf_counter()
+            ApiContainer(session).service.check_attendance(request)
+            session.commit()
+            cpu += time.process_time() - cpu_started
+            wall += time.perf_counter() - wall_started
+
+    return RepositoryBenchmarkResult(
+        backend=backend,
+        requests=requests,
+        cpu_us_per_request=cpu / requests * 1e6,
+        wall_us_per_request=wall / requests * 1e6,
+    )
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="ORM vs Core repository 요청당 CPU 시간 비교")
+    parser.add_argument("--url", default=os.environ.get("DATABASE_URL"), help="SQLAlchemy URL (기본: DATABASE_URL)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        parser.error("--url 또는 DATABASE_URL이 필요합니다")
+
+    settings.salt = settings.salt or "benchmark-salt"
+    settings.checkin_mode = "orm"
+
+    engine = create_engine(args.url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    results: dict[str, list[RepositoryBenchmarkResult]] = {backend: [] for backend in BACKENDS}
+    event_codes, phones = [], []
+    try:
+        for round_no in range(args.rounds):
+            # 라운드마다 백엔드 순서를 바꿔 워밍업 순서 효과를 상쇄한다.
+            for backend in (BACKENDS if round_no % 2 == 0 else BACKENDS[::-1]):
+                event_code = f"bench-{backend}-{round_no}"
+                event_codes.append(event_code)
+                phones.extend(_seed(Session, event_code, args.requests))
+                results[backend].append(run_benchmark(Session, backend, event_code, args.requests))
+    finally:
+        _cleanup(Session, event_codes, sorted(set(phones)))
+        engine.dispose()
+
+    for backend, runs in results.items():
+        best = min(runs, key=lambda result: result.cpu_us_per_request)
+        median_cpu = statistics.median(result.cpu_us_per_request for result in runs)
+        print(f"{best}  (median cpu={median_cpu:.1f}us/req over {len(runs)} rounds)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
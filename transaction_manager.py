@@ -0,0 +1 @@
+common_layer/transaction_manager.py
\ No newline at end of file